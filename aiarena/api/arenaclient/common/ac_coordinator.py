@@ -27,6 +27,7 @@ from aiarena.core.exceptions import (
 )
 from aiarena.core.models import Competition, Match
 from aiarena.core.services import matches
+from aiarena.core.services.service_implementations.internal import competition_priority
 
 from .exceptions import LadderDisabled
 
@@ -48,8 +49,9 @@ class ACCoordinator:
         return None
 
     @staticmethod
-    def next_competition_match(arenaclient: ArenaClient):
-        competition_ids = ACCoordinator._get_competition_priority_order()
+    def next_competition_match(arenaclient: ArenaClient, competition_ids: list[int] | None = None):
+        if competition_ids is None:
+            competition_ids = ACCoordinator._get_competition_priority_order()
         for id in competition_ids:
             competition = Competition.objects.get(id=id)
             # This excludes non-trusted clients from competitions requiring trusted infrastructure
@@ -108,6 +110,54 @@ class ACCoordinator:
         # Trying a new match
         return ACCoordinator.next_new_match(arenaclient)
 
+    @staticmethod
+    def next_matches(arenaclient: ArenaClient, count: int, only_unfinished_matches: bool) -> list[Match]:
+        """
+        Up to `count` matches, for arena clients that run several games at once.
+        The new matches are claimed in a single transaction, so that a batch is claimed whole or not at all: the locks
+        taken to claim each match are held until the whole batch is claimed. Callers that do more with the batch, such
+        as serializing it, should do that in a transaction around this one, so that a client is never left assigned
+        matches it didn't receive. The v4 next-match endpoint does, and the getNextMatches mutation runs in one as
+        every mutation does.
+        A bot can be in more than one match of a batch: MatchStarter only keeps a bot out of a second match while
+        it's in one that uses and updates its data.
+        """
+        if not config.LADDER_ENABLED:
+            raise LadderDisabled()
+
+        claimed = []
+        if config.REISSUE_UNFINISHED_MATCHES:
+            # Reissue any unfinished matches assigned to this client first.
+            claimed = list(
+                Match.objects.only("id", "map")
+                .filter(
+                    result=None,
+                    started__isnull=False,
+                    assigned_to=arenaclient,
+                )
+                .order_by("round_id")[:count]
+            )
+            if only_unfinished_matches:
+                return claimed
+
+        with transaction.atomic():
+            competition_ids = None  # worked out at most once per batch
+            requested_matches_left = True
+            while len(claimed) < count:
+                match = None
+                if requested_matches_left:
+                    match = ACCoordinator.next_requested_match(arenaclient)
+                    # Requested matches that can't be started now won't become startable later in the batch.
+                    requested_matches_left = match is not None
+                if match is None:
+                    if competition_ids is None:
+                        competition_ids = ACCoordinator._get_competition_priority_order()
+                    match = ACCoordinator.next_competition_match(arenaclient, competition_ids)
+                if match is None:
+                    break
+                claimed.append(match)
+        return claimed
+
     @staticmethod
     def _get_competition_priority_order():
         """
@@ -116,6 +166,10 @@ class ACCoordinator:
          In otherwords, campetitions with higher active participant counts should play more matches overall.
         :return:
         """
+        if config.COMPETITION_PRIORITY_COUNTERS_ENABLED:
+            competition_priority_order = competition_priority.get_order()
+            if competition_priority_order is not None:
+                return competition_priority_order
 
         competition_priority_order = cache.get("competition_priority_order")
         if not competition_priority_order:
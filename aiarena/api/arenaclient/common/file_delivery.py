@@ -0,0 +1,80 @@
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from aiarena.core.s3_helpers import get_cached_file_s3_url_with_content_disposition, is_s3_file
+
+
+_SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 2**20
+
+
+def file_response(request, file, file_name, md5hash):
+    """
+    A response with a stored zip, once the caller has decided the request may have it.
+
+    So that a large file doesn't tie up a worker for the whole transfer, files on S3 are redirected to a presigned URL
+    and, with PRIVATE_MEDIA_X_ACCEL_REDIRECT set, files on disk are handed over to nginx. Both of those handle Range
+    and If-None-Match requests themselves, which is what lets an interrupted download resume. Otherwise the file is
+    served from here, honouring a single Range.
+    An If-None-Match of the file's MD5 is answered with a 304 in any case.
+    """
+    etag = quote_etag(md5hash) if md5hash else None
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    if is_s3_file(file):
+        return HttpResponseRedirect(get_cached_file_s3_url_with_content_disposition(file, file_name, md5hash))
+
+    if settings.PRIVATE_MEDIA_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type="application/zip")
+        response["X-Accel-Redirect"] = settings.PRIVATE_MEDIA_X_ACCEL_REDIRECT + quote(file.name)
+    else:
+        response = _ranged_file_response(request, file, etag)
+    response["Content-Disposition"] = f'inline; filename="{file_name}"'
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def _ranged_file_response(request, file, etag):
+    size = file.size
+    byte_range = _SINGLE_RANGE.match(request.headers.get("Range", ""))
+    # A Range that's only for another version of the file (If-Range) gets the whole of this one.
+    if byte_range is None or byte_range.groups() == ("", "") or request.headers.get("If-Range", etag) != etag:
+        response = FileResponse(file.open("rb"), content_type="application/zip")
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    first, last = byte_range.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        # A suffix range: the last so many bytes.
+        start, end = max(size - int(last), 0), size - 1
+    if start > end:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    response = StreamingHttpResponse(_read(file, start, end + 1 - start), status=206, content_type="application/zip")
+    response["Content-Length"] = end + 1 - start
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _read(file, start, length):
+    with file.open("rb") as stream:
+        stream.seek(start)
+        while length > 0:
+            chunk = stream.read(min(_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
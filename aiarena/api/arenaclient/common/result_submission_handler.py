@@ -2,23 +2,18 @@ import logging
 from dataclasses import dataclass
 from typing import Any
 
-from django.conf import settings
 from django.db import transaction
-from django.db.models import F, Prefetch, Sum
+from django.db.models import Prefetch
 
-from constance import config
 from rest_framework.exceptions import APIException
 
-from aiarena.core.models import (
-    BotCrashLimitAlert,
-    CompetitionParticipation,
-    Match,
-    MatchParticipation,
-    MatchTag,
-    Result,
-    Tag,
+from aiarena.core.models import Match, MatchParticipation, Result
+from aiarena.core.services.service_implementations.internal import (
+    elo_ledger,
+    match_availability,
+    match_tags,
+    result_processing,
 )
-from aiarena.core.services import bot_statistics, bots, competitions
 from aiarena.core.utils import parse_tags
 
 from .serializers import (
@@ -176,6 +171,8 @@ def submit_result(result_submission: ResultSubmission):
 
     result_submission.match.result = result
     result_submission.match.save()
+    # The result frees up both bots, and each may be able to play another match.
+    match_availability.announce(2)
 
     # Process competition-related logic (ELO, stats, crash checks)
     process_competition_result(result, participant1, participant2)
@@ -194,49 +191,32 @@ def update_match_tags(
     parsed_bot1_tags = parse_tags(bot1_tags)
     parsed_bot2_tags = parse_tags(bot2_tags)
 
-    # Union tags if both bots belong to the same user
+    # A user's tags are only replaced if their bot sent some.
+    tags_by_user_id = {}
     if bot1_user == bot2_user:
-        total_tags = list(
-            set(parsed_bot1_tags if parsed_bot1_tags else []) | set(parsed_bot2_tags if parsed_bot2_tags else [])
-        )
-
+        # Union tags if both bots belong to the same user
+        total_tags = set(parsed_bot1_tags) | set(parsed_bot2_tags)
         if total_tags:
-            total_match_tags = []
-            for tag in total_tags:
-                tag_obj = Tag.objects.get_or_create(name=tag)
-                total_match_tags.append(MatchTag.objects.get_or_create(tag=tag_obj[0], user=bot1_user)[0])
-            # remove tags for this match that belong to this user and were not sent in the form
-            match.tags.remove(*match.tags.filter(user=bot1_user).exclude(id__in=[mt.id for mt in total_match_tags]))
-            # add everything, this shouldn't cause duplicates
-            match.tags.add(*total_match_tags)
+            tags_by_user_id[bot1_user.id] = list(total_tags)
     else:
         if parsed_bot1_tags:
-            p1_match_tags = []
-            for tag in parsed_bot1_tags:
-                tag_obj = Tag.objects.get_or_create(name=tag)
-                p1_match_tags.append(MatchTag.objects.get_or_create(tag=tag_obj[0], user=bot1_user)[0])
-            # remove tags for this match that belong to this user and were not sent in the form
-            match.tags.remove(*match.tags.filter(user=bot1_user).exclude(id__in=[mt.id for mt in p1_match_tags]))
-            # add everything, this shouldn't cause duplicates
-            match.tags.add(*p1_match_tags)
-
+            tags_by_user_id[bot1_user.id] = parsed_bot1_tags
         if parsed_bot2_tags:
-            p2_match_tags = []
-            for tag in parsed_bot2_tags:
-                tag_obj = Tag.objects.get_or_create(name=tag)
-                p2_match_tags.append(MatchTag.objects.get_or_create(tag=tag_obj[0], user=bot2_user)[0])
-            # remove tags for this match that belong to this user and were not sent in the form
-            match.tags.remove(*match.tags.filter(user=bot2_user).exclude(id__in=[mt.id for mt in p2_match_tags]))
-            # add everything, this shouldn't cause duplicates
-            match.tags.add(*p2_match_tags)
+            tags_by_user_id[bot2_user.id] = parsed_bot2_tags
+    match_tags.set_tags(match, tags_by_user_id)
 
 
 def process_competition_result(result: Result, participant1: MatchParticipation, participant2: MatchParticipation):
-    """Process ELO, stats, and crash checks for a competition match result."""
+    """Adjust ELO for a competition match result, then process the rest of it (round completion, stats, checks)."""
+    # Every result counts towards its bots' crash streaks, requested matches included.
+    result_processing.update_crash_streaks(result, [participant1, participant2])
+
     if result.match.round is None:
         return
 
-    competitions.update_competition_round_if_completed(result.match.round)
+    # The result works from these participations, and their competition participants if they're loaded already,
+    # rather than loading its own.
+    result.get_match_participants = participant1, participant2
 
     # Update and record ELO figures
     participant1.starting_elo, participant2.starting_elo = result.get_initial_elos
@@ -265,70 +245,7 @@ def process_competition_result(result: Result, participant1: MatchParticipation,
             f"participant1.elo_change: {participant1.elo_change}. "
             f"participant2.elo_change: {participant2.elo_change}"
         )
+        # Put it on the books, so that the ELO sanity check keeps failing until it's been looked into.
+        elo_ledger.record(result.match.round.competition_id, resultant_elo_sum - initial_elo_sum)
 
-    if config.ENABLE_ELO_SANITY_CHECK:
-        if config.DEBUG_LOGGING_ENABLED:
-            logger.info("ENABLE_ELO_SANITY_CHECK enabled. Performing check.")
-
-        # test here to check ELO total and ensure no corruption
-        match_competition = result.match.round.competition
-        expected_elo_sum = (
-            settings.ELO_START_VALUE * CompetitionParticipation.objects.filter(competition=match_competition).count()
-        )
-        actual_elo_sum = CompetitionParticipation.objects.filter(competition=match_competition).aggregate(Sum("elo"))
-
-        if actual_elo_sum["elo__sum"] != expected_elo_sum:
-            logger.critical(
-                f"ELO SANITY CHECK FAILURE: ELO sum of {actual_elo_sum['elo__sum']} did not match expected value "
-                f"of {expected_elo_sum} upon submission of result {result.id}"
-            )
-        elif config.DEBUG_LOGGING_ENABLED:
-            logger.info("ENABLE_ELO_SANITY_CHECK passed!")
-
-    elif config.DEBUG_LOGGING_ENABLED:
-        logger.info("ENABLE_ELO_SANITY_CHECK disabled. Skipping check.")
-
-    bot_statistics.update_stats_based_on_result(sp1, result, sp2)
-    bot_statistics.update_stats_based_on_result(sp2, result, sp1)
-
-    if result.is_crash_or_timeout:
-        try:
-            run_consecutive_crashes_check(result.get_causing_participant_of_crash_or_timeout_result)
-        except Exception as e:
-            logger.exception(e)
-
-
-def run_consecutive_crashes_check(triggering_participation: MatchParticipation):
-    """
-    Checks to see whether the last X results for a participant are crashes and, if so, sends an alert.
-    :param triggering_participant: The participant who triggered this check and whose bot we should run the check for.
-    :return:
-    """
-
-    if config.BOT_CONSECUTIVE_CRASH_LIMIT < 1:
-        return  # Check is disabled
-
-    if not triggering_participation.bot.competition_participations.filter(active=True).exists():
-        return  # No use running the check - bot is already inactive.
-
-    # Get recent match participation records for this bot since its last update
-    recent_participations = MatchParticipation.objects.filter(
-        bot=triggering_participation.bot, match__result__isnull=False, match__started__gt=F("bot__bot_zip_updated")
-    ).order_by("-match__result__created")[: config.BOT_CONSECUTIVE_CRASH_LIMIT]
-
-    # if there's not enough participations yet, then exit without action
-    if recent_participations.count() < config.BOT_CONSECUTIVE_CRASH_LIMIT:
-        return
-
-    # if any of the previous results weren't a crash or already triggered a crash limit alert, then exit without action
-    for recent_participation in recent_participations:
-        if not recent_participation.crashed:
-            return
-        elif recent_participation.triggered_a_crash_limit_alert:
-            return
-
-    # Log a crash alert
-    BotCrashLimitAlert.objects.create(triggering_match_participation=triggering_participation)
-
-    # If we get to here, all the results were crashes, so take action
-    bots.send_crash_alert(triggering_participation.bot)
+    result_processing.process(result)
@@ -21,10 +21,14 @@ class BotSerializer(serializers.ModelSerializer):
     plays_race = serializers.CharField(source="plays_race.label")
 
     def get_bot_zip(self, obj):
-        return get_bot_zip_url(obj, self.root.instance.id, context=self.context)
+        return get_bot_zip_url(self.participation_of(obj), request=self.context.get("request"))
 
     def get_bot_data(self, obj):
-        return get_bot_data_url(obj, self.root.instance.id, context=self.context)
+        return get_bot_data_url(self.participation_of(obj), request=self.context.get("request"))
+
+    def participation_of(self, bot):
+        """The bot's participation in the match being serialized, which the view sets on the bot as it loads it."""
+        return bot.match_participation
 
     class Meta:
         model = Bot
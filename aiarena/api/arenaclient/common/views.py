@@ -1,8 +1,6 @@
 import logging
-from wsgiref.util import FileWrapper
 
 from django.core.cache import cache
-from django.http import HttpResponse
 
 from constance import config
 from rest_framework import mixins, status, viewsets
@@ -10,6 +8,7 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
+from aiarena.core import traffic
 from aiarena.core.models import (
     Match,
     MatchParticipation,
@@ -18,6 +17,7 @@ from aiarena.core.permissions import IsArenaClient, IsArenaClientOrAdminUser
 
 from .ac_coordinator import ACCoordinator
 from .exceptions import LadderDisabled, NoGameForClient
+from .file_delivery import file_response
 from .result_submission_handler import handle_result_submission
 from .serializers import (
     MatchSerializer,
@@ -41,20 +41,26 @@ class MatchViewSet(viewsets.GenericViewSet):
     swagger_schema = None  # exclude this from swagger generation
 
     def load_participants(self, match: Match):
-        match.bot1 = (
-            MatchParticipation.objects.select_related("bot")
-            .only("bot")
-            .get(match_id=match.id, participant_number=1)
-            .bot
-        )
-        match.bot2 = (
-            MatchParticipation.objects.select_related("bot")
-            .only("bot")
-            .get(match_id=match.id, participant_number=2)
-            .bot
-        )
+        self.load_participants_of_matches([match])
+
+    def load_participants_of_matches(self, matches: list[Match]):
+        """
+        Sets bot1 and bot2 on each match, with one query however many matches there are. Each is a bot instance of
+        its own, with its participation in that match set as match_participation, for the serializer to find it by:
+        a bot can be in more than one of the matches.
+        """
+        participations = {
+            (participation.match_id, participation.participant_number): participation
+            for participation in MatchParticipation.objects.select_related("bot").filter(match__in=matches)
+        }
+        for participation in participations.values():
+            participation.bot.match_participation = participation
+        for match in matches:
+            match.bot1 = participations[(match.id, 1)].bot
+            match.bot2 = participations[(match.id, 2)].bot
 
     def create(self, request, *args, **kwargs):
+        traffic.tag_endpoint(request, "ac_next_match", query_budget=95)
         no_game_available = cache.get("NoGameAvailable", False)
 
         if request.user.is_arenaclient:
@@ -81,9 +87,7 @@ class MatchViewSet(viewsets.GenericViewSet):
     def download_zip(self, request, *args, **kwargs):
         p = MatchParticipation.objects.get(match=kwargs["pk"], participant_number=kwargs["p_num"])
         if p.bot.can_download_bot_zip(request.user):
-            response = HttpResponse(FileWrapper(p.bot.bot_zip), content_type="application/zip")
-            response["Content-Disposition"] = f'inline; filename="{p.bot.name}.zip"'
-            return response
+            return file_response(request, p.bot.bot_zip, f"{p.bot.name}.zip", p.bot.bot_zip_md5hash)
         else:
             raise PermissionDenied("You cannot download that bot zip.")
 
@@ -97,9 +101,7 @@ class MatchViewSet(viewsets.GenericViewSet):
     def download_data(self, request, *args, **kwargs):
         p = MatchParticipation.objects.get(match=kwargs["pk"], participant_number=kwargs["p_num"])
         if p.bot.can_download_bot_data(request.user):
-            response = HttpResponse(FileWrapper(p.bot.bot_data), content_type="application/zip")
-            response["Content-Disposition"] = f'inline; filename="{p.bot.name}_data.zip"'
-            return response
+            return file_response(request, p.bot.bot_data, f"{p.bot.name}_data.zip", p.bot.bot_data_md5hash)
         else:
             raise PermissionDenied("You cannot download that bot data.")
 
@@ -117,6 +119,7 @@ class ResultViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     swagger_schema = None  # exclude this from swagger generation
 
     def create(self, request, *args, **kwargs):
+        traffic.tag_endpoint(request, "ac_submit_result", query_budget=125)
         if not config.LADDER_ENABLED:
             raise LadderDisabled()
 
@@ -161,4 +164,5 @@ class SetArenaClientStatusViewSet(mixins.CreateModelMixin, viewsets.GenericViewS
     swagger_schema = None  # exclude this from swagger generation
 
     def perform_create(self, serializer):
+        traffic.tag_endpoint(self.request, "ac_set_status", query_budget=10)
         serializer.save(arenaclient=self.request.user.arenaclient)
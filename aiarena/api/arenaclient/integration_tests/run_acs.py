@@ -3,7 +3,7 @@ import logging
 import multiprocessing
 import sys
 from multiprocessing import Process
-from time import sleep
+from time import monotonic, sleep
 
 from aiarena.api.arenaclient.integration_tests.mock_ac import MockArenaClient
 
@@ -27,7 +27,7 @@ def retrieve_args() -> argparse.Namespace:
     return arg_parser.parse_args()
 
 
-def run_ac(ac_id, num_matches, lock, total_matches_to_run, api_url, ac_sleep_time):
+def run_ac(ac_id, num_matches, num_empty_polls, lock, total_matches_to_run, api_url, ac_sleep_time):
     ac_id = str(ac_id)
     ac_token = ac_id
 
@@ -46,6 +46,8 @@ def run_ac(ac_id, num_matches, lock, total_matches_to_run, api_url, ac_sleep_tim
 
         # don't quit until this match is run
         while not ac.run_a_match():
+            with num_empty_polls.get_lock():
+                num_empty_polls.value += 1
             logger.debug(f"AC {ac_id} is sleeping")
             sleep(ac_sleep_time)
 
@@ -54,20 +56,34 @@ if __name__ == "__main__":
     args = retrieve_args()
     processes = []
     matches_played_count = multiprocessing.Value("i", 0)
+    empty_polls_count = multiprocessing.Value("i", 0)
     lock = multiprocessing.Lock()
 
     for ac_id in range(args.num_acs):
         processes.append(
             Process(
                 target=run_ac,
-                args=(ac_id, matches_played_count, lock, args.num_matches_to_run, args.api_url, args.ac_sleep_time),
+                args=(
+                    ac_id,
+                    matches_played_count,
+                    empty_polls_count,
+                    lock,
+                    args.num_matches_to_run,
+                    args.api_url,
+                    args.ac_sleep_time,
+                ),
             )
         )
 
+    started_at = monotonic()
     for p in processes:
         p.start()
 
     for p in processes:
         p.join()
+    elapsed = monotonic() - started_at
 
     logger.info(f"Total matches played: {matches_played_count.value}")
+    # Compare these between runs to measure the effect of a scheduling change, e.g. SKIP_LOCKED_MATCH_CLAIMING.
+    logger.info(f"Elapsed: {elapsed:.1f}s, throughput: {matches_played_count.value / elapsed:.2f} matches/s")
+    logger.info(f"Polls that found no match: {empty_polls_count.value}")
@@ -1,12 +1,17 @@
-from django.test import TransactionTestCase
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
 
 from constance import config
 from rest_framework.authtoken.models import Token
 
-from aiarena.core.models import ArenaClient, GameMode, Map, Match, User
+from aiarena.core.models import ArenaClient, Bot, Competition, GameMode, Map, Match, MatchParticipation, User
 from aiarena.core.models.bot_race import BotRace
 from aiarena.core.services import bots, match_requests
+from aiarena.core.services.service_implementations.internal import match_availability
 from aiarena.core.tests.test_mixins import LoggedInMixin
+from aiarena.core.tests.testing_utils import assert_within_query_budget
 from aiarena.core.utils import calculate_md5
 
 
@@ -239,6 +244,210 @@ class MatchesTestCase(LoggedInMixin, TransactionTestCase):
         # now we should be able to get a match - the requested one
         self.test_ac_api_client.post_to_matches()
 
+    def test_claim_several_matches(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot3", BotRace.protoss())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot4", BotRace.random())
+
+        url = reverse("v4_ac_next_match-list")
+
+        # too many
+        response = self.test_ac_api_client.post(url, {"count": config.MAX_MATCHES_PER_CLAIM + 1})
+        self.assertEqual(response.status_code, 400)
+
+        # four bots only make two matches that don't share a bot
+        response = self.test_ac_api_client.post(url, {"count": 3})
+        self.assertEqual(response.status_code, 201)
+        match_ids = [match["id"] for match in response.data["matches"]]
+        self.assertEqual(len(match_ids), 2)
+        self.assertTrue(all(match["bot1"]["bot_zip"] and match["map"] for match in response.data["matches"]))
+
+        bot_ids = MatchParticipation.objects.filter(match_id__in=match_ids).values_list("bot_id", flat=True)
+        self.assertEqual(len(set(bot_ids)), 4)
+        self.assertEqual(Match.objects.filter(started__isnull=False).count(), 2)
+
+        # every bot is busy now
+        response = self.test_ac_api_client.post(url, {"count": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual("no_game_available", response.data["detail"].code)
+
+    def test_claim_several_matches_of_a_bot_without_data(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot3", BotRace.protoss())
+        # Bots that don't use their data can be in more than one match at once.
+        Bot.objects.update(bot_data_enabled=False)
+
+        response = self.test_ac_api_client.post(reverse("v4_ac_next_match-list"), {"count": 3})
+        self.assertEqual(response.status_code, 201)
+        matches = response.data["matches"]
+        bot_ids = [match[f"bot{p_num}"]["id"] for match in matches for p_num in (1, 2)]
+        self.assertLess(len(set(bot_ids)), len(bot_ids))
+
+        # Each bot's files are those of its participation in that match.
+        for match in matches:
+            for p_num in (1, 2):
+                bot = match[f"bot{p_num}"]
+                self.assertTrue(
+                    bot["bot_zip"].endswith(reverse("match-download-zip", kwargs={"pk": match["id"], "p_num": p_num}))
+                )
+                self.assertIsNone(bot["bot_data"])
+
+    def test_claims_are_undone_if_serializing_fails(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot3", BotRace.protoss())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot4", BotRace.random())
+
+        url = reverse("v4_ac_next_match-list")
+        with mock.patch(
+            "aiarena.api.arenaclient.v4.views.V4MatchViewSet.load_participants_of_matches", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.test_ac_api_client.post(url, {"count": 2})
+        self.assertFalse(Match.objects.filter(started__isnull=False).exists())
+
+        # the matches are there for the next claim
+        response = self.test_ac_api_client.post(url, {"count": 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["matches"]), 2)
+
+    def test_wait_for_match(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+        config.MAX_MATCH_WAIT_SECONDS = 5
+
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+
+        url = reverse("v4_ac_next_match-list")
+
+        # too long
+        response = self.test_ac_api_client.post(url, {"wait": 6})
+        self.assertEqual(response.status_code, 400)
+
+        # too long for uwsgi, whatever the setting
+        config.MAX_MATCH_WAIT_SECONDS = 60
+        response = self.test_ac_api_client.post(url, {"wait": match_availability.MAX_WAIT_SECONDS + 1})
+        self.assertEqual(response.status_code, 400)
+        config.MAX_MATCH_WAIT_SECONDS = 5
+
+        # the opponent turns up while the client waits
+        def opponent_turns_up(timeout):
+            self.assertGreater(timeout, 0)
+            self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+            return True
+
+        with mock.patch.object(match_availability, "wait", side_effect=opponent_turns_up) as wait:
+            response = self.test_ac_api_client.post(url, {"wait": 5})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["matches"]), 1)
+        self.assertEqual(wait.call_count, 1)
+
+        # nothing turns up
+        with mock.patch.object(match_availability, "wait", return_value=False):
+            response = self.test_ac_api_client.post(url, {"wait": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual("no_game_available", response.data["detail"].code)
+
+    def test_resumed_and_unchanged_downloads(self):
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+        bot1 = self._post_to_matches().data["bot1"]
+
+        whole = b"".join(self.client.get(bot1["bot_zip"]).streaming_content)
+        resumed = self.client.get(bot1["bot_zip"], headers={"Range": "bytes=10-"})
+        self.assertEqual(resumed.status_code, 206)
+        self.assertEqual(resumed["Content-Range"], f"bytes 10-{len(whole) - 1}/{len(whole)}")
+        self.assertEqual(b"".join(resumed.streaming_content), whole[10:])
+
+        unchanged = self.client.get(bot1["bot_zip"], headers={"If-None-Match": f'"{bot1["bot_zip_md5hash"]}"'})
+        self.assertEqual(unchanged.status_code, 304)
+
+    def test_presigned_urls_are_reused(self):
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot1", BotRace.terran())
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "testbot2", BotRace.zerg())
+
+        with (
+            override_settings(
+                PRESIGNED_URL_CACHE_TIME=60,
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+            ),
+            mock.patch("aiarena.api.arenaclient.common.file_utils.is_s3_file", return_value=True),
+            mock.patch(
+                "aiarena.core.s3_helpers.get_file_s3_url_with_content_disposition",
+                side_effect=lambda file, file_name: f"https://s3/{file.name}",
+            ) as presign,
+        ):
+            first = self._post_to_matches().data
+            presigned = presign.call_count
+            # the unfinished match is handed out again
+            second = self._post_to_matches().data
+
+        self.assertEqual(first["id"], second["id"])
+        self.assertEqual(first["bot1"]["bot_zip"], second["bot1"]["bot_zip"])
+        self.assertGreaterEqual(presigned, 2)
+        self.assertEqual(presign.call_count, presigned)
+
+    def _create_competition_with_indepth_stats(self, bot_count):
+        self.test_client.login(self.staffUser1)
+        comp = self._create_game_mode_and_open_competition()
+        Competition.objects.filter(id=comp.id).update(indepth_bot_statistics_enabled=True)
+        self._create_map_for_competition("test_map", comp.id)
+        for i in range(bot_count):
+            self._create_active_bot_for_competition(comp.id, self.regularUser1, f"testbot{i}", BotRace.terran())
+
+    def test_query_budgets(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+        # The costliest results: ones that update in-depth stats, and set off a crash alert.
+        config.BOT_CONSECUTIVE_CRASH_LIMIT = 1
+        self._create_competition_with_indepth_stats(bot_count=4)
+
+        # the first match generates the round
+        response = self._post_to_matches()
+        assert_within_query_budget(response)
+        first_match_id = response.data["id"]
+        response = self._post_to_matches()
+        assert_within_query_budget(response)
+
+        assert_within_query_budget(self._post_to_results(first_match_id, "Player1Crash", ["tag1"], ["tag2", "tag3"]))
+
+    def test_claim_several_matches_query_budget(self):
+        config.REISSUE_UNFINISHED_MATCHES = False
+        self._create_competition_with_indepth_stats(bot_count=8)
+        url = reverse("v4_ac_next_match-list")
+
+        # the first claim generates the round
+        for _ in range(2):
+            response = self.test_ac_api_client.post(url, {"count": 2})
+            self.assertEqual(len(response.data["matches"]), 2)
+            assert_within_query_budget(response)
+
     def test_untrusted_competition(self):
         untrustedClient = ArenaClient.objects.create(
             username="untrustedclient",
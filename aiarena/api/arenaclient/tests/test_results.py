@@ -1,4 +1,5 @@
 from django.test import TransactionTestCase
+from django.utils import timezone
 
 from constance import config
 
@@ -151,6 +152,45 @@ class ResultsTestCase(LoggedInMixin, TransactionTestCase):
         self.assertTrue(BotCrashLimitAlert.objects.count() == 1)
         self._log_match_crash(bot1)
         self.assertTrue(BotCrashLimitAlert.objects.count() == 2)
+        bot1.refresh_from_db()
+        self.assertEqual(bot1.consecutive_crashes, 2 * config.BOT_CONSECUTIVE_CRASH_LIMIT)
+
+    def test_crash_streak_is_broken_by_a_non_crash(self):
+        self.test_client.login(self.staffUser1)
+
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+
+        bot1 = self._create_active_bot_for_competition(comp.id, self.regularUser1, "bot1")
+        bot2 = self._create_active_bot_for_competition(comp.id, self.regularUser1, "bot2", BotRace.zerg())
+
+        self._log_match_crash(bot1)
+        self._log_match_crash(bot1)
+        bot1.refresh_from_db()
+        self.assertEqual(bot1.consecutive_crashes, 2)
+
+        match = self._post_to_matches().data
+        self._post_to_results(match["id"], "Tie")
+        bot1.refresh_from_db()
+        bot2.refresh_from_db()
+        self.assertEqual(bot1.consecutive_crashes, 0)
+        self.assertEqual(bot2.consecutive_crashes, 0)
+
+    def test_crash_streak_is_not_broken_by_a_match_started_before_a_zip_update(self):
+        self.test_client.login(self.staffUser1)
+
+        comp = self._create_game_mode_and_open_competition()
+        self._create_map_for_competition("test_map", comp.id)
+
+        bot1 = self._create_active_bot_for_competition(comp.id, self.regularUser1, "bot1")
+        self._create_active_bot_for_competition(comp.id, self.regularUser1, "bot2", BotRace.zerg())
+
+        match = self._post_to_matches().data
+        # The bot's zip is updated while the match is played, and the new zip has crashed since.
+        Bot.objects.filter(id=bot1.id).update(bot_zip_updated=timezone.now(), consecutive_crashes=1)
+        self._post_to_results(match["id"], "Tie")
+        bot1.refresh_from_db()
+        self.assertEqual(bot1.consecutive_crashes, 1)
 
     def _log_match_crash(self, bot1):
         match = self._post_to_matches().data
@@ -2,6 +2,7 @@ from django.test import TransactionTestCase
 
 from aiarena.core.models import User
 from aiarena.core.tests.test_mixins import LoggedInMixin
+from aiarena.core.tests.testing_utils import assert_within_query_budget
 
 
 class SetStatusTestCase(LoggedInMixin, TransactionTestCase):
@@ -11,3 +12,6 @@ class SetStatusTestCase(LoggedInMixin, TransactionTestCase):
 
     def test_set_status(self):
         return self.client.post("/api/arenaclient/set-status/", {"status": "idle"})
+
+    def test_set_status_query_budget(self):
+        assert_within_query_budget(self.client.post("/api/arenaclient/set-status/", {"status": "idle"}))
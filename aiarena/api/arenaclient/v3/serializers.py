@@ -2,23 +2,24 @@ from rest_framework import serializers
 
 from aiarena.api.arenaclient.common.serializers import BotSerializer
 from aiarena.api.arenaclient.v2.serializers import V2MatchSerializer
-from aiarena.core.utils import obtain_s3_filehash_or_default
+from aiarena.core.utils import cached_s3_filehash_or_default
 
 
 class V3BotSerializer(BotSerializer):
     """
     This serializer overrides the md5hash fields to return the S3 etag instead of the local storage md5hash.
     This is to enable a migration path which will culminate in the removal of the md5hash fields.
+    The etags are cached on the bot, so handing out a match doesn't need to ask S3 for them.
     """
 
     bot_zip_md5hash = serializers.SerializerMethodField()
     bot_data_md5hash = serializers.SerializerMethodField()
 
     def get_bot_zip_md5hash(self, obj):
-        return obtain_s3_filehash_or_default(obj.bot_zip, default=obj.bot_zip_md5hash)
+        return cached_s3_filehash_or_default(obj.bot_zip, obj.bot_zip_s3_etag, default=obj.bot_zip_md5hash)
 
     def get_bot_data_md5hash(self, obj):
-        return obtain_s3_filehash_or_default(obj.bot_data, default=obj.bot_zip_md5hash)
+        return cached_s3_filehash_or_default(obj.bot_data, obj.bot_data_s3_etag, default=obj.bot_zip_md5hash)
 
 
 class V3MatchSerializer(V2MatchSerializer):
@@ -0,0 +1,20 @@
+from constance import config
+from rest_framework import serializers
+
+from aiarena.core.services.service_implementations.internal import match_availability
+
+
+class ClaimMatchesSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, default=1)
+    wait = serializers.IntegerField(min_value=0, default=0)
+
+    def validate_count(self, value):
+        if value > config.MAX_MATCHES_PER_CLAIM:
+            raise serializers.ValidationError(f"At most {config.MAX_MATCHES_PER_CLAIM} matches can be claimed at once.")
+        return value
+
+    def validate_wait(self, value):
+        max_wait = min(config.MAX_MATCH_WAIT_SECONDS, match_availability.MAX_WAIT_SECONDS)
+        if value > max_wait:
+            raise serializers.ValidationError(f"At most {max_wait} seconds can be waited.")
+        return value
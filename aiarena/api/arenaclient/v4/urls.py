@@ -0,0 +1,12 @@
+from rest_framework.routers import DefaultRouter
+
+from aiarena.api.arenaclient.v4.views import V4MatchViewSet, V4ResultViewSet, V4SetArenaClientStatusViewSet
+
+
+router = DefaultRouter()
+
+router.register(r"next-match", V4MatchViewSet, basename="v4_ac_next_match")
+router.register(r"submit-result", V4ResultViewSet, basename="v4_ac_submit_result")
+router.register(r"set-status", V4SetArenaClientStatusViewSet, basename="v4_api_ac_set_status")
+
+urlpatterns = router.urls
@@ -0,0 +1,69 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from constance import config
+from rest_framework import status
+from rest_framework.response import Response
+
+from aiarena.api.arenaclient.common.ac_coordinator import ACCoordinator
+from aiarena.api.arenaclient.common.exceptions import NoGameForClient
+from aiarena.api.arenaclient.v3.views import V3MatchViewSet, V3ResultViewSet, V3SetArenaClientStatusViewSet
+from aiarena.api.arenaclient.v4.serializers import ClaimMatchesSerializer
+from aiarena.core import traffic
+from aiarena.core.services.service_implementations.internal import match_availability
+
+
+class V4MatchViewSet(V3MatchViewSet):
+    """
+    Claims up to `count` matches per call, for arena clients that run several games at once.
+    The matches are returned as a list under "matches", each serialized as in V3.
+
+    If there's nothing to play, the call can `wait` up to that many seconds for something to become playable,
+    instead of the client sleeping and polling again.
+    """
+
+    def create(self, request, *args, **kwargs):
+        claim = ClaimMatchesSerializer(data=request.data)
+        claim.is_valid(raise_exception=True)
+        count = claim.validated_data["count"]
+        wait = claim.validated_data["wait"]
+        # A round generated, then the search for each match claimed.
+        traffic.tag_endpoint(request, "ac_next_matches", query_budget=70 + 40 * count)
+
+        no_game_available = cache.get("NoGameAvailable", False)
+
+        if request.user.is_arenaclient:
+            arenaclient = request.user.arenaclient
+            deadline = time.monotonic() + wait
+            matches = self.claim_matches(arenaclient, count, no_game_available)
+            if not matches and not no_game_available:
+                cache.set("NoGameAvailable", True, config.GAME_AVAILABLE_CACHE_TIME)
+
+            # Something may have become playable since NoGameAvailable was set, so don't heed it on a wake-up.
+            while not matches and wait and match_availability.wait(deadline - time.monotonic()):
+                matches = self.claim_matches(arenaclient, count, only_unfinished_matches=False)
+
+            if matches:
+                return Response({"matches": matches}, status=status.HTTP_201_CREATED)
+
+        raise NoGameForClient()
+
+    def claim_matches(self, arenaclient, count, only_unfinished_matches):
+        """
+        The claimed matches, serialized in the transaction that claims them: if serializing fails, the matches are
+        left unclaimed rather than assigned to a client that never got them.
+        """
+        with transaction.atomic():
+            matches = ACCoordinator.next_matches(arenaclient, count, only_unfinished_matches)
+            self.load_participants_of_matches(matches)
+            return self.get_serializer(matches, many=True).data
+
+
+class V4ResultViewSet(V3ResultViewSet):
+    pass  # No changes
+
+
+class V4SetArenaClientStatusViewSet(V3SetArenaClientStatusViewSet):
+    pass  # No changes
@@ -2,6 +2,7 @@ import io
 import zipfile
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
 import pytest
 
@@ -242,6 +243,47 @@ def bot_factory():
     return create_bot
 
 
+@pytest.fixture
+def make_bot(db, user, all_bot_races, bot_factory):
+    """Bots of the user's with their data enabled, and a data file unless has_data is False."""
+
+    def _make_bot(name, has_data=True, competition=None):
+        bot = bot_factory(user=user, name=name, bot_data_enabled=True)
+        if has_data:
+            Bot.objects.filter(id=bot.id).update(bot_data=f"bot_data/{name}.zip")
+        if competition is not None:
+            CompetitionParticipation.objects.create(competition=competition, bot=bot)
+        return bot
+
+    return _make_bot
+
+
+@pytest.fixture
+def play(db, map):
+    """
+    Matches between the participants, each a bot or a (bot, result) or (bot, result, result_cause) tuple.
+    A match is in the given round, if any, and on the given map, or else the map fixture's.
+    """
+
+    def _play(*participants, started=True, update_bot_data=True, in_round=None, on_map=None):
+        match = Match.objects.create(map=on_map or map, round=in_round, started=timezone.now() if started else None)
+        for number, participant in enumerate(participants, start=1):
+            if not isinstance(participant, tuple):
+                participant = (participant,)
+            bot, result, result_cause = (*participant, None, None)[:3]
+            MatchParticipation.objects.create(
+                match=match,
+                participant_number=number,
+                bot=bot,
+                update_bot_data=update_bot_data,
+                result=result,
+                result_cause=result_cause,
+            )
+        return match
+
+    return _play
+
+
 @pytest.fixture
 def game(db):
     return Game.objects.create(
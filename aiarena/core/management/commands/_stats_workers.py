@@ -0,0 +1,50 @@
+"""
+The work generatestats hands out to its worker processes, or does itself when run without them.
+
+A spawned worker imports this module before Django is set up, so models and services are only imported once it is.
+"""
+
+from time import perf_counter
+
+import django
+from django.conf import settings
+from django.db import connection
+
+
+class QueryTimer:
+    """A connection.execute_wrapper() that adds up the time spent on queries."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += perf_counter() - started
+
+
+def init_worker(database_name):
+    django.setup()
+    # The database the command is using, which under the tests isn't the configured one.
+    settings.DATABASES["default"]["NAME"] = database_name
+
+
+def generate_participation_stats(participation_id, graphs_only) -> tuple[float, float]:
+    """
+    Generates the stats of one competition participation, and returns how many seconds were spent on queries and
+    how many on everything else, which is mostly rendering the graphs.
+    """
+    from aiarena.core.models import CompetitionParticipation
+    from aiarena.core.services import bot_statistics
+
+    timer = QueryTimer()
+    started = perf_counter()
+    with connection.execute_wrapper(timer):
+        participation = CompetitionParticipation.objects.get(id=participation_id)
+        if graphs_only:
+            bot_statistics.generate_graphs(participation)
+        else:
+            bot_statistics.recalculate_stats(participation, indepth_stats=False)
+    return timer.seconds, perf_counter() - started - timer.seconds
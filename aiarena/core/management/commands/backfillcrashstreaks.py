@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from aiarena.core.models import Bot, MatchParticipation
+
+
+class Command(BaseCommand):
+    help = "Recounts bots' consecutive crashes from their match history, e.g. once the counter has been added."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bot", type=int, action="append", help="Only recount this bot. Can be given more than once."
+        )
+
+    def handle(self, *args, **options):
+        bot_ids = Bot.objects.order_by("id").values_list("id", flat=True)
+        if options["bot"]:
+            bot_ids = bot_ids.filter(id__in=options["bot"])
+        bot_ids = list(bot_ids)
+
+        self.stdout.write(f"Recounting crash streaks of {len(bot_ids)} bots...")
+        changed = 0
+        for count, bot_id in enumerate(bot_ids):
+            self.stdout.write(f"Recounting crash streaks...{count / len(bot_ids) * 100:.0f}%", ending="\r")
+            with transaction.atomic():
+                # Hold off result submissions for the bot while its history is read.
+                bot = Bot.objects.select_for_update().only("consecutive_crashes", "bot_zip_updated").get(id=bot_id)
+                streak = 0
+                recent_participations = (
+                    MatchParticipation.objects.filter(
+                        bot_id=bot_id, match__result__isnull=False, match__started__gt=bot.bot_zip_updated
+                    )
+                    .only("result", "result_cause")
+                    .order_by("-match__result__created")
+                )
+                for participation in recent_participations.iterator(chunk_size=100):
+                    if not participation.crashed:
+                        break
+                    streak += 1
+
+                if bot.consecutive_crashes != streak:
+                    Bot.objects.filter(id=bot_id).update(consecutive_crashes=streak)
+                    changed += 1
+        self.stdout.write("Recounting crash streaks...100%")
+        self.stdout.write(f"Done. {changed} bots' streaks were out of date.")
@@ -0,0 +1,155 @@
+import io
+import random
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+import matplotlib
+import matplotlib.dates as mdates
+import matplotlib.patheffects as path_effects
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from aiarena.core.services.service_implementations.internal.statistics.graph_renderer import GraphRenderer
+
+
+matplotlib.use("agg")
+
+
+class Command(BaseCommand):
+    """
+    Doesn't touch the database: the graphs are drawn from made up data, so that only the drawing is measured.
+    """
+
+    help = (
+        "Draws the stats graphs of made up bots, as EloGraphsGenerator used to with a new pyplot figure for each graph "
+        "and then with the GraphRenderer it uses now, and reports how many graphs a second each drew."
+    )
+
+    _DEFAULT_BOTS = 50
+    _DEFAULT_MATCHES = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--numbots",
+            type=int,
+            default=self._DEFAULT_BOTS,
+            help=f"Number of bots to draw the three graphs of. Default is {self._DEFAULT_BOTS}.",
+        )
+        parser.add_argument(
+            "--nummatches",
+            type=int,
+            default=self._DEFAULT_MATCHES,
+            help=f"Number of matches each bot has played. Default is {self._DEFAULT_MATCHES}.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        bots = [self._made_up_bot(rng, options["nummatches"]) for _ in range(options["numbots"])]
+        graphs = 3 * len(bots)
+
+        started = perf_counter()
+        for dates, elos, update_date, winrate_rows in bots:
+            _PyplotGraphs.elo_graphs(dates, elos, update_date)
+            _PyplotGraphs.winrate_graph(winrate_rows)
+        before = graphs / (perf_counter() - started)
+        self.stdout.write(f"A new pyplot figure for each graph: {before:.1f} graphs/s")
+
+        started = perf_counter()
+        renderer = GraphRenderer()
+        for dates, elos, update_date, winrate_rows in bots:
+            renderer.render_elo_graphs(dates, np.array(elos), update_date)
+            durations, *counts = zip(*winrate_rows)
+            renderer.render_winrate_graph(durations, *(np.array(outcome_counts) for outcome_counts in counts))
+        after = graphs / (perf_counter() - started)
+        self.stdout.write(f"GraphRenderer, including setting it up: {after:.1f} graphs/s ({after / before:.1f}x)")
+
+    @staticmethod
+    def _made_up_bot(rng, num_matches):
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+        dates = sorted(start + timedelta(minutes=rng.randrange(60 * 24 * 90)) for _ in range(num_matches))
+        elos = [1600]
+        for _ in range(num_matches - 1):
+            elos.append(elos[-1] + rng.randint(-16, 16))
+        update_date = rng.choice(dates)
+        winrate_rows = [
+            (minutes, rng.randrange(50), rng.randrange(50), rng.randrange(5), rng.randrange(3))
+            for minutes in range(0, 35, 5)
+        ]
+        return dates, elos, update_date, winrate_rows
+
+
+class _PyplotGraphs:
+    """The graphs as EloGraphsGenerator drew them before GraphRenderer, as the baseline."""
+
+    @staticmethod
+    def elo_graphs(dates, elos, update_date):
+        df = pd.DataFrame({"Date": dates, "ELO": elos})
+        plot1 = io.BytesIO()
+        plot2 = io.BytesIO()
+        fig, ax1 = plt.subplots(1, 1, figsize=(12, 9), sharex="all", sharey="all")
+        ax1.plot(df["Date"], df["ELO"], color="#86c232")
+        ax1.spines["top"].set_visible(False)
+        ax1.spines["right"].set_visible(False)
+        ax1.spines["left"].set_color("#86c232")
+        ax1.spines["bottom"].set_color("#86c232")
+        ax1.autoscale(enable=True, axis="x")
+        ax1.get_xaxis().tick_bottom()
+        ax1.get_yaxis().tick_left()
+        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%b-%d"))
+        ax1.tick_params(axis="x", colors="#86c232", labelsize=16)
+        ax1.tick_params(axis="y", colors="#86c232", labelsize=16)
+        ax1.legend(["ELO"], loc="lower center", fontsize="xx-large")
+        plt.title("ELO over time", fontsize=20, color=("#86c232"))
+        plt.tight_layout()
+        plt.savefig(plot1, format="png", transparent=True)
+        ax1.vlines([update_date], min(df["ELO"]), max(df["ELO"]), colors="r", linestyles="--")
+        ax1.legend(["ELO", "Last bot update"], loc="lower center", fontsize="xx-large")
+        plt.savefig(plot2, format="png", transparent=True)
+        plt.close(fig)
+        return plot1, plot2
+
+    @staticmethod
+    def winrate_graph(rows):
+        df = pd.DataFrame(rows, columns=["Duration (Minutes)", "Wins", "Losses", "Crashes", "Ties"])
+        plot1 = io.BytesIO()
+        durations = df["Duration (Minutes)"].map(lambda x: str(x) + " - " + str(x + 5))
+        wins, losses, crashes, ties = df["Wins"], df["Losses"], df["Crashes"], df["Ties"]
+        fig, ax1 = plt.subplots(1, 1, figsize=(12, 9), sharex="all", sharey="all")
+        ax1.bar(durations, wins, 0.65, color="#86C232", label="Wins")
+        ax1.bar(durations, ties, 0.65, color="#DFCE00", bottom=wins, label="Ties")
+        ax1.bar(durations, losses, 0.65, color="#D20044", bottom=wins + ties, label="Losses")
+        ax1.bar(durations, crashes, 0.65, color="#AAAAAA", bottom=wins + ties + losses, label="Crashes")
+        ax1.spines["top"].set_visible(False)
+        ax1.spines["right"].set_visible(False)
+        ax1.spines["left"].set_color("#86c232")
+        ax1.spines["bottom"].set_color("#86c232")
+        ax1.get_xaxis().tick_bottom()
+        ax1.get_yaxis().tick_left()
+        ax1.yaxis.get_major_locator().set_params(integer=True)
+        ax1.tick_params(axis="x", colors="#86c232", labelsize=16)
+        ax1.tick_params(axis="y", colors="#86c232", labelsize=16)
+        ax1.legend(loc="upper right", fontsize="xx-large")
+        effect = [path_effects.Stroke(linewidth=3, foreground="black"), path_effects.Normal()]
+        for i, (c_wins, c_losses, c_crashes, c_ties) in enumerate(zip(wins, losses, crashes, ties)):
+            c_totals = c_wins + c_losses + c_crashes + c_ties
+            bottom = 0
+            for count in (c_wins, c_ties, c_losses, c_crashes):
+                if count > 0:
+                    plt.text(
+                        i,
+                        bottom + count / 2,
+                        str(round(count / c_totals * 100)) + "%",
+                        va="center",
+                        ha="center",
+                        color="#FFFFFF",
+                        size=20,
+                    ).set_path_effects(effect)
+                bottom += count
+        plt.title("Result vs Match Duration", fontsize=20, color=("#86c232"))
+        plt.tight_layout()
+        plt.savefig(plot1, format="png", transparent=True)
+        plt.close(fig)
+        return plot1
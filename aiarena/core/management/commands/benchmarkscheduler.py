@@ -0,0 +1,283 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from constance import config
+
+from aiarena.api.arenaclient.common.ac_coordinator import ACCoordinator
+from aiarena.api.arenaclient.common.result_submission_handler import handle_result_submission
+from aiarena.core.models import ArenaClient, BotRace, Competition, CompetitionParticipation, Map, Match, WebsiteUser
+from aiarena.core.tests.testing_utils import create_bot_for_competition
+
+
+class Command(BaseCommand):
+    """
+    Unlike /aiarena/api/arenaclient/integration_tests/run_acs.py, this runs the arena clients in-process, against the
+    local database, so that the scheduler's own cost can be measured without a webserver in the way.
+    """
+
+    help = (
+        "Seeds the database like seed_integration_tests, plus extra competitions, "
+        "then has arena clients play matches concurrently and reports on how the scheduler handed them out."
+    )
+
+    _DEFAULT_ARENACLIENTS = 10
+    _DEFAULT_COMPETITIONS = 3
+    _DEFAULT_BOTS_PER_COMPETITION = 20
+    _DEFAULT_MATCHES = 1000
+    _DEFAULT_MAX_SECONDS = 600
+    _DEFAULT_POLL_SLEEP_SECONDS = 0.1
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--numacs",
+            type=int,
+            default=self._DEFAULT_ARENACLIENTS,
+            help=f"Number of arena clients playing at once. Default is {self._DEFAULT_ARENACLIENTS}.",
+        )
+        parser.add_argument(
+            "--numcompetitions",
+            type=int,
+            default=self._DEFAULT_COMPETITIONS,
+            help=(
+                f"Number of competitions, including the one seed_integration_tests creates. "
+                f"Default is {self._DEFAULT_COMPETITIONS}."
+            ),
+        )
+        parser.add_argument(
+            "--numbots",
+            type=int,
+            default=self._DEFAULT_BOTS_PER_COMPETITION,
+            help=(
+                f"Number of bots in each extra competition. Default is {self._DEFAULT_BOTS_PER_COMPETITION}. "
+                f"The seed_integration_tests competition has 2 per arena client."
+            ),
+        )
+        parser.add_argument(
+            "--nummatches",
+            type=int,
+            default=self._DEFAULT_MATCHES,
+            help=f"Number of matches to play. Default is {self._DEFAULT_MATCHES}.",
+        )
+        parser.add_argument(
+            "--maxseconds",
+            type=float,
+            default=self._DEFAULT_MAX_SECONDS,
+            help=(
+                f"Stop after this many seconds, even if not all the matches have been played. "
+                f"Default is {self._DEFAULT_MAX_SECONDS}."
+            ),
+        )
+        parser.add_argument(
+            "--enable",
+            action="append",
+            default=[],
+            metavar="SETTING",
+            help=(
+                "A boolean constance setting to turn on once seeded, e.g. SKIP_LOCKED_MATCH_CLAIMING. "
+                "Can be given more than once. Seeding resets every setting to its default."
+            ),
+        )
+        parser.add_argument(
+            "--pollsleep",
+            type=float,
+            default=self._DEFAULT_POLL_SLEEP_SECONDS,
+            help=(
+                f"Seconds an arena client waits after a poll that found no match before polling again. "
+                f"Default is {self._DEFAULT_POLL_SLEEP_SECONDS}."
+            ),
+        )
+        parser.add_argument(
+            "--noseed",
+            action="store_true",
+            help="Play on the database as it is, instead of seeding it afresh.",
+        )
+
+    def handle(self, *args, **options):
+        if settings.ENVIRONMENT_TYPE != settings.ENVIRONMENT_TYPES.DEVELOPMENT:
+            raise CommandError("Scheduler benchmark failed: This is not a development environment!")
+
+        num_acs = options["numacs"]
+        if not options["noseed"]:
+            call_command("seed_integration_tests", numacs=num_acs, stdout=self.stdout)
+            self.create_extra_competitions(options["numcompetitions"] - 1, options["numbots"])
+
+        for setting in options["enable"]:
+            if not isinstance(getattr(config, setting, None), bool):
+                raise CommandError(f"{setting} is not a boolean constance setting.")
+            setattr(config, setting, True)
+
+        arenaclients = list(ArenaClient.objects.filter(username__startswith="aiarenaclient-").order_by("id")[:num_acs])
+        if len(arenaclients) < num_acs:
+            raise CommandError(f"Only {len(arenaclients)} arena clients exist, {num_acs} are needed.")
+
+        self.stdout.write(f"Playing {options['nummatches']} matches with {num_acs} arena clients...")
+        benchmark = SchedulerBenchmark(arenaclients, options["nummatches"], options["maxseconds"], options["pollsleep"])
+        benchmark.run()
+        self.report(benchmark)
+
+    def create_extra_competitions(self, num_competitions, num_bots):
+        first = Competition.objects.get(name="Competition 1")
+        match_map = Map.objects.get(competitions=first)
+        devadmin = WebsiteUser.objects.get(username="devadmin")
+        terran = BotRace.objects.get(label="T")
+        for i in range(num_competitions):
+            self.stdout.write(f"Creating competitions...{i / num_competitions * 100:.0f}%", ending="\r")
+            competition = Competition.objects.create(
+                name=f"Competition {i + 2}",
+                game_mode=first.game_mode,
+                target_n_divisions=1,
+                n_placements=2,
+                rounds_per_cycle=1,
+            )
+            competition.playable_races.add(terran)
+            match_map.competitions.add(competition)
+            for bot_number in range(num_bots):
+                bot_name = f"competition{i + 2}_bot{bot_number}"
+                create_bot_for_competition(competition, devadmin, bot_name, "python", terran)
+            competition.open()
+        self.stdout.write("Creating competitions...100%")
+
+    def report(self, benchmark):
+        assignments = benchmark.assignments
+        if not assignments:
+            raise CommandError(f"No matches were played in {benchmark.elapsed:.1f}s.")
+
+        latencies = sorted(assignment.latency for assignment in assignments)
+        self.stdout.write(f"Matches played: {len(assignments)} in {benchmark.elapsed:.1f}s")
+        self.stdout.write(f"Throughput: {len(assignments) / benchmark.elapsed:.2f} matches/s")
+        self.stdout.write(
+            f"Assignment latency: p50 {_percentile(latencies, 50) * 1000:.1f}ms, "
+            f"p99 {_percentile(latencies, 99) * 1000:.1f}ms"
+        )
+        self.stdout.write(
+            f"Per assignment: {statistics.mean(assignment.queries for assignment in assignments):.1f} queries, "
+            f"{statistics.mean(assignment.query_time for assignment in assignments) * 1000:.1f}ms in the database, "
+            f"{statistics.mean(assignment.locking_query_time for assignment in assignments) * 1000:.1f}ms "
+            f"of it in locking queries (lock waits included)"
+        )
+        self.stdout.write(
+            f"Result submission latency: p50 {_percentile(sorted(benchmark.submission_latencies), 50) * 1000:.1f}ms"
+        )
+        self.stdout.write(f"Polls that found no match: {benchmark.empty_polls}")
+
+        # Each competition is meant to get a share of the matches in line with its share of the active participants.
+        played = dict(
+            Match.objects.filter(id__in=[assignment.match_id for assignment in assignments])
+            .values_list("round__competition_id")
+            .annotate(Count("id"))
+        )
+        active_participants = dict(
+            CompetitionParticipation.objects.filter(active=True, competition__status="open")
+            .values_list("competition_id")
+            .annotate(Count("id"))
+        )
+        total_active = sum(active_participants.values())
+        ratios = []
+        for competition_id, name in Competition.objects.filter(id__in=active_participants).values_list("id", "name"):
+            played_share = played.get(competition_id, 0) / len(assignments)
+            fair_share = active_participants[competition_id] / total_active
+            ratios.append(played_share / fair_share)
+            self.stdout.write(
+                f"  {name}: {played.get(competition_id, 0)} matches, "
+                f"{played_share:.1%} of them for {fair_share:.1%} of the active participants"
+            )
+        # Jain's fairness index over the played/fair share ratios: 1 is perfectly fair, 1/n is as unfair as can be.
+        self.stdout.write(f"Fairness: {sum(ratios) ** 2 / (len(ratios) * sum(ratio**2 for ratio in ratios)):.3f}")
+
+
+class Assignment:
+    def __init__(self, match_id, latency, queries):
+        self.match_id = match_id
+        self.latency = latency
+        self.queries = len(queries)
+        self.query_time = sum(float(query["time"]) for query in queries)
+        self.locking_query_time = sum(float(query["time"]) for query in queries if "FOR UPDATE" in query["sql"])
+
+
+class SchedulerBenchmark:
+    """Arena clients, each in its own thread with its own database connection, playing matches as fast as they can."""
+
+    def __init__(self, arenaclients, num_matches, max_seconds, poll_sleep):
+        self.arenaclients = arenaclients
+        self.num_matches = num_matches
+        self.max_seconds = max_seconds
+        self.poll_sleep = poll_sleep
+        self.assignments = []
+        self.submission_latencies = []
+        self.empty_polls = 0
+        self.elapsed = 0.0
+        self._deadline = 0.0
+        self._lock = threading.Lock()
+        self._matches_left = num_matches
+        self._errors = []
+
+    def run(self):
+        threads = [threading.Thread(target=self._play, args=(arenaclient,)) for arenaclient in self.arenaclients]
+        started_at = time.monotonic()
+        self._deadline = started_at + self.max_seconds
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.monotonic() - started_at
+        if self._errors:
+            raise self._errors[0]
+
+    def _reserve_a_match(self) -> bool:
+        with self._lock:
+            if self._matches_left <= 0 or self._errors or time.monotonic() > self._deadline:
+                return False
+            self._matches_left -= 1
+            return True
+
+    def _play(self, arenaclient):
+        try:
+            while self._reserve_a_match():
+                while True:
+                    with CaptureQueriesContext(connection) as queries:
+                        started_at = time.perf_counter()
+                        match = ACCoordinator.next_match(arenaclient, only_unfinished_matches=False)
+                        latency = time.perf_counter() - started_at
+                    if match is not None:
+                        break
+                    # Like a real arena client, wait a bit before asking again. Only the poll that gets a match
+                    # goes into the assignment stats.
+                    with self._lock:
+                        self.empty_polls += 1
+                        if self._errors or time.monotonic() > self._deadline:
+                            return
+                    time.sleep(min(self.poll_sleep, max(self._deadline - time.monotonic(), 0)))
+
+                assignment = Assignment(match.id, latency, queries.captured_queries)
+                started_at = time.perf_counter()
+                handle_result_submission(
+                    match.id,
+                    {
+                        "type": "Player1Win",
+                        "replay_file": SimpleUploadedFile("benchmark.SC2Replay", b"benchmark"),
+                        "game_steps": 1000,
+                        "submitted_by": arenaclient,
+                    },
+                )
+                submission_latency = time.perf_counter() - started_at
+                with self._lock:
+                    self.assignments.append(assignment)
+                    self.submission_latencies.append(submission_latency)
+        except Exception as e:
+            with self._lock:
+                self._errors.append(e)
+        finally:
+            connection.close()
+
+
+def _percentile(sorted_values, percent):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * percent // 100)]
@@ -1,11 +1,25 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from time import perf_counter
+
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
 
 from django_pglocks import advisory_lock
 
-from aiarena.core.models import Competition, CompetitionParticipation
+from aiarena.core.models import (
+    Competition,
+    CompetitionParticipation,
+    StatsGenerationCheckpoint,
+    StatsGenerationRun,
+)
 from aiarena.core.services import bot_statistics
 
+from ._stats_workers import QueryTimer, generate_participation_stats, init_worker
+
 
 class Command(BaseCommand):
     help = "Runs the generate stats db routine to generate bot stats."
@@ -34,6 +48,23 @@ class Command(BaseCommand):
             action="store_true",
             help="Generate only ELO graphs. Not valid with --finalize. ",
         )
+        parser.add_argument(
+            "--allgraphs",
+            action="store_true",
+            help="With --graphsonly, redraw every bot's graphs, "
+            "rather than only those of bots that have played since theirs were last drawn.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Generate the bots' stats in this many worker processes at once. Not valid with --finalize.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Carry on from where the last run that didn't finish got to, rather than starting over.",
+        )
 
     def handle(self, *args, **options):
         if options["allcompetitions"]:
@@ -50,30 +81,74 @@ class Command(BaseCommand):
         graphs_only = options["graphsonly"]
         if graphs_only and finalize:
             raise CommandError("--graphsonly is not valid with --finalize")
+        all_graphs = options["allgraphs"]
+        if all_graphs and not graphs_only:
+            raise CommandError("--allgraphs is only valid with --graphsonly")
+
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1")
+        if workers > 1 and finalize:
+            # The workers can't take part in the transaction that makes finalizing all or nothing.
+            raise CommandError("--workers is not valid with --finalize")
 
         bot_id = options["botid"]
         if bot_id is not None:
             # only process competitions this bot was present for.
             competitions = competitions.filter(participations__bot_id=bot_id)
 
+        run = self._get_run(options["resume"], graphs_only)
+        started = perf_counter()
+
         self.stdout.write(f"looping {len(competitions)} Competitions")
-        for competition in competitions:
-            if finalize:
-                self.stdout.write(f"Finalizing stats for competition {competition.id}...")
-                with transaction.atomic():
-                    # This lock will be held for a long time.
-                    # This is considered acceptable as we only finalize old competitions,
-                    # so no matches should be running. We also need all bot stats data to be successfully
-                    # regenerated before we can finalize the competition, else it could end up finalized in a corrupted
-                    # state.
-                    competition.lock_me()
-                    self._run_generate_stats(competition, finalize=True)
-            else:
-                self._run_generate_stats(competition, graphs_only=graphs_only)
+        with self._worker_pool(workers) as pool:
+            for competition in competitions:
+                if finalize:
+                    self.stdout.write(f"Finalizing stats for competition {competition.id}...")
+                    with transaction.atomic():
+                        # This lock will be held for a long time.
+                        # This is considered acceptable as we only finalize old competitions,
+                        # so no matches should be running. We also need all bot stats data to be successfully
+                        # regenerated before we can finalize the competition, else it could end up finalized in a
+                        # corrupted state.
+                        competition.lock_me()
+                        self._run_generate_stats(competition, run, pool, finalize=True)
+                else:
+                    self._run_generate_stats(competition, run, pool, graphs_only=graphs_only, all_graphs=all_graphs)
 
+        run.finished = timezone.now()
+        run.save()
+        # Only the latest run is kept.
+        StatsGenerationRun.objects.filter(graphs_only=graphs_only, started__lt=run.started).delete()
+        self._report_timings(run, perf_counter() - started)
         self.stdout.write("Done")
 
-    def _run_generate_stats(self, competition, finalize=False, graphs_only=False):
+    def _get_run(self, resume, graphs_only):
+        if resume:
+            run = (
+                StatsGenerationRun.objects.filter(finished__isnull=True, graphs_only=graphs_only)
+                .order_by("-started")
+                .first()
+            )
+            if run is not None:
+                self.stdout.write(f"Resuming the run started {run.started}")
+                return run
+            self.stdout.write("WARNING: There's no unfinished run to resume. Starting a new one.")
+        return StatsGenerationRun.objects.create(graphs_only=graphs_only)
+
+    @staticmethod
+    def _worker_pool(workers):
+        if workers == 1:
+            return nullcontext()
+        # Spawned rather than forked: a forked worker would share this process' database connection.
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(connection.settings_dict["NAME"],),
+        )
+
+    def _run_generate_stats(self, competition, run, pool, finalize=False, graphs_only=False, all_graphs=False):
         if competition.statistics_finalized:
             self.stdout.write(f"WARNING: Skipping competition {competition.id} - stats already finalized.")
 
@@ -84,9 +159,48 @@ class Command(BaseCommand):
         with advisory_lock(f"stats_lock_competition_{competition.id}") as acquired:
             if not acquired:
                 raise Exception(f"Could not acquire lock on bot statistics for competition {str(competition.id)}")
-            for sp in CompetitionParticipation.objects.filter(competition_id=competition.id):
-                self.stdout.write(f"Generating current competition stats for bot {sp.bot_id}...")
-                if graphs_only:
-                    bot_statistics.generate_graphs(sp)
-                else:
-                    bot_statistics.recalculate_stats(sp)
+            checkpoints = StatsGenerationCheckpoint.objects.filter(run=run, competition=competition)
+            done = set(checkpoints.values_list("participation_id", flat=True))
+
+            if not graphs_only and None not in done:
+                self.stdout.write(f"Generating matchup and map stats for competition {competition.id}...")
+                timer = QueryTimer()
+                with connection.execute_wrapper(timer):
+                    bot_statistics.recalculate_competition_indepth_stats(competition)
+                checkpoints.create(run=run, competition=competition, sql_seconds=timer.seconds)
+
+            participations = CompetitionParticipation.objects.filter(competition_id=competition.id).exclude(
+                id__in=done - {None}
+            )
+            if graphs_only and not all_graphs:
+                participations = bot_statistics.with_stale_graphs(participations)
+            if pool is None:
+                for sp in participations:
+                    self.stdout.write(f"Generating current competition stats for bot {sp.bot_id}...")
+                    self._checkpoint(run, sp, *generate_participation_stats(sp.id, graphs_only))
+            else:
+                futures = {pool.submit(generate_participation_stats, sp.id, graphs_only): sp for sp in participations}
+                for future in as_completed(futures):
+                    sp = futures[future]
+                    self.stdout.write(f"Generated current competition stats for bot {sp.bot_id}")
+                    self._checkpoint(run, sp, *future.result())
+
+    @staticmethod
+    def _checkpoint(run, participation, sql_seconds, render_seconds):
+        StatsGenerationCheckpoint.objects.create(
+            run=run,
+            competition_id=participation.competition_id,
+            participation=participation,
+            sql_seconds=sql_seconds,
+            render_seconds=render_seconds,
+        )
+
+    def _report_timings(self, run, seconds):
+        totals = run.checkpoints.aggregate(sql=Sum("sql_seconds"), render=Sum("render_seconds"))
+        competition_wide = run.checkpoints.filter(participation=None).aggregate(sql=Sum("sql_seconds"))
+        self.stdout.write(
+            f"Took {seconds:.1f}s. Time spent across the run, including any earlier attempts: "
+            f"{competition_wide['sql'] or 0:.1f}s on the competitions' matchup and map stats, "
+            f"{(totals['sql'] or 0) - (competition_wide['sql'] or 0):.1f}s on the bots' other queries and "
+            f"{totals['render'] or 0:.1f}s on everything else, mostly rendering graphs."
+        )
@@ -151,12 +151,16 @@ def traffic_classification(get_response):
     only the resolved user tells them apart, and that isn't known until the auth
     stack has run. Timing from out here also covers the whole inner stack rather
     than just view execution. See the CLAUDE.md in core/traffic/.
+
+    The request's queries are measured from here too, for the same reason, and
+    recorded for the views that tag their requests with an endpoint name.
     """
 
     def middleware(request: HttpRequest):
         start = time.monotonic()
         try:
-            return get_response(request)
+            with traffic.measure_queries(request):
+                return get_response(request)
         finally:
             traffic.record(request, duration_ms=int((time.monotonic() - start) * 1000))
 
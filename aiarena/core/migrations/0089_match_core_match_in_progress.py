@@ -0,0 +1,20 @@
+# Generated by Django 4.2.29 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0088_awardset_competition_awards_given_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                condition=models.Q(("result__isnull", True), ("started__isnull", False)),
+                fields=["id"],
+                name="core_match_in_progress",
+            ),
+        ),
+    ]
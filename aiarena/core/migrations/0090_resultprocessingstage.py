@@ -0,0 +1,56 @@
+# Generated by Django 4.2.29 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0089_match_core_match_in_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResultProcessingStage",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("round_completion", "Round Completion"),
+                            ("elo_sanity_check", "ELO Sanity Check"),
+                            ("bot_statistics", "Bot Statistics"),
+                            ("crash_check", "Crash Check"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("done", "Done"), ("failed", "Failed")],
+                        db_index=True,
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, db_index=True)),
+                (
+                    "result",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="processing_stages",
+                        to="core.result",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="resultprocessingstage",
+            constraint=models.UniqueConstraint(fields=("result", "stage"), name="unique_result_processing_stage"),
+        ),
+    ]
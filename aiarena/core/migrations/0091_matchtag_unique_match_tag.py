@@ -0,0 +1,37 @@
+# Generated by Django 4.2.29 on 2026-10-18 13:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_match_tags(apps, schema_editor):
+    MatchTag = apps.get_model("core", "MatchTag")
+    MatchTags = apps.get_model("core", "Match").tags.through
+    duplicates = (
+        MatchTag.objects.values("tag_id", "user_id").annotate(keep=Min("id"), count=Count("id")).filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        others = MatchTag.objects.filter(tag_id=duplicate["tag_id"], user_id=duplicate["user_id"]).exclude(
+            id=duplicate["keep"]
+        )
+        match_ids = set(MatchTags.objects.filter(matchtag__in=others).values_list("match_id", flat=True))
+        MatchTags.objects.bulk_create(
+            [MatchTags(match_id=match_id, matchtag_id=duplicate["keep"]) for match_id in match_ids],
+            ignore_conflicts=True,
+        )
+        MatchTags.objects.filter(matchtag__in=others).delete()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0090_resultprocessingstage"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_match_tags, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="matchtag",
+            constraint=models.UniqueConstraint(fields=("tag", "user"), name="unique_match_tag"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.29 on 2026-10-18 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0091_matchtag_unique_match_tag"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompetitionEloLedger",
+            fields=[
+                (
+                    "competition",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="elo_ledger",
+                        serialize=False,
+                        to="core.competition",
+                    ),
+                ),
+                ("elo_sum", models.BigIntegerField()),
+                ("participant_count", models.IntegerField()),
+                ("reconciled_at", models.DateTimeField()),
+            ],
+        ),
+    ]
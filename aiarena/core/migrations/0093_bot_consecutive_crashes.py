@@ -0,0 +1,17 @@
+# Generated by Django 4.2.29 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0092_competitioneloledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bot",
+            name="consecutive_crashes",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
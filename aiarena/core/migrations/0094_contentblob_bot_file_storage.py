@@ -0,0 +1,44 @@
+# Generated by Django 4.2.29 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+import private_storage.fields
+
+import aiarena.core.models.bot
+import aiarena.core.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0093_bot_consecutive_crashes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentBlob",
+            fields=[
+                ("md5hash", models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ("size", models.BigIntegerField()),
+                ("references", models.PositiveIntegerField(db_index=True, default=0)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="bot",
+            name="bot_data",
+            field=private_storage.fields.PrivateFileField(
+                blank=True,
+                null=True,
+                storage=aiarena.core.storage.bot_file_storage,
+                upload_to=aiarena.core.models.bot.bot_data_upload_to,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bot",
+            name="bot_zip",
+            field=private_storage.fields.PrivateFileField(
+                storage=aiarena.core.storage.bot_file_storage,
+                upload_to=aiarena.core.models.bot.bot_zip_upload_to,
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.29 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0094_contentblob_bot_file_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bot",
+            name="bot_zip_s3_etag",
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="bot",
+            name="bot_data_s3_etag",
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="bot",
+            name="s3_etags_verified",
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+    ]
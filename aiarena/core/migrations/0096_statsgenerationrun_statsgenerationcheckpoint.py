@@ -0,0 +1,52 @@
+# Generated by Django 4.2.29 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0095_bot_s3_etags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatsGenerationRun",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("started", models.DateTimeField(auto_now_add=True)),
+                ("finished", models.DateTimeField(blank=True, null=True)),
+                ("graphs_only", models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StatsGenerationCheckpoint",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("sql_seconds", models.FloatField(default=0)),
+                ("render_seconds", models.FloatField(default=0)),
+                ("completed", models.DateTimeField(auto_now_add=True)),
+                (
+                    "competition",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.competition"),
+                ),
+                (
+                    "participation",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.competitionparticipation",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkpoints",
+                        to="core.statsgenerationrun",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.29 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0096_statsgenerationrun_statsgenerationcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="competitionparticipation",
+            name="graphs_last_result_id",
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -10,7 +10,9 @@ from .bot_race import BotRace
 from .competition import Competition
 from .competition_bot_map_stats import CompetitionBotMapStats
 from .competition_bot_matchup_stats import CompetitionBotMatchupStats
+from .competition_elo_ledger import CompetitionEloLedger
 from .competition_participation import CompetitionParticipation
+from .content_blob import ContentBlob
 from .game import Game
 from .game_mode import GameMode
 from .map import Map
@@ -21,8 +23,11 @@ from .match_tag import MatchTag
 from .news import News
 from .relative_result import RelativeResult
 from .result import Result
+from .result_processing_stage import ResultProcessingStage
 from .round import Round
 from .service_user import ServiceUser
+from .stats_generation_checkpoint import StatsGenerationCheckpoint
+from .stats_generation_run import StatsGenerationRun
 from .tag import Tag
 from .temporary_upload import TemporaryUpload
 from .trophy import Trophy
@@ -43,7 +48,9 @@ __all__ = [
     "Competition",
     "CompetitionBotMapStats",
     "CompetitionBotMatchupStats",
+    "CompetitionEloLedger",
     "CompetitionParticipation",
+    "ContentBlob",
     "Game",
     "GameMode",
     "Map",
@@ -54,8 +61,11 @@ __all__ = [
     "News",
     "RelativeResult",
     "Result",
+    "ResultProcessingStage",
     "Round",
     "ServiceUser",
+    "StatsGenerationCheckpoint",
+    "StatsGenerationRun",
     "Tag",
     "TemporaryUpload",
     "Trophy",
@@ -1,10 +1,11 @@
+import functools
 import logging
 import time
 import uuid
 from zipfile import BadZipFile, ZipFile
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
@@ -15,7 +16,8 @@ from constance import config
 from private_storage.fields import PrivateFileField
 from wiki.models import Article, ArticleRevision
 
-from aiarena.core.utils import calculate_md5_django_filefield
+from aiarena.core.storage import bot_file_storage
+from aiarena.core.utils import StreamingHash, calculate_md5_django_filefield
 from aiarena.core.validators import validate_bot_name
 
 from .bot_race import BotRace
@@ -61,22 +63,28 @@ class Bot(models.Model, LockableModelMixin):
         ],
     )
     created = models.DateTimeField(auto_now_add=True)
-    bot_zip = PrivateFileField(upload_to=bot_zip_upload_to)
+    bot_zip = PrivateFileField(upload_to=bot_zip_upload_to, storage=bot_file_storage)
     bot_zip_updated = models.DateTimeField(editable=False)
     bot_zip_md5hash = models.CharField(max_length=32, editable=False)
+    bot_zip_s3_etag = models.CharField(max_length=64, editable=False, null=True)
     bot_zip_publicly_downloadable = models.BooleanField(default=False)
     # todo: set a file size limit which will be checked on result submission
     # and the bot deactivated if the file size exceeds it
     bot_data_enabled = models.BooleanField(default=True)
     """Whether the use of bot data is enabled."""
-    bot_data = PrivateFileField(upload_to=bot_data_upload_to, blank=True, null=True)
+    bot_data = PrivateFileField(upload_to=bot_data_upload_to, storage=bot_file_storage, blank=True, null=True)
     bot_data_md5hash = models.CharField(max_length=32, editable=False, null=True)
+    bot_data_s3_etag = models.CharField(max_length=64, editable=False, null=True)
+    s3_etags_verified = models.DateTimeField(editable=False, null=True, db_index=True)
+    """When the S3 ETags were last checked against S3. They're worked out as the files are uploaded."""
     bot_data_publicly_downloadable = models.BooleanField(default=False)
     plays_race = models.ForeignKey(BotRace, on_delete=models.PROTECT)
     type = models.CharField(max_length=32, choices=TYPES)
     # the ID displayed to other bots during a game so they can recognize their opponent
     game_display_id = models.UUIDField(default=uuid.uuid4)
     wiki_article = models.OneToOneField(Article, on_delete=models.PROTECT, blank=True, null=True)
+    consecutive_crashes = models.PositiveIntegerField(default=0, editable=False)
+    """How many of the bot's most recent results since its zip was last updated were crashes, in a row."""
 
     def current_elo_trend(self, competition, n_matches):
         from .relative_result import RelativeResult
@@ -235,6 +243,7 @@ class Bot(models.Model, LockableModelMixin):
 
 _UNSAVED_BOT_ZIP_FILEFIELD = "unsaved_bot_zip_filefield"
 _UNSAVED_BOT_DATA_FILEFIELD = "unsaved_bot_data_filefield"
+_REPLACED_FILES = "replaced_files"
 
 
 # The following methods will temporarily store the bot_zip and bot_data files while we wait for the Bot model to be
@@ -254,50 +263,81 @@ def pre_save_bot(sender, instance, **kwargs):
         setattr(instance, _UNSAVED_BOT_DATA_FILEFIELD, instance.bot_data)
         instance.bot_data = None
 
-    # automatically create a wiki article for this bot if it doesn't exists
-    if instance.get_wiki_article() is None:
-        instance.create_bot_wiki_article()
-
-
-@receiver(post_save, sender=Bot)
-def post_save_bot(sender, instance, created, **kwargs):
-    # bot zip
-    if created and hasattr(instance, _UNSAVED_BOT_ZIP_FILEFIELD):
-        instance.bot_zip = getattr(instance, _UNSAVED_BOT_ZIP_FILEFIELD)
-        post_save.disconnect(pre_save_bot, sender=sender)
-        instance.save()
-        post_save.connect(pre_save_bot, sender=sender)
-        # delete the saved instance
-        instance.__dict__.pop(_UNSAVED_BOT_ZIP_FILEFIELD)
-
-    # bot data
-    if created and hasattr(instance, _UNSAVED_BOT_DATA_FILEFIELD):
-        instance.bot_data = getattr(instance, _UNSAVED_BOT_DATA_FILEFIELD)
-        post_save.disconnect(pre_save_bot, sender=sender)
-        instance.save()
-        post_save.connect(pre_save_bot, sender=sender)
-        # delete the saved instance
-        instance.__dict__.pop(_UNSAVED_BOT_DATA_FILEFIELD)
+    _note_replaced_files(instance)
 
-    # Re-calculate the file hashes if required.
+    # Hash the files on their way in, while they're still at hand, rather than reading them back out of storage.
     if instance.bot_zip:
-        bot_zip_hash = calculate_md5_django_filefield(instance.bot_zip)
+        bot_zip_hash, instance.bot_zip_s3_etag = _hashes_of(
+            instance.bot_zip, instance.bot_zip_md5hash, instance.bot_zip_s3_etag
+        )
         if instance.bot_zip_md5hash != bot_zip_hash:
             instance.bot_zip_md5hash = bot_zip_hash
             instance.bot_zip_updated = timezone.now()
-            post_save.disconnect(pre_save_bot, sender=sender)
-            instance.save()
-            post_save.connect(pre_save_bot, sender=sender)
+            # A new bot zip gets a fresh start.
+            instance.consecutive_crashes = 0
 
     if instance.bot_data:
-        bot_data_hash = calculate_md5_django_filefield(instance.bot_data)
-        if instance.bot_data_md5hash != bot_data_hash:
-            instance.bot_data_md5hash = bot_data_hash
-            post_save.disconnect(pre_save_bot, sender=sender)
-            instance.save()
-            post_save.connect(pre_save_bot, sender=sender)
-    elif instance.bot_data_md5hash is not None:
+        instance.bot_data_md5hash, instance.bot_data_s3_etag = _hashes_of(
+            instance.bot_data, instance.bot_data_md5hash, instance.bot_data_s3_etag
+        )
+    elif instance.pk:
         instance.bot_data_md5hash = None
-        post_save.disconnect(pre_save_bot, sender=sender)
+        instance.bot_data_s3_etag = None
+
+    # Worked out ETags are right unless S3 uploaded the file differently than expected, so have them checked.
+    if not instance.bot_zip._committed or not instance.bot_data._committed:
+        instance.s3_etags_verified = None
+
+    # automatically create a wiki article for this bot if it doesn't exists
+    if instance.get_wiki_article() is None:
+        instance.create_bot_wiki_article()
+
+
+def _hashes_of(fieldfile, known_md5, known_s3_etag):
+    """
+    The MD5 and S3 ETag of a file field's content. A new file is hashed from the upload (for free, if an upload handler
+    already did it as the file came in), while a file that's already stored keeps the hashes it has.
+    """
+    if not fieldfile._committed:
+        upload = fieldfile.file
+        if not getattr(upload, "md5", None):
+            # Kept on the upload for the storage to use, if it's content addressed.
+            streaming_hash = StreamingHash.of(upload)
+            upload.md5, upload.s3_etag = streaming_hash.md5(), streaming_hash.s3_etag()
+        return upload.md5, upload.s3_etag
+    if known_md5:
+        return known_md5, known_s3_etag
+    # A stored file that was never hashed, e.g. one assigned by name. Its ETag is left to the verifier.
+    return calculate_md5_django_filefield(fieldfile), None
+
+
+def _note_replaced_files(instance):
+    """
+    Content addressed storage counts references to its files, so a stored file that a new one replaces has to be let
+    go of. It's released once the new one is saved. Files replaced by name rather than by saving a new one, as
+    SubmitResult does, are released by whatever replaced them.
+    """
+    new_files = [
+        field.attname
+        for field in (Bot._meta.get_field("bot_zip"), Bot._meta.get_field("bot_data"))
+        if getattr(field.storage, "content_addressed", False) and not getattr(instance, field.attname)._committed
+    ]
+    if instance.pk and new_files:
+        replaced = Bot.objects.filter(pk=instance.pk).values(*new_files).first() or {}
+        setattr(instance, _REPLACED_FILES, [name for name in replaced.values() if name])
+
+
+@receiver(post_save, sender=Bot)
+def post_save_bot(sender, instance, created, **kwargs):
+    if hasattr(instance, _REPLACED_FILES):
+        storage = Bot._meta.get_field("bot_zip").storage  # bot data's too
+        for name in instance.__dict__.pop(_REPLACED_FILES):
+            transaction.on_commit(functools.partial(storage.delete, name))
+
+    # Now that the bot has an ID, save the files that were set aside. This save will hash them.
+    if created and (hasattr(instance, _UNSAVED_BOT_ZIP_FILEFIELD) or hasattr(instance, _UNSAVED_BOT_DATA_FILEFIELD)):
+        if hasattr(instance, _UNSAVED_BOT_ZIP_FILEFIELD):
+            instance.bot_zip = instance.__dict__.pop(_UNSAVED_BOT_ZIP_FILEFIELD)
+        if hasattr(instance, _UNSAVED_BOT_DATA_FILEFIELD):
+            instance.bot_data = instance.__dict__.pop(_UNSAVED_BOT_DATA_FILEFIELD)
         instance.save()
-        post_save.connect(pre_save_bot, sender=sender)
@@ -2,7 +2,7 @@ import logging
 
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -192,3 +192,12 @@ def pre_save_competition(sender, instance, **kwargs):
     # automatically create a wiki article for this competition if it doesn't exists
     if instance.get_wiki_article() is None:
         instance.create_competition_wiki_article()
+
+
+@receiver(post_save, sender=Competition)
+@receiver(post_delete, sender=Competition)
+def refresh_competition_priority(sender, instance, **kwargs):
+    # a status change moves the competition in or out of the priority order
+    from ..services.service_implementations.internal import competition_priority  # avoid circular import
+
+    competition_priority.refresh_active_participants([instance.id])
@@ -0,0 +1,24 @@
+from django.db import models
+
+from .competition import Competition
+
+
+class CompetitionEloLedger(models.Model):
+    """
+    A running total of a competition's ELO, kept up to date by everything that's meant to change it.
+
+    ELO is zero-sum: it's only added when a bot joins the competition and only removed when it leaves. So as long as
+    the ledger has been kept, elo_sum should always be participant_count times the starting ELO -- a check that costs
+    one row, not a scan of the competition. Changes that bypass the ledger, such as a lost update or an edit in the
+    admin, are caught when the ledger is reconciled against the participations themselves.
+    """
+
+    competition = models.OneToOneField(
+        Competition, on_delete=models.CASCADE, primary_key=True, related_name="elo_ledger"
+    )
+    elo_sum = models.BigIntegerField()
+    participant_count = models.IntegerField()
+    reconciled_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.competition_id}: {self.elo_sum} over {self.participant_count}"
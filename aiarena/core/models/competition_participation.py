@@ -5,9 +5,12 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import Prefetch
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.text import slugify
 
 from constance import config
+from dirtyfields import DirtyFieldsMixin
 from private_storage.fields import PrivateFileField
 
 from ..validators import validate_not_inf, validate_not_nan
@@ -55,7 +58,7 @@ def winrate_vs_duration_graph_upload_to(instance, filename):
     return "/".join(["graphs", f"{instance.competition_id}_{instance.bot.id}_{instance.bot.name}_winrate.png"])
 
 
-class CompetitionParticipation(models.Model, LockableModelMixin):
+class CompetitionParticipation(DirtyFieldsMixin, models.Model, LockableModelMixin):
     competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name="participations")
     bot = models.ForeignKey(Bot, on_delete=models.CASCADE, related_name="competition_participations")
     elo = models.SmallIntegerField(default=settings.ELO_START_VALUE)
@@ -71,6 +74,8 @@ class CompetitionParticipation(models.Model, LockableModelMixin):
     elo_graph = models.FileField(upload_to=elo_graph_upload_to, blank=True, null=True)
     elo_graph_update_plot = PrivateFileField(upload_to=elo_graph_update_plot_upload_to, blank=True, null=True)
     winrate_vs_duration_graph = models.FileField(upload_to=winrate_vs_duration_graph_upload_to, blank=True, null=True)
+    # The id of the latest result the graphs were drawn from, so that they're only redrawn once the bot has played again
+    graphs_last_result_id = models.IntegerField(blank=True, null=True, editable=False)
     highest_elo = models.IntegerField(blank=True, null=True)
     slug = models.SlugField(max_length=255, blank=True)
     active = models.BooleanField(default=True)
@@ -86,6 +91,9 @@ class CompetitionParticipation(models.Model, LockableModelMixin):
 
     objects = CompetitionParticipationSet.as_manager()
 
+    # Only used to notice activations and deactivations
+    FIELDS_TO_CHECK = ["active"]
+
     class Meta:
         unique_together = ("competition", "bot")
 
@@ -116,8 +124,20 @@ class CompetitionParticipation(models.Model, LockableModelMixin):
 
     def save(self, *args, **kwargs):
         self.slug = slugify(f"{self.bot.name} {self.competition.name}")
+        active_changed = self.is_dirty()
+        adding = self._state.adding
         super().save(*args, **kwargs)
 
+        if adding:
+            from ..services.service_implementations.internal import elo_ledger  # avoid circular import
+
+            elo_ledger.record(self.competition_id, self.elo, participant_delta=1)
+
+        if active_changed:
+            from ..services.service_implementations.internal import competition_priority  # avoid circular import
+
+            competition_priority.refresh_active_participants([self.competition_id])
+
     def validate_competition_accepting_new_participants(self):
         if self.id is None and not self.competition.is_accepting_new_participants:
             raise ValidationError("That competition is not accepting new participants.")
@@ -131,3 +151,11 @@ class CompetitionParticipation(models.Model, LockableModelMixin):
 
     def bot_race_is_permitted(self, bot_race):
         return self.competition.playable_races.filter(id=bot_race.id).exists()
+
+
+@receiver(post_delete, sender=CompetitionParticipation)
+def post_delete_competition_participation(sender, instance, **kwargs):
+    from ..services.service_implementations.internal import competition_priority, elo_ledger  # avoid circular import
+
+    competition_priority.refresh_active_participants([instance.competition_id])
+    elo_ledger.record(instance.competition_id, -instance.elo, participant_delta=-1)
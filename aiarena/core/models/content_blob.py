@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class ContentBlob(models.Model):
+    """
+    A file kept by content addressed storage (see aiarena/core/storage.py), and how many file fields refer to it.
+
+    A blob nothing refers to any more is left for ContentAddressedStorageMixin.sweep to remove, rather than removed
+    when its last reference goes, so that a save of the same content racing the removal can't lose its file.
+    """
+
+    md5hash = models.CharField(max_length=32, primary_key=True)
+    size = models.BigIntegerField()
+    references = models.PositiveIntegerField(default=0, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.md5hash}: {self.references} references"
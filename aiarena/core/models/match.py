@@ -40,6 +40,16 @@ class Match(models.Model, LockableModelMixin, RandomManagerMixin):
     """
     tags = models.ManyToManyField(MatchTag, blank=True)
 
+    class Meta:
+        indexes = [
+            # The few matches in progress at any one time, which decide which bots are busy.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(started__isnull=False, result__isnull=True),
+                name="core_match_in_progress",
+            ),
+        ]
+
     def __str__(self):
         return self.id.__str__()
 
@@ -15,6 +15,20 @@ def match_log_upload_to(instance, filename):
     return "/".join(["match-logs", str(instance.id)])
 
 
+class MatchParticipationSet(models.QuerySet):
+    def locking_bot_data(self):
+        """Participations in started, unfinished matches that will write back their bot's data.
+
+        Until such a match finishes, its bots' data is frozen: they can't play another match that uses their data.
+        """
+        return self.filter(
+            use_bot_data=True,
+            update_bot_data=True,
+            match__started__isnull=False,
+            match__result__isnull=True,
+        )
+
+
 class MatchParticipation(models.Model, LockableModelMixin):
     RESULT_TYPES = (
         ("none", "None"),
@@ -55,6 +69,8 @@ class MatchParticipation(models.Model, LockableModelMixin):
     match_log_has_been_cleaned = models.BooleanField(default=True)
     """This is set to true when the match log file is deleted by the cleanup job."""
 
+    objects = MatchParticipationSet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["bot", "-id"], name="core_matchpart_bot_id_desc"),
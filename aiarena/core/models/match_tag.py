@@ -15,6 +15,11 @@ class MatchTag(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "user"], name="unique_match_tag"),
+        ]
+
     def __str__(self):
         return f"{str(self.tag)} ({self.user.username})"
 
@@ -185,11 +185,7 @@ class Result(models.Model, LockableModelMixin):
     @cached_property
     def get_competition_participants(self):
         """Returns the SeasonParticipant models for the MatchParticipants"""
-        from .match_participation import MatchParticipation
-
-        match_id = self.match.id
-        first = MatchParticipation.objects.get(match_id=match_id, participant_number=1)
-        second = MatchParticipation.objects.get(match_id=match_id, participant_number=2)
+        first, second = self.get_match_participants
         return first.competition_participant, second.competition_participant
 
     @cached_property
@@ -248,10 +244,11 @@ class Result(models.Model, LockableModelMixin):
 
     def _apply_elo_delta(self, delta, sp1, sp2):
         delta = int(round(delta))
+        # Only the ELO: the rest of a participation is bot statistics, which can be updated concurrently.
         sp1.elo += delta
-        sp1.save()
+        sp1.save(update_fields=["elo"])
         sp2.elo -= delta
-        sp2.save()
+        sp2.save(update_fields=["elo"])
 
     @staticmethod
     def calculate_result_cause(result_type):
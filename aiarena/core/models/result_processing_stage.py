@@ -0,0 +1,48 @@
+from django.db import models
+
+from .result import Result
+
+
+class ResultProcessingStage(models.Model):
+    """
+    A piece of a result's processing that's done in the background, after the result has been submitted.
+
+    A stage is marked done in the same transaction as its work, so the work is done once however many times the
+    stage's task runs. A stage that keeps failing is marked failed and left here, for an admin to look into and retry.
+    """
+
+    ROUND_COMPLETION = "round_completion"
+    ELO_SANITY_CHECK = "elo_sanity_check"
+    BOT_STATISTICS = "bot_statistics"
+    CRASH_CHECK = "crash_check"
+    STAGES = (
+        (ROUND_COMPLETION, "Round Completion"),
+        (ELO_SANITY_CHECK, "ELO Sanity Check"),
+        (BOT_STATISTICS, "Bot Statistics"),
+        (CRASH_CHECK, "Crash Check"),
+    )
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name="processing_stages")
+    stage = models.CharField(max_length=32, choices=STAGES)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    """The last error the stage failed with."""
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["result", "stage"], name="unique_result_processing_stage"),
+        ]
+
+    def __str__(self):
+        return f"{self.result_id} {self.stage}"
@@ -0,0 +1,23 @@
+from django.db import models
+
+from .competition import Competition
+from .competition_participation import CompetitionParticipation
+from .stats_generation_run import StatsGenerationRun
+
+
+class StatsGenerationCheckpoint(models.Model):
+    """
+    A step of a StatsGenerationRun that's been done: one participation's stats, or, without a participation, the stats
+    worked out for the whole competition at once. Also records how long the step spent on the database and on rendering
+    graphs.
+    """
+
+    run = models.ForeignKey(StatsGenerationRun, on_delete=models.CASCADE, related_name="checkpoints")
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE)
+    participation = models.ForeignKey(CompetitionParticipation, on_delete=models.CASCADE, blank=True, null=True)
+    sql_seconds = models.FloatField(default=0)
+    render_seconds = models.FloatField(default=0)
+    completed = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.run}: competition {self.competition_id}, participation {self.participation_id}"
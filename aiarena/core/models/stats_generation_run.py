@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class StatsGenerationRun(models.Model):
+    """
+    A run of the generatestats command. What it has got through is kept as StatsGenerationCheckpoints, so that a run
+    which was interrupted can be resumed rather than started over.
+    """
+
+    started = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    graphs_only = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Stats generation run started {self.started}"
@@ -6,6 +6,8 @@ from private_storage.fields import PrivateFileField
 from storages.backends.s3boto3 import S3Boto3Storage
 from storages.utils import clean_name
 
+from aiarena.core.utils import remove_quotes
+
 from .user import User
 
 
@@ -53,8 +55,12 @@ class TemporaryUpload(models.Model):
     def exists_in_storage(self) -> bool:
         return self.file.storage.exists(self.file.name)
 
-    def copy_to_file_field(self, dest_file_field, filename: str) -> None:
-        """Copy the uploaded file into a model's FileField via S3-to-S3 copy."""
+    def copy_to_file_field(self, dest_file_field, filename: str) -> tuple[str, str]:
+        """Copy the uploaded file into a model's FileField via S3-to-S3 copy.
+
+        Returns the file's MD5 and the S3 ETag of its copy. Presigned PUTs are single part uploads, so the upload's
+        ETag is its MD5.
+        """
         if not self.exists_in_storage():
             raise ValueError("Upload not found in storage")
 
@@ -66,20 +72,43 @@ class TemporaryUpload(models.Model):
         if src_storage.bucket.name != dst_storage.bucket.name:
             raise RuntimeError("Cross-bucket copy is not supported")
 
+        client = src_storage.connection.meta.client
+        copy_source = {
+            "Bucket": src_storage.bucket.name,
+            "Key": src_storage._normalize_name(clean_name(self.file.name)),
+        }
+
+        def copy_to(dest_name):
+            response = client.copy_object(
+                Bucket=dst_storage.bucket.name,
+                CopySource=copy_source,
+                Key=dst_storage._normalize_name(clean_name(dest_name)),
+            )
+            return remove_quotes(response["CopyObjectResult"]["ETag"])
+
+        if getattr(dst_storage, "content_addressed", False):
+            # The MD5 names the destination, so it's needed before the copy. It's only copied if it's new.
+            source = client.head_object(**copy_source)
+            md5 = remove_quotes(source["ETag"])
+            copies = []
+            dest_name = dst_storage.add_reference(
+                md5, source["ContentLength"], write=lambda name: copies.append(copy_to(name))
+            )
+            dest_file_field.name = dest_name
+            if copies:
+                return md5, copies[0]
+            # Already stored, perhaps by a multipart upload with an ETag of its own.
+            existing = client.head_object(
+                Bucket=dst_storage.bucket.name, Key=dst_storage._normalize_name(clean_name(dest_name))
+            )
+            return md5, remove_quotes(existing["ETag"])
+
         # Build the destination name through the field's upload_to and storage,
         # so any path transforms (location prefix, name conflict resolution) apply.
         dest_name = dest_file_field.field.generate_filename(dest_file_field.instance, filename)
-
-        client = src_storage.connection.meta.client
-        client.copy_object(
-            Bucket=dst_storage.bucket.name,
-            CopySource={
-                "Bucket": src_storage.bucket.name,
-                "Key": src_storage._normalize_name(clean_name(self.file.name)),
-            },
-            Key=dst_storage._normalize_name(clean_name(dest_name)),
-        )
+        etag = copy_to(dest_name)
         dest_file_field.name = dest_name
+        return etag, etag
 
     def delete_from_storage(self) -> None:
         self.file.storage.delete(self.file.name)
@@ -1,3 +1,7 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
 AWS_S3_STORAGE_CLASSES = ["PrivateS3BotoStorage", "S3Boto3Storage"]
 
 
@@ -5,7 +9,8 @@ def is_s3_file(file):
     """
     Quick hack: Returns True if the file is stored on S3, False otherwise.
     """
-    return file.storage.__class__.__name__ in AWS_S3_STORAGE_CLASSES
+    # Subclasses count too, such as the content addressed storage built on top of the configured one.
+    return any(cls.__name__ in AWS_S3_STORAGE_CLASSES for cls in type(file.storage).__mro__)
 
 
 def get_file_s3_url_with_content_disposition(file, file_name):
@@ -17,6 +22,21 @@ def get_file_s3_url_with_content_disposition(file, file_name):
     return file.storage.url(file.name, parameters={"ResponseContentDisposition": f'inline; filename="{file_name}"'})
 
 
+def get_cached_file_s3_url_with_content_disposition(file, file_name, version):
+    """
+    get_file_s3_url_with_content_disposition, reusing the URL for up to PRESIGNED_URL_CACHE_TIME seconds.
+    `version` tells one content of the file apart from another, for files whose name stays the same.
+    """
+    if not settings.PRESIGNED_URL_CACHE_TIME:
+        return get_file_s3_url_with_content_disposition(file, file_name)
+    key = f"presigned_url:{file.name}:{version}:{file_name}"
+    url = cache.get(key)
+    if url is None:
+        url = get_file_s3_url_with_content_disposition(file, file_name)
+        cache.set(key, url, settings.PRESIGNED_URL_CACHE_TIME)
+    return url
+
+
 def get_file_url_s3_hack(file, file_name):
     """
     Returns a URL to a file with a content disposition header set, if we're using the S3 backend.
@@ -49,3 +49,8 @@ class Bots(ABC):
     def bot_data_is_frozen(self, bot) -> bool:
         """Return True if `bot`'s data is currently frozen/locked by matches."""
         pass
+
+    @abstractmethod
+    def get_frozen_bot_ids(self, bot_ids) -> set[int]:
+        """Return the ids, out of `bot_ids`, of the bots whose data is currently frozen/locked by matches."""
+        pass
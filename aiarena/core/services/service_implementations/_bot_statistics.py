@@ -1,24 +1,21 @@
-from django.db.models import Exists, Max, OuterRef, Q
+from django.db.models import Max
 
-import sentry_sdk
 from django_pglocks import advisory_lock
 
-from aiarena.core.models import CompetitionParticipation, Map, Match, MatchParticipation, Result
+from aiarena.core.models import Competition, CompetitionParticipation, MatchParticipation, Result
 from aiarena.core.models.competition_bot_map_stats import CompetitionBotMapStats
 from aiarena.core.models.competition_bot_matchup_stats import CompetitionBotMatchupStats
 
+from .internal.statistics import stats_engine
 from .internal.statistics.elo_graphs_generator import EloGraphsGenerator
 
 
 class BotStatistics:
-    result_exists = ~Q(result=None) & ~Q(result="none")
-    result_win = Q(result="win")
-    result_loss = Q(result="loss")
-    result_tie = Q(result="tie")
-    result_crash = Q(
-        result="loss",
-        result_cause__in=["crash", "timeout", "initialization_failure"],
-    )
+    result_exists = stats_engine.RESULT_EXISTS
+    result_win = stats_engine.RESULT_WIN
+    result_loss = stats_engine.RESULT_LOSS
+    result_tie = stats_engine.RESULT_TIE
+    result_crash = stats_engine.RESULT_CRASH
 
     # ignore these result types for the purpose of statistics generation
     _ignored_result_types = ["MatchCancelled", "InitializationError", "Error"]
@@ -46,8 +43,10 @@ class BotStatistics:
                 self._update_matchup_stats(competition_participation, opponent_participation, result)
                 self._update_map_stats(competition_participation, result)
 
-    def recalculate_stats(self, competition_participation: CompetitionParticipation):
-        """This method entirely recalculates a bot's set of stats."""
+    def recalculate_stats(self, competition_participation: CompetitionParticipation, indepth_stats=True):
+        """This method entirely recalculates a bot's set of stats.
+        Pass indepth_stats=False when the matchup and map stats have already been recalculated for the whole
+        competition."""
 
         with advisory_lock(f"stats_lock_competitionparticipation_{competition_participation.id}") as acquired:
             if not acquired:
@@ -57,7 +56,7 @@ class BotStatistics:
 
             self._recalculate_global_statistics(competition_participation)
 
-            if competition_participation.competition.indepth_bot_statistics_enabled:
+            if competition_participation.competition.indepth_bot_statistics_enabled and indepth_stats:
                 self._recalculate_matchup_stats(competition_participation)
                 self._recalculate_map_stats(competition_participation)
 
@@ -110,6 +109,9 @@ class BotStatistics:
         participation.save()
 
     def generate_graphs(self, participation: CompetitionParticipation):
+        # Read before drawing, so that a result coming in meanwhile leaves the graphs stale rather than passed over.
+        last_result_id = self._last_result_ids([participation])[participation.id]
+
         graph1, graph2, graph3 = EloGraphsGenerator(participation).generate()
         if graph1 is not None:
             participation.elo_graph.save("elo.png", graph1, False)
@@ -118,6 +120,37 @@ class BotStatistics:
         if graph3 is not None:
             participation.winrate_vs_duration_graph.save("winrate_vs_duration.png", graph3, False)
 
+        participation.graphs_last_result_id = last_result_id
+        CompetitionParticipation.objects.filter(id=participation.id).update(graphs_last_result_id=last_result_id)
+
+    def with_stale_graphs(self, participations) -> list[CompetitionParticipation]:
+        """Those of the participations whose graphs weren't drawn from their bot's latest result."""
+        participations = list(participations)
+        last_result_ids = self._last_result_ids(participations)
+        return [
+            participation
+            for participation in participations
+            if participation.graphs_last_result_id != last_result_ids[participation.id]
+        ]
+
+    def _last_result_ids(self, participations) -> dict[int, int | None]:
+        """The id of the latest result of each participation's bot in its competition, by participation id."""
+        rows = (
+            MatchParticipation.objects.filter(
+                match__result__isnull=False,
+                match__round__competition_id__in={participation.competition_id for participation in participations},
+                bot_id__in={participation.bot_id for participation in participations},
+            )
+            .values_list("match__round__competition_id", "bot_id")
+            .annotate(Max("match__result_id"))
+            .order_by()
+        )
+        last_result_ids = {(competition_id, bot_id): result_id for competition_id, bot_id, result_id in rows}
+        return {
+            participation.id: last_result_ids.get((participation.competition_id, participation.bot_id))
+            for participation in participations
+        }
+
     def _update_global_statistics(self, participation: CompetitionParticipation, result: Result):
         participation.match_count += 1
 
@@ -157,71 +190,33 @@ class BotStatistics:
         # TODO: implement caching so that this runs quick enough to include in this job
         # BotStatistics._generate_graphs(self.participation)
 
-        participation.save()
-
-    def _recalculate_matchup_stats(self, participation: CompetitionParticipation):
-        CompetitionBotMatchupStats.objects.filter(bot=participation).delete()
-
-        for opponent_p in CompetitionParticipation.objects.filter(competition=participation.competition).exclude(
-            bot=participation.bot
-        ):
-            match_count = self._calculate_matchup_data(participation, opponent_p, self.result_exists)
-            if not match_count:
-                continue
-
-            matchup_stats, created = CompetitionBotMatchupStats.objects.get_or_create(
-                bot=participation,
-                opponent=opponent_p,
-            )
-            matchup_stats.match_count = match_count
-
-            matchup_stats.win_count = self._calculate_matchup_data(participation, opponent_p, self.result_win)
-            matchup_stats.win_perc = matchup_stats.win_count / matchup_stats.match_count * 100
-
-            matchup_stats.loss_count = self._calculate_matchup_data(participation, opponent_p, self.result_loss)
-            matchup_stats.loss_perc = matchup_stats.loss_count / matchup_stats.match_count * 100
-
-            matchup_stats.tie_count = self._calculate_matchup_data(participation, opponent_p, self.result_tie)
-            matchup_stats.tie_perc = matchup_stats.tie_count / matchup_stats.match_count * 100
-
-            matchup_stats.crash_count = self._calculate_matchup_data(participation, opponent_p, self.result_crash)
-            matchup_stats.crash_perc = matchup_stats.crash_count / matchup_stats.match_count * 100
-
-            if not created and matchup_stats.is_dirty():
-                sentry_sdk.capture_message("Recalculated bot matchup stats differ from previous value")
-
-            matchup_stats.save()
-
-    def _recalculate_map_stats(self, participation: CompetitionParticipation):
-        competition_matches = Match.objects.filter(round__competition_id=participation.competition.id).select_related(
-            "map"
+        # Not the ELO: with ASYNC_RESULT_PROCESSING_ENABLED, a later result may have adjusted it since it was read.
+        participation.save(
+            update_fields=[
+                "match_count",
+                "win_count",
+                "loss_count",
+                "tie_count",
+                "crash_count",
+                "highest_elo",
+                "win_perc",
+                "loss_perc",
+                "tie_perc",
+                "crash_perc",
+            ]
         )
-        maps = Map.objects.filter(id__in=competition_matches.values_list("map_id", flat=True))
-
-        for map in maps:
-            match_count = self._calculate_map_data(participation, map, self.result_exists)
-            if not match_count:
-                continue
 
-            map_stats, created = CompetitionBotMapStats.objects.get_or_create(bot=participation, map=map)
-            map_stats.match_count = match_count
+    def recalculate_competition_indepth_stats(self, competition: Competition):
+        """Recalculates the matchup and map stats of every bot in the competition at once."""
+        if competition.indepth_bot_statistics_enabled:
+            stats_engine.recalculate_matchup_stats(competition.id)
+            stats_engine.recalculate_map_stats(competition.id)
 
-            map_stats.win_count = self._calculate_map_data(participation, map, self.result_win)
-            map_stats.win_perc = map_stats.win_count / map_stats.match_count * 100
-
-            map_stats.loss_count = self._calculate_map_data(participation, map, self.result_loss)
-            map_stats.loss_perc = map_stats.loss_count / map_stats.match_count * 100
-
-            map_stats.tie_count = self._calculate_map_data(participation, map, self.result_tie)
-            map_stats.tie_perc = map_stats.tie_count / map_stats.match_count * 100
-
-            map_stats.crash_count = self._calculate_map_data(participation, map, self.result_crash)
-            map_stats.crash_perc = map_stats.crash_count / map_stats.match_count * 100
-
-            if not created and map_stats.is_dirty():
-                sentry_sdk.capture_message("Recalculated bot map stats differ from previous value")
+    def _recalculate_matchup_stats(self, participation: CompetitionParticipation):
+        stats_engine.recalculate_matchup_stats(participation.competition_id, bot_ids=[participation.bot_id])
 
-            map_stats.save()
+    def _recalculate_map_stats(self, participation: CompetitionParticipation):
+        stats_engine.recalculate_map_stats(participation.competition_id, bot_ids=[participation.bot_id])
 
     def _update_matchup_stats(
         self,
@@ -258,21 +253,3 @@ class BotStatistics:
         stats.crash_perc = stats.crash_count / stats.match_count * 100
 
         stats.save()
-
-    def _calculate_matchup_data(self, participation: CompetitionParticipation, opponent_p, result_query):
-        return Match.objects.filter(
-            Exists(
-                MatchParticipation.objects.filter(result_query, match_id=OuterRef("id"), bot_id=participation.bot_id)
-            ),
-            Exists(MatchParticipation.objects.filter(match_id=OuterRef("id"), bot_id=opponent_p.bot_id)),
-            round__competition=participation.competition_id,
-        ).count()
-
-    def _calculate_map_data(self, participation: CompetitionParticipation, map, result_query):
-        return Match.objects.filter(
-            Exists(
-                MatchParticipation.objects.filter(result_query, match_id=OuterRef("id"), bot_id=participation.bot_id)
-            ),
-            map_id=map.id,
-            round__competition=participation.competition_id,
-        ).count()
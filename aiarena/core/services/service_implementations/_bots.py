@@ -2,13 +2,13 @@ import logging
 
 from django.contrib.sites.models import Site
 from django.core.mail import send_mail
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from django.urls import reverse
 
 from constance import config
 
 from aiarena import settings
-from aiarena.core.models import Bot, Match
+from aiarena.core.models import Bot, MatchParticipation
 from aiarena.core.services import Bots
 
 
@@ -54,16 +54,15 @@ class BotsImpl(Bots):
         return self.get_active().exclude(id=bot.id)
 
     def get_available(self, bots) -> list:
-        return [bot for bot in bots if not self.bot_data_is_frozen(bot)]
+        bots = list(bots)
+        frozen_bot_ids = self.get_frozen_bot_ids([bot.id for bot in bots])
+        return [bot for bot in bots if bot.id not in frozen_bot_ids]
 
     def available_is_more_than(self, bots, amount: int) -> bool:
-        available = 0
-        for bot in bots:
-            if not self.bot_data_is_frozen(bot):
-                available += 1
-            if available >= amount:
-                return True
-        return False
+        bot_ids = {bot.id for bot in bots}
+        if len(bot_ids) < amount:
+            return False
+        return len(bot_ids - self.get_frozen_bot_ids(bot_ids)) >= amount
 
     def get_random_active(self):
         # todo: apparently this is really slow
@@ -78,12 +77,15 @@ class BotsImpl(Bots):
 
     def bot_data_is_frozen(self, bot) -> bool:
         # Check if there's any match where the bot's data is being used and updated
-        data_frozen = Match.objects.filter(
-            matchparticipation__bot=bot,
-            matchparticipation__use_bot_data=True,
-            matchparticipation__update_bot_data=True,
-            started__isnull=False,
-            result__isnull=True,
-        ).exists()
+        data_frozen = MatchParticipation.objects.locking_bot_data().filter(bot=bot).exists()
 
         return bot.bot_data and data_frozen
+
+    def get_frozen_bot_ids(self, bot_ids) -> set[int]:
+        # One query for all the bots, driven by the handful of matches in progress.
+        return set(
+            MatchParticipation.objects.locking_bot_data()
+            .filter(bot_id__in=bot_ids)
+            .exclude(Q(bot__bot_data="") | Q(bot__bot_data__isnull=True))
+            .values_list("bot_id", flat=True)
+        )
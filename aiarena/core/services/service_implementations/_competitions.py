@@ -4,6 +4,9 @@ from typing import TYPE_CHECKING
 
 from django.db.models import Count
 
+from constance import config
+
+from aiarena.core.services.service_implementations.internal import competition_priority
 from aiarena.core.services.service_implementations.internal.rounds import update_round_if_completed
 
 
@@ -28,7 +31,11 @@ class Competitions:
         """This checks that there are matches to be played for the specified competition and also applies any
         relevant database locks"""
         # todo: add check for whether new rounds can be generated here
-        return self.get_active_participants(competition).select_for_update().count() >= 2
+        active_participants = self.get_active_participants(competition)
+        if not config.SKIP_LOCKED_MATCH_CLAIMING:
+            # Otherwise the locks are taken per match and bot, as each match is started.
+            active_participants = active_participants.select_for_update()
+        return active_participants.count() >= 2
 
     def has_reached_maximum_active_rounds(self, competition: Competition):
         return competition.round_set.filter(complete=False).count() >= competition.max_active_rounds
@@ -45,7 +52,9 @@ class Competitions:
     def disable_bot_for_all_competitions(self, bot) -> int:
         """Disables a bot for all its active competition participations."""
         participations = CompetitionParticipation.objects.filter(bot=bot, active=True)
+        competition_ids = list(participations.values_list("competition_id", flat=True))
         updated = participations.update(active=False)
+        competition_priority.refresh_active_participants(competition_ids)
         return updated
 
     def update_competition_round_if_completed(self, round: Round):
@@ -11,6 +11,7 @@ from aiarena.core.models.game_mode import GameMode
 
 from .._bots import Bots
 from .._supporters import Supporters
+from .internal import match_availability
 from .internal.match_requests import get_user_match_request_count_left, handle_request_match, handle_request_matches
 
 
@@ -57,7 +58,9 @@ class MatchRequests:
         Request a single match between two bots, with the given parameters.
         """
         with transaction.atomic():
-            return handle_request_match(bot, game_mode, map, opponent, user)
+            match = handle_request_match(bot, game_mode, map, opponent, user)
+            match_availability.announce()
+            return match
 
     def get_user_match_request_count_left(self, user: User):
         """
@@ -1,5 +1,5 @@
+import itertools
 import logging
-import random
 from datetime import UTC, datetime, timedelta
 
 from django.db import transaction
@@ -30,8 +30,9 @@ from aiarena.core.models import (
 
 from .._bots import Bots
 from ._competitions import Competitions
+from .internal import competition_priority, match_availability, ready_matches
 from .internal.match_starter import MatchStarter
-from .internal.matches import CancelResult, cancel, create
+from .internal.matches import CancelResult, bulk_create, cancel
 from .internal.rounds import update_round_if_completed
 
 
@@ -47,6 +48,10 @@ _LAST_MATCH_WINDOW_GROWTH = 8
 # The first match on record was played in December 2019, and matches are only ever
 # appended, so a window reaching back this far can no longer exclude anything.
 _ARENA_EPOCH = datetime(2019, 1, 1, tzinfo=UTC)
+# How many matches to take from the front of a competition's ready-match queue per
+# attempt. Most attempts succeed on the first; the rest are ones blocked by a bot
+# that is busy elsewhere, which tends to cluster, so a handful more is plenty.
+_READY_MATCH_CANDIDATES = 20
 
 
 def _last_ladder_match_starts(bot_ids) -> dict:
@@ -137,6 +142,8 @@ class Matches:
         for match in matches_without_result:
             match.result = Result.objects.create(type="MatchCancelled", game_steps=0)
             match.save()
+            # Timing the match out frees up both bots, and each may be able to play another match.
+            match_availability.announce(2)
             if match.round is not None:  # if the match is part of a round, check for round completion
                 update_round_if_completed(match.round)
 
@@ -147,9 +154,11 @@ class Matches:
             Match.objects.select_related("round")
             .only("started", "assigned_to", "round")
             .filter(started__isnull=True, requested_by__isnull=False)
-            .select_for_update(of=("self",))
             .order_by("created")
         )
+        if not config.SKIP_LOCKED_MATCH_CLAIMING:
+            # Otherwise matches are locked one at a time, as they're started, skipping those another AC holds.
+            matches = matches.select_for_update(of=("self",))
 
         if matches.count() > 0:
             match = self._start_and_return_a_match(requesting_ac, matches)
@@ -158,23 +167,119 @@ class Matches:
         else:
             return None
 
-    def _start_and_return_a_match(self, requesting_ac: ArenaClient, matches):
-        for match in matches:
-            if MatchStarter.start(match, requesting_ac):
-                return match
-        return None  # No match was able to start
+    def _start_and_return_a_match(self, requesting_ac: ArenaClient, matches, competition_id=None):
+        match = MatchStarter.start_first(matches, requesting_ac, skip_locked=config.SKIP_LOCKED_MATCH_CLAIMING)
+        if match is not None and competition_id is not None:
+            self._on_ladder_match_started(match, competition_id)
+        return match  # None if no match was able to start
+
+    def _on_ladder_match_started(self, match: Match, competition_id: int):
+        competition_priority.record_match_started(competition_id)
+
+        if config.READY_MATCH_QUEUE_ENABLED:
+            bot_ids = list(MatchParticipation.objects.filter(match_id=match.id).values_list("bot_id", flat=True))
+            started = match.started
+
+            def update_ready_match_queue():
+                ready_matches.discard(competition_id, [match.id])
+                ready_matches.restamp_bots(bot_ids, started)
+
+            # Only once the start is committed: were it rolled back, the match would
+            # still need playing.
+            transaction.on_commit(update_ready_match_queue)
+
+    def _ready_match_queue_entries(self, participations) -> dict:
+        """Score un-started ladder matches for the ready-match queue.
+
+        `participations` are (match_id, bot_id, bot_data_enabled, round_number)
+        rows. The priority is the same one _attempt_to_start_a_ladder_match sorts
+        by, with the round number in front to keep rounds draining in order.
+        """
+        bots_by_match = {}
+        round_numbers = {}
+        data_enabled_bot_ids = set()
+        for match_id, bot_id, bot_data_enabled, round_number in participations:
+            bots_by_match.setdefault(match_id, []).append(bot_id)
+            round_numbers[match_id] = round_number
+            if bot_data_enabled:
+                data_enabled_bot_ids.add(bot_id)
+
+        last_match_start_times = _last_ladder_match_starts(
+            {bot_id for bot_ids in bots_by_match.values() for bot_id in bot_ids}
+        )
+
+        return {
+            match_id: (
+                ready_matches.score(
+                    round_numbers[match_id],
+                    sum(1 for bot_id in bot_ids if bot_id in data_enabled_bot_ids),
+                    max(
+                        (last_match_start_times[bot_id] for bot_id in bot_ids if bot_id in last_match_start_times),
+                        default=None,
+                    ),
+                ),
+                bot_ids,
+            )
+            for match_id, bot_ids in bots_by_match.items()
+        }
+
+    def _ready_match_participations(self, **filters):
+        return MatchParticipation.objects.filter(**filters).values_list(
+            "match_id", "bot_id", "bot__bot_data_enabled", "match__round__number"
+        )
+
+    def _rebuild_ready_match_queue(self, competition: Competition):
+        participations = self._ready_match_participations(
+            match__round__competition=competition,
+            match__round__complete=False,
+            match__started__isnull=True,
+            match__requested_by__isnull=True,
+        )
+        ready_matches.rebuild(competition.id, self._ready_match_queue_entries(participations))
+
+    def _attempt_to_start_a_queued_match(self, requesting_ac: ArenaClient, competition: Competition):
+        """Try to start a match from the front of the competition's ready-match queue.
+
+        Returns the started match, if any, and whether every queued match was
+        tried. When they all were, the queue has already answered what a full
+        scan of the competition's rounds would, so the caller can skip it.
+        """
+        built = ready_matches.is_built(competition.id)
+        if built is None:
+            return None, False  # Redis is unavailable; fall back to the full scan.
+        if not built:
+            self._rebuild_ready_match_queue(competition)
+
+        queued = ready_matches.candidates(competition.id, _READY_MATCH_CANDIDATES)
+        if queued is None:
+            return None, False
+        match_ids, tried_everything = queued
+
+        matches_by_id = Match.objects.only("started", "assigned_to", "round").in_bulk(match_ids)
+        stale_match_ids = [
+            match_id
+            for match_id in match_ids
+            if match_id not in matches_by_id or matches_by_id[match_id].started is not None
+        ]
+        ready_matches.discard(competition.id, stale_match_ids)
+
+        candidate_matches = [matches_by_id[match_id] for match_id in match_ids if match_id not in stale_match_ids]
+        match = self._start_and_return_a_match(requesting_ac, candidate_matches, competition.id)
+        return match, tried_everything
 
     def _attempt_to_start_a_ladder_match(self, requesting_ac: ArenaClient, for_round):
         assert requesting_ac is not None
         assert for_round is not None
+        # With SKIP_LOCKED_MATCH_CLAIMING, matches are instead locked one at a time, as they're started.
+        lock_clause = "" if config.SKIP_LOCKED_MATCH_CLAIMING else "for update"
         ladder_matches_to_play = list(
             Match.objects.raw(
-                """
+                f"""
                     SELECT core_match.id, core_match.started, assigned_to_id, round_id from core_match
                     inner join core_round cr on core_match.round_id = cr.id
                     where core_match.started is null and requested_by_id is null and round_id = %s
                     order by round_id
-                    for update 
+                    {lock_clause}
                 """,
                 (for_round.id,),
             )
@@ -183,12 +288,7 @@ class Matches:
         if len(ladder_matches_to_play) > 0:
             bots_with_a_ladder_match_to_play = (
                 Bot.objects.exclude(
-                    matchparticipation__in=MatchParticipation.objects.filter(
-                        match__started__isnull=False,
-                        match__result=None,
-                        use_bot_data=True,
-                        update_bot_data=True,
-                    ),
+                    matchparticipation__in=MatchParticipation.objects.locking_bot_data(),
                 )
                 .filter(
                     matchparticipation__in=MatchParticipation.objects.filter(
@@ -257,18 +357,22 @@ class Matches:
 
             # if, out of the bots that have a ladder match to play, at least 2 are active, then try starting matches.
             if self.bots_service.available_is_more_than(bots_with_a_ladder_match_to_play, 2):
-                match = self._start_and_return_a_match(requesting_ac, available_ladder_matches_to_play)
+                match = self._start_and_return_a_match(
+                    requesting_ac, available_ladder_matches_to_play, for_round.competition_id
+                )
 
                 return match
         return None
 
     def _attempt_to_generate_new_round(self, competition: Competition):
-        active_maps = Map.objects.filter(
-            competitions__in=[
-                competition,
-            ]
-        ).select_for_update()
-        if active_maps.count() == 0:
+        active_maps = list(
+            Map.objects.filter(
+                competitions__in=[
+                    competition,
+                ]
+            ).select_for_update()
+        )
+        if len(active_maps) == 0:
             raise NoMaps()
 
         if competition.is_paused:
@@ -310,8 +414,8 @@ class Matches:
                     key=lambda p: p.elo,
                 )
                 placement_participants = sorted(
-                    all_participants.exclude(bot__id__in=[p.bot.id for p in existing_participants]),
-                    key=lambda p: (match_counts[p.bot.id] if p.bot.id in match_counts else 0, -p.elo),
+                    all_participants.exclude(bot__id__in=[p.bot_id for p in existing_participants]),
+                    key=lambda p: (match_counts[p.bot_id] if p.bot_id in match_counts else 0, -p.elo),
                     reverse=True,
                 )
             active_participants = placement_participants + existing_participants
@@ -339,7 +443,7 @@ class Matches:
                 for p in d:
                     updated_participants.append(p)
                     p.division_num = current_div_num
-                    p.match_count = match_counts[p.bot.id] if p.bot.id in match_counts else 0
+                    p.match_count = match_counts[p.bot_id] if p.bot_id in match_counts else 0
                     p.in_placements = p.match_count < competition.n_placements
                 current_div_num -= 1
             CompetitionParticipation.objects.bulk_update(
@@ -348,26 +452,27 @@ class Matches:
         competition.save()
 
         # Get updated participants
-        active_participants = CompetitionParticipation.objects.only("id", "division_num", "bot").filter(
-            competition=competition, active=True, division_num__gte=CompetitionParticipation.MIN_DIVISION
+        active_participants = (
+            CompetitionParticipation.objects.select_related("bot")
+            .only("id", "division_num", "bot", "bot__bot_data_enabled")
+            .filter(competition=competition, active=True, division_num__gte=CompetitionParticipation.MIN_DIVISION)
+            .order_by("id")
+        )
+        participants_by_division = {}
+        for participant in active_participants:
+            participants_by_division.setdefault(participant.division_num, []).append(participant)
+        # every participant plays every other participant in their division
+        pairings = [
+            (participant1.bot, participant2.bot)
+            for participants_in_div in participants_by_division.values()
+            for participant1, participant2 in itertools.combinations(participants_in_div, 2)
+        ]
+        bulk_create(
+            new_round,
+            pairings,
+            active_maps,
+            require_trusted_arenaclient=competition.require_trusted_infrastructure,
         )
-        already_processed_participants = []
-        # loop through and generate matches for all active participants
-        for participant1 in active_participants:
-            already_processed_participants.append(participant1.id)
-            active_participants_in_div = (
-                CompetitionParticipation.objects.only("bot")
-                .filter(competition=competition, active=True, division_num=participant1.division_num)
-                .exclude(id__in=already_processed_participants)
-            )
-            for participant2 in active_participants_in_div:
-                create(
-                    new_round,
-                    random.choice(active_maps),
-                    participant1.bot,
-                    participant2.bot,
-                    require_trusted_arenaclient=competition.require_trusted_infrastructure,
-                )
 
         # Pre-list the IDs to get around this while on mariadb: https://code.djangoproject.com/ticket/28787
         p_ids = [p.id for p in active_participants]
@@ -375,15 +480,20 @@ class Matches:
             participated_in_most_recent_round=False
         )
         active_participants.update(participated_in_most_recent_round=True)
+        match_availability.announce(len(pairings))
+
+        if config.READY_MATCH_QUEUE_ENABLED:
+            entries = self._ready_match_queue_entries(self._ready_match_participations(match__round=new_round))
+            transaction.on_commit(lambda: ready_matches.push(competition.id, entries))
 
         return new_round
 
-    def start_next_match_for_competition(self, requesting_ac: ArenaClient, competition: Competition):
-        # LADDER MATCHES
+    def _attempt_to_start_a_match_from_existing_rounds(self, requesting_ac: ArenaClient, competition: Competition):
         # Get rounds with un-started matches
         # The "IN" is a workaround due to postgresql not allowing "FOR UPDATE" with a DISTINCT clause
+        lock_clause = "" if config.SKIP_LOCKED_MATCH_CLAIMING else "FOR UPDATE"
         rounds = Round.objects.raw(
-            """
+            f"""
             SELECT 
                 cr.id 
             FROM 
@@ -400,23 +510,48 @@ class Matches:
                     AND finished IS NULL 
                     AND cm.started IS NULL)
             ORDER BY cr.number
-            FOR UPDATE""",
+            {lock_clause}""",
             (competition.id,),
         )
 
         for round in rounds:
             match = self._attempt_to_start_a_ladder_match(requesting_ac, round)
+            if match is not None:
+                return match
+        return None
+
+    def start_next_match_for_competition(self, requesting_ac: ArenaClient, competition: Competition):
+        # LADDER MATCHES
+        queue_was_exhausted = False
+        if config.READY_MATCH_QUEUE_ENABLED:
+            match, queue_was_exhausted = self._attempt_to_start_a_queued_match(requesting_ac, competition)
+            if match is not None:
+                return match
+
+        # The full scan only when the queue couldn't vouch for there being nothing left to start.
+        if not queue_was_exhausted:
+            match = self._attempt_to_start_a_match_from_existing_rounds(requesting_ac, competition)
             if match is not None:
                 return match  # a match was found - we're done
 
         # If none of the previous matches were able to start, and we don't have 2 active bots available,
         # then we give up.
         # todo: does this need to be a select_for_update?
-        active_bots = self.competitions_service.get_active_bots(competition).select_for_update()
+        active_bots = self.competitions_service.get_active_bots(competition)
+        if not config.SKIP_LOCKED_MATCH_CLAIMING:
+            active_bots = active_bots.select_for_update()
 
         if not self.bots_service.available_is_more_than(active_bots, 2):
             raise NotEnoughAvailableBots()
 
+        if config.SKIP_LOCKED_MATCH_CLAIMING:
+            # Nothing has serialized the ACs up to here, so serialize generating a round on the competition.
+            # Whoever had to wait for the lock may find the round it was about to generate has just been.
+            competition.lock_me()
+            match = self._attempt_to_start_a_match_from_existing_rounds(requesting_ac, competition)
+            if match is not None:
+                return match
+
         # If we get to here, then we have
         # - no matches from any existing round we can start
         # - at least 2 active bots available for play
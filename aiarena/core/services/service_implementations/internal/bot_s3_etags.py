@@ -0,0 +1,48 @@
+import logging
+
+from django.db.models import F
+from django.utils import timezone
+
+from botocore.exceptions import ClientError
+
+from aiarena.core.models import Bot
+from aiarena.core.s3_helpers import is_s3_file
+from aiarena.core.utils import obtain_s3_filehash_or_default
+
+
+logger = logging.getLogger(__name__)
+
+_FILES = (("bot_zip", "bot_zip_s3_etag"), ("bot_data", "bot_data_s3_etag"))
+
+
+def verify(bots) -> int:
+    """
+    Checks the S3 ETags cached on each bot against S3's own, correcting any that are wrong or missing, and marks the
+    bots verified. A bot whose files change meanwhile is left for next time. Returns how many ETags were wrong.
+    """
+    wrong = 0
+    for bot in bots:
+        updates = {"s3_etags_verified": timezone.now()}
+        try:
+            for file_field, etag_field in _FILES:
+                file = getattr(bot, file_field)
+                if not file or not is_s3_file(file):
+                    continue
+                actual = obtain_s3_filehash_or_default(file, default=None)
+                cached = getattr(bot, etag_field)
+                if cached != actual:
+                    if cached is not None:
+                        wrong += 1
+                        logger.warning(f"Bot {bot.id} had the wrong {etag_field}: {cached} instead of {actual}.")
+                    updates[etag_field] = actual
+        except ClientError as e:
+            logger.warning(f"Unable to verify the S3 ETags of bot {bot.id}: {e}")
+            continue
+
+        Bot.objects.filter(id=bot.id, bot_zip=bot.bot_zip.name, bot_data=bot.bot_data.name).update(**updates)
+    return wrong
+
+
+def verify_stalest(count: int) -> int:
+    """Verifies the `count` bots that have gone longest without, starting with those never verified."""
+    return verify(Bot.objects.order_by(F("s3_etags_verified").asc(nulls_first=True), "id")[:count])
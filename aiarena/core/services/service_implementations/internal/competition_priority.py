@@ -0,0 +1,168 @@
+"""Rolling counters behind the order in which competitions are offered matches.
+
+A competition's share of the recently started ladder matches should follow its
+share of the active participants. The AC coordinator used to work both shares
+out with one large query per cache period. They're kept up to date here
+instead, in Redis:
+
+- a hash of active participant counts for every live competition, re-counted
+  from the database whenever a participation or competition changes, and
+- a ring buffer holding the competition of each recently started ladder match,
+  pushed to as matches start.
+
+Reading the order is then one round trip and a sort over the live competitions.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+import sentry_sdk
+from constance import config
+from redis import Redis
+from redis.exceptions import RedisError
+
+from aiarena.core.models import Competition, Match
+
+
+celery_redis = Redis.from_url(settings.CELERY_BROKER_URL)
+
+COMPETITION_PRIORITY_PREFIX = "competition_priority"
+
+# The statuses under which a competition takes part in the order.
+LIVE_STATUSES = ("open", "closing", "paused")
+
+# How many of the most recently started ladder matches the order is balanced over.
+RECENT_MATCHES = 100
+# How many are kept. More than RECENT_MATCHES so that when a competition stops
+# being live, the window can still be filled from the other competitions' older
+# matches.
+_RECENT_MATCHES_KEPT = RECENT_MATCHES * 5
+
+_ACTIVE_PARTICIPANTS_KEY = f"{COMPETITION_PRIORITY_PREFIX}:active_participants"
+_RECENT_MATCHES_KEY = f"{COMPETITION_PRIORITY_PREFIX}:recent_matches"
+_BUILT_KEY = f"{COMPETITION_PRIORITY_PREFIX}:built"
+
+
+def get_order() -> list[int] | None:
+    """Live competition ids with active participants, the most underplayed first.
+
+    None if the counters are unavailable, in which case the caller should work
+    the order out some other way.
+    """
+    try:
+        pipeline = celery_redis.pipeline()
+        pipeline.exists(_BUILT_KEY)
+        pipeline.hgetall(_ACTIVE_PARTICIPANTS_KEY)
+        pipeline.lrange(_RECENT_MATCHES_KEY, 0, -1)
+        built, active_participants, recent_matches = pipeline.execute()
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        return None
+    if not built:
+        # Someone has to fill them; this time the caller falls back.
+        rebuild()
+        return None
+
+    active_participants = {int(key): int(value) for key, value in active_participants.items()}
+    recent = Counter(
+        [
+            competition_id
+            for competition_id in (int(value) for value in recent_matches)
+            if competition_id in active_participants
+        ][:RECENT_MATCHES]
+    )
+    total_active = sum(active_participants.values())
+    total_recent = sum(recent.values())
+
+    def priority(competition_id):
+        recent_share = recent[competition_id] / total_recent if total_recent else 0
+        return recent_share - active_participants[competition_id] / total_active, competition_id
+
+    return sorted(
+        (competition_id for competition_id, count in active_participants.items() if count > 0),
+        key=priority,
+    )
+
+
+def record_match_started(competition_id: int) -> None:
+    """Push a ladder match start into the ring buffer once the transaction commits."""
+    if not config.COMPETITION_PRIORITY_COUNTERS_ENABLED:
+        return
+
+    def push():
+        try:
+            pipeline = celery_redis.pipeline()
+            pipeline.lpush(_RECENT_MATCHES_KEY, competition_id)
+            pipeline.ltrim(_RECENT_MATCHES_KEY, 0, _RECENT_MATCHES_KEPT - 1)
+            pipeline.execute()
+        except RedisError as exc:
+            sentry_sdk.capture_exception(exc)
+
+    transaction.on_commit(push)
+
+
+def refresh_active_participants(competition_ids) -> None:
+    """Re-count the active participants of `competition_ids` once the transaction commits.
+
+    Re-counting, rather than incrementing and decrementing, keeps the counters
+    right however the participations were changed, bulk updates included.
+    """
+    if not config.COMPETITION_PRIORITY_COUNTERS_ENABLED:
+        return
+    competition_ids = set(competition_ids)
+
+    def refresh():
+        counts = _count_active_participants(Q(id__in=competition_ids))
+        try:
+            pipeline = celery_redis.pipeline()
+            if counts:
+                pipeline.hset(_ACTIVE_PARTICIPANTS_KEY, mapping=counts)
+            if competition_ids - counts.keys():
+                pipeline.hdel(_ACTIVE_PARTICIPANTS_KEY, *(competition_ids - counts.keys()))
+            pipeline.execute()
+        except RedisError as exc:
+            sentry_sdk.capture_exception(exc)
+            _invalidate()
+
+    transaction.on_commit(refresh)
+
+
+def rebuild() -> None:
+    """Reload every counter from the database."""
+    recent_matches = list(
+        Match.objects.filter(started__isnull=False, round__isnull=False)
+        .order_by("-started")
+        .values_list("round__competition_id", flat=True)[:_RECENT_MATCHES_KEPT]
+    )
+    counts = _count_active_participants(Q())
+    try:
+        pipeline = celery_redis.pipeline()
+        pipeline.delete(_ACTIVE_PARTICIPANTS_KEY, _RECENT_MATCHES_KEY)
+        if counts:
+            pipeline.hset(_ACTIVE_PARTICIPANTS_KEY, mapping=counts)
+        if recent_matches:
+            pipeline.rpush(_RECENT_MATCHES_KEY, *recent_matches)
+        pipeline.set(_BUILT_KEY, 1)
+        pipeline.execute()
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        _invalidate()
+
+
+def _count_active_participants(competition_filter: Q) -> dict[int, int]:
+    """Active participant counts of the live competitions matching `competition_filter`."""
+    return dict(
+        Competition.objects.filter(competition_filter, status__in=LIVE_STATUSES)
+        .annotate(active_participants=Count("participations", filter=Q(participations__active=True)))
+        .values_list("id", "active_participants")
+    )
+
+
+def _invalidate() -> None:
+    try:
+        celery_redis.delete(_BUILT_KEY)
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
@@ -0,0 +1,82 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from constance import config
+
+from aiarena.core.models import Competition, CompetitionEloLedger, CompetitionParticipation
+
+
+logger = logging.getLogger(__name__)
+
+
+def record(competition_id: int, elo_delta: int, participant_delta: int = 0):
+    """
+    Records a change to the competition's ELO in its ledger, as part of the caller's transaction.
+    A competition that doesn't have a ledger yet gets one when it's next reconciled.
+    """
+    CompetitionEloLedger.objects.filter(competition_id=competition_id).update(
+        elo_sum=F("elo_sum") + elo_delta,
+        participant_count=F("participant_count") + participant_delta,
+    )
+
+
+def is_balanced(competition_id: int) -> bool | None:
+    """Whether the competition's ELO adds up, going by its ledger. None if it hasn't got one yet."""
+    ledger = CompetitionEloLedger.objects.filter(competition_id=competition_id).first()
+    if ledger is None:
+        return None
+    return ledger.elo_sum == settings.ELO_START_VALUE * ledger.participant_count
+
+
+def reconcile(competitions) -> int:
+    """
+    Checks each competition's ledger against the sum of its participants' ELO, reporting any corruption, and resets
+    the ledger to what's actually there. Creates the ledger of any competition without one. Returns how many
+    competitions didn't add up.
+    """
+    mismatches = 0
+    for competition_id in competitions.values_list("id", flat=True):
+        with transaction.atomic():
+            # Lock the ledger before summing, so that a change recorded meanwhile isn't overwritten.
+            ledger = CompetitionEloLedger.objects.select_for_update().filter(competition_id=competition_id).first()
+            actual = CompetitionParticipation.objects.filter(competition_id=competition_id).aggregate(
+                elo_sum=Sum("elo", default=0), participant_count=Count("id")
+            )
+            expected_elo_sum = settings.ELO_START_VALUE * actual["participant_count"]
+            if actual["elo_sum"] != expected_elo_sum:
+                mismatches += 1
+                logger.critical(
+                    f"ELO SANITY CHECK FAILURE: ELO sum of {actual['elo_sum']} for competition {competition_id} "
+                    f"did not match expected value of {expected_elo_sum}"
+                )
+            elif ledger is not None and (ledger.elo_sum, ledger.participant_count) != (
+                actual["elo_sum"],
+                actual["participant_count"],
+            ):
+                # The ELO adds up, but the ledger doesn't: something changed ELO or participants without recording it.
+                logger.warning(
+                    f"ELO ledger for competition {competition_id} was out by "
+                    f"{ledger.elo_sum - actual['elo_sum']} ELO and "
+                    f"{ledger.participant_count - actual['participant_count']} participants"
+                )
+
+            CompetitionEloLedger.objects.update_or_create(
+                competition_id=competition_id,
+                defaults={
+                    "elo_sum": actual["elo_sum"],
+                    "participant_count": actual["participant_count"],
+                    "reconciled_at": timezone.now(),
+                },
+            )
+    return mismatches
+
+
+def reconcile_unclosed() -> int:
+    """Closed competitions' ELO doesn't change any more, so they're left out."""
+    if not config.ENABLE_ELO_SANITY_CHECK:
+        return 0
+    return reconcile(Competition.objects.exclude(status="closed"))
@@ -0,0 +1,67 @@
+"""Wakes arena clients that are waiting for something to play.
+
+Arena clients that find nothing to play can wait on the v4 next-match
+endpoint instead of sleeping and polling again. While they wait they block on
+a Redis list. Anything that may have made matches playable (a result freeing
+up bots, a new round, a match request) pushes a token onto that list for each
+match it may have made playable, and each token wakes a single waiting
+client, so that a result doesn't send every idle client after its two bots.
+
+A token only means "try again": the woken client claims through the
+coordinator as usual, and may well lose the race for the match. Tokens nobody
+was waiting for are left for the next clients to wait, which costs them one
+extra try, so there are at most MAX_TOKENS of them and they expire.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+import sentry_sdk
+from redis import Redis
+from redis.exceptions import RedisError
+
+
+celery_redis = Redis.from_url(settings.CELERY_BROKER_URL)
+
+MATCHES_AVAILABLE_KEY = "matches_available"
+
+MAX_TOKENS = 100
+TOKEN_TTL_SECONDS = 60
+
+# The longest a client can wait, whatever MAX_MATCH_WAIT_SECONDS says: uwsgi kills requests that run for longer
+# than its harakiri setting (45 seconds, in uwsgi.ini), and a woken client still has to claim its matches.
+MAX_WAIT_SECONDS = 30
+
+
+def announce(matches: int = 1) -> None:
+    """Wake a waiting arena client for each of `matches` once the current transaction commits."""
+    tokens = min(matches, MAX_TOKENS)
+    if tokens < 1:
+        return
+
+    def push():
+        try:
+            with celery_redis.pipeline() as pipe:
+                pipe.lpush(MATCHES_AVAILABLE_KEY, *[1] * tokens)
+                pipe.ltrim(MATCHES_AVAILABLE_KEY, 0, MAX_TOKENS - 1)
+                pipe.expire(MATCHES_AVAILABLE_KEY, TOKEN_TTL_SECONDS)
+                pipe.execute()
+        except RedisError as exc:
+            sentry_sdk.capture_exception(exc)
+
+    transaction.on_commit(push)
+
+
+def wait(timeout: float) -> bool:
+    """Block until a token is taken, or for at most `timeout` seconds.
+
+    Returns whether a token was taken. Without Redis there never is one, and
+    this returns straight away, leaving the client to poll as usual.
+    """
+    if timeout <= 0:
+        return False  # BLPOP would block forever
+    try:
+        return celery_redis.blpop([MATCHES_AVAILABLE_KEY], timeout=timeout) is not None
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        return False
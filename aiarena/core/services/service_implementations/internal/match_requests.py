@@ -7,6 +7,7 @@ from aiarena.core.models import Map, Match, Result
 
 from .._bots import Bots
 from .._supporters import Supporters
+from . import match_availability
 from .maps import Maps
 from .matches import create
 
@@ -94,6 +95,7 @@ def handle_request_matches(
                     game_mode=None,
                 )
             )
+    match_availability.announce(len(match_list))
     return match_list
 
 
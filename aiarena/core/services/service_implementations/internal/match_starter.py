@@ -3,7 +3,7 @@ import logging
 from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
-from aiarena.core.models import ArenaClient, Match, MatchParticipation
+from aiarena.core.models import ArenaClient, Bot, Match, MatchParticipation
 
 
 logger = logging.getLogger(__name__)
@@ -15,14 +15,88 @@ class MatchStarter:
     """
 
     @staticmethod
-    def start(match: Match, arenaclient: ArenaClient) -> bool:
+    def start(match: Match, arenaclient: ArenaClient, skip_locked: bool = False) -> bool:
         """
         Start the match.
+
+        With skip_locked, a match or participant that another arena client is busy starting is skipped over instead of
+        waited on. The participants' bots are locked too, because in that mode nothing else keeps two arena clients
+        from starting different matches for the same bot at once.
         """
         if MatchStarter.__requires_trusted_arenaclient(match) and not arenaclient.trusted:
             return False
 
-        match.lock_me()  # lock self to avoid race conditions
+        return MatchStarter.__lock_and_start(match, arenaclient, skip_locked)
+
+    @staticmethod
+    def start_first(matches, arenaclient: ArenaClient, skip_locked: bool = False) -> Match | None:
+        """
+        Start the first of `matches` that can be started, and return it.
+
+        The trust requirement and participant availability are checked for all the candidates at once, so only the
+        candidates that pass are locked and checked again one by one, as `start` does.
+        """
+        matches = list(matches)
+        startable_match_ids = MatchStarter.__startable_match_ids([match.id for match in matches], arenaclient)
+        for match in matches:
+            if match.id in startable_match_ids and MatchStarter.__lock_and_start(match, arenaclient, skip_locked):
+                return match
+        return None
+
+    @staticmethod
+    def __startable_match_ids(match_ids, arenaclient: ArenaClient) -> set[int]:
+        """Which of the matches look startable, going by two queries and without taking any locks."""
+        participations = list(
+            MatchParticipation.objects.filter(match_id__in=match_ids, match__started__isnull=True).values(
+                "match_id",
+                "bot_id",
+                "use_bot_data",
+                "update_bot_data",
+                "match__requested_by_id",
+                "match__require_trusted_arenaclient",
+                "bot__bot_zip_publicly_downloadable",
+                "bot__bot_data_publicly_downloadable",
+            )
+        )
+        # The candidates haven't started, so any match locking one of their bots' data is another match.
+        busy_bot_ids = set(
+            MatchParticipation.objects.locking_bot_data()
+            .filter(bot_id__in={participation["bot_id"] for participation in participations})
+            .values_list("bot_id", flat=True)
+        )
+
+        participations_by_match = {}
+        for participation in participations:
+            participations_by_match.setdefault(participation["match_id"], []).append(participation)
+
+        def requires_trusted_arenaclient(participation):
+            return (
+                participation["match__require_trusted_arenaclient"]
+                or not participation["bot__bot_zip_publicly_downloadable"]
+                or not participation["bot__bot_data_publicly_downloadable"]
+            )
+
+        def available(participation):
+            target_match_not_locked_by_bot_data = not participation["use_bot_data"] or (
+                not participation["update_bot_data"] and participation["match__requested_by_id"] is not None
+            )
+            return target_match_not_locked_by_bot_data or participation["bot_id"] not in busy_bot_ids
+
+        return {
+            match_id
+            for match_id, match_participations in participations_by_match.items()
+            if len(match_participations) >= 2
+            and (arenaclient.trusted or not any(map(requires_trusted_arenaclient, match_participations)))
+            and all(map(available, match_participations))
+        }
+
+    @staticmethod
+    def __lock_and_start(match: Match, arenaclient: ArenaClient, skip_locked: bool) -> bool:
+        if skip_locked:
+            if not MatchStarter.__try_lock(match):
+                return False
+        else:
+            match.lock_me()  # lock self to avoid race conditions
 
         if match.is_already_started:
             logger.warning(f"Match {match.id} failed to start unexpectedly as it was already started.")
@@ -33,15 +107,7 @@ class MatchStarter:
             update_bot_data=False, match__requested_by__isnull=False
         )
         not_in_another_match = ~Exists(
-            MatchParticipation.objects.exclude(
-                match_id=match.id,
-            ).filter(
-                bot_id=OuterRef("bot_id"),
-                use_bot_data=True,
-                update_bot_data=True,
-                match__started__isnull=False,
-                match__result=None,
-            )
+            MatchParticipation.objects.locking_bot_data().exclude(match_id=match.id).filter(bot_id=OuterRef("bot_id"))
         )
         available_participants = MatchParticipation.objects.filter(
             target_match_not_locked_by_bot_data | not_in_another_match,
@@ -62,6 +128,21 @@ class MatchStarter:
         match.save()
         return True
 
+    @staticmethod
+    def __try_lock(match: Match) -> bool:
+        """Lock the match and its bots, unless another transaction holds any of them."""
+        if not Match.objects.select_for_update(skip_locked=True).filter(id=match.id).values_list("id"):
+            return False
+        locked_bots = (
+            Bot.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(matchparticipation__match_id=match.id)
+            .values_list("id")
+        )
+        if len(locked_bots) < 2:
+            return False
+        match.refresh_from_db()
+        return True
+
     @staticmethod
     def __requires_trusted_arenaclient(match):
         require_trusted_arenaclient = match.require_trusted_arenaclient or (
@@ -0,0 +1,64 @@
+from django.db.models import Q
+
+from aiarena.core.models import Match, MatchTag, Tag
+
+
+MatchTags = Match.tags.through
+
+
+def set_tags(match: Match, tags_by_user_id: dict[int, list[str]]):
+    """
+    Replaces each given user's tags on the match with the ones given for them, leaving other users' tags alone.
+
+    Takes the same handful of queries however many tags there are: the tags and match tags are upserted, and the
+    match's links to them changed, a set at a time.
+    """
+    if not tags_by_user_id:
+        return
+
+    names = {name for tags in tags_by_user_id.values() for name in tags}
+    tag_ids = {}
+    if names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+
+    wanted_pairs = {(user_id, tag_ids[name]) for user_id, tags in tags_by_user_id.items() for name in tags}
+    wanted = set()
+    if wanted_pairs:
+        MatchTag.objects.bulk_create(
+            [MatchTag(user_id=user_id, tag_id=tag_id) for user_id, tag_id in wanted_pairs], ignore_conflicts=True
+        )
+        pair_filter = Q()
+        for user_id, tag_id in wanted_pairs:
+            pair_filter |= Q(user_id=user_id, tag_id=tag_id)
+        wanted = set(MatchTag.objects.filter(pair_filter).values_list("id", flat=True))
+
+    current_tag_ids = dict(
+        MatchTags.objects.filter(match=match, matchtag__user_id__in=tags_by_user_id).values_list(
+            "matchtag_id", "matchtag__tag_id"
+        )
+    )
+    current = set(current_tag_ids)
+    # Straight on the through table: Match.tags.remove() would check each removed tag for orphans one at a time.
+    removed = current - wanted
+    if removed:
+        MatchTags.objects.filter(match=match, matchtag_id__in=removed).delete()
+        delete_orphans(removed, {current_tag_ids[match_tag_id] for match_tag_id in removed})
+    if wanted - current:
+        MatchTags.objects.bulk_create(
+            [MatchTags(match=match, matchtag_id=match_tag_id) for match_tag_id in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def delete_orphans(match_tag_ids, tag_ids):
+    """
+    Deletes those of the match tags no match has any more, then those of their tags no match tag has any more.
+
+    A query each, straight in the database: deleting the match tags through the ORM would send MatchTag's post_delete
+    for each of them, which looks for an orphaned tag one match tag at a time.
+    """
+    orphans = MatchTag.objects.filter(id__in=match_tag_ids, match__isnull=True)
+    orphans._raw_delete(orphans.db)
+    orphaned_tags = Tag.objects.filter(id__in=tag_ids, matchtag__isnull=True)
+    orphaned_tags._raw_delete(orphaned_tags.db)
@@ -1,10 +1,14 @@
+import random
 from enum import Enum
 
 from django.db import transaction
 from django.utils import timezone
 
+from constance import config
+
 from aiarena.core.models import Match, MatchParticipation, Result
 
+from . import match_availability, ready_matches
 from .rounds import update_round_if_completed
 
 
@@ -50,6 +54,36 @@ def create(
         return match
 
 
+def bulk_create(round, pairings, maps, require_trusted_arenaclient=True) -> list[Match]:
+    """
+    create() for many matches at once, in two INSERTs.
+    `pairings` is a list of (bot1, bot2) tuples. Each match is played on a map picked at random from `maps`, a list.
+    Participants use and update their bot's data if it's enabled.
+    """
+    with transaction.atomic():
+        matches = Match.objects.bulk_create(
+            [
+                Match(map=random.choice(maps), round=round, require_trusted_arenaclient=require_trusted_arenaclient)
+                for _ in pairings
+            ]
+        )
+        MatchParticipation.objects.bulk_create(
+            [
+                MatchParticipation(
+                    match=match,
+                    participant_number=participant_number,
+                    bot=bot,
+                    use_bot_data=bot.bot_data_enabled,
+                    update_bot_data=bot.bot_data_enabled,
+                )
+                for match, bots in zip(matches, pairings)
+                for participant_number, bot in enumerate(bots, start=1)
+            ]
+        )
+
+        return matches
+
+
 # todo: this is used externally, so it probably shouldn't be here
 class CancelResult(Enum):
     SUCCESS = 1
@@ -76,6 +110,12 @@ def cancel(match_id, requesting_user):
             match.started = now
             match.first_started = now
 
+            if match.round is not None and config.READY_MATCH_QUEUE_ENABLED:
+                transaction.on_commit(lambda: ready_matches.discard(match.round.competition_id, [match.id]))
+        else:
+            # Cancelling frees up both bots, and each may be able to play another match.
+            match_availability.announce(2)
+
         match.save()
 
         if match.round is not None:
@@ -0,0 +1,199 @@
+"""A per-competition queue of ladder matches that are ready to be handed out.
+
+Finding the next match to play used to be re-derived from scratch on every
+arena client poll: lock the competition's open rounds, list their un-started
+matches, work out which bots are free and sort the lot by priority. This keeps
+the outcome of that derivation in Redis instead, as one sorted set per
+competition, so handing out a match is a pop plus one validating lock.
+
+THE QUEUE IS AN ACCELERATOR, NOT THE SOURCE OF TRUTH. Every match popped from
+it is still started through MatchStarter, which re-checks everything against
+the database under a row lock. A stale entry therefore costs a wasted attempt,
+never a wrong match, and a missing entry is picked up by the full derivation
+that still runs whenever the queue comes up empty.
+
+This module owns Redis and nothing else. Deciding what goes in, and when, is
+the Matches service's job.
+"""
+
+import datetime
+
+from django.conf import settings
+
+import sentry_sdk
+from redis import Redis
+from redis.exceptions import RedisError
+
+
+celery_redis = Redis.from_url(settings.CELERY_BROKER_URL)
+
+READY_MATCHES_PREFIX = "ready_matches"
+
+# How long a queue is trusted before it's rebuilt from the database. Nothing
+# should make it drift, but this bounds the damage if something does -- e.g.
+# matches generated while the queue was switched off.
+READY_MATCHES_REBUILD_SECONDS = 60 * 60
+
+# A score packs the whole priority order into one float, most significant
+# first: round number, then the number of data-enabled bots (more goes first),
+# then the most recent last-match start among the match's bots (earlier goes
+# first). The start time is an epoch second, so it needs a slot wider than any
+# timestamp we'll see. Round numbers up to the hundreds of thousands still fit
+# exactly in a double.
+_START_TIME_SPAN = 10**10
+_MAX_DATA_ENABLED = 2
+
+
+def _queue_key(competition_id: int) -> str:
+    return f"{READY_MATCHES_PREFIX}:competition:{competition_id}"
+
+
+def _built_key(competition_id: int) -> str:
+    return f"{READY_MATCHES_PREFIX}:built:{competition_id}"
+
+
+def _bot_key(bot_id: int) -> str:
+    return f"{READY_MATCHES_PREFIX}:bot:{bot_id}"
+
+
+def score(round_number: int, data_enabled_count: int, last_start: datetime.datetime | None) -> float:
+    """The queue position of a match. Lower scores are handed out first.
+
+    `last_start` is the most recent last-match start among the match's bots, or
+    None if none of them has played yet -- which puts the match first.
+    """
+    priority = round_number * (_MAX_DATA_ENABLED + 1) + (_MAX_DATA_ENABLED - data_enabled_count)
+    return priority * _START_TIME_SPAN + (int(last_start.timestamp()) if last_start else 0)
+
+
+def _restamp(old_score: float, last_start: datetime.datetime) -> float:
+    """`old_score` with its start time replaced by `last_start`, priority kept."""
+    return (old_score // _START_TIME_SPAN) * _START_TIME_SPAN + int(last_start.timestamp())
+
+
+def is_built(competition_id: int) -> bool | None:
+    """Whether the competition's queue reflects the database. None if Redis is unavailable."""
+    try:
+        return bool(celery_redis.exists(_built_key(competition_id)))
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        return None
+
+
+def rebuild(competition_id: int, entries: dict[int, tuple[float, list[int]]]) -> None:
+    """Replace the competition's queue with `entries`, a match id -> (score, bot ids) map."""
+    try:
+        pipeline = celery_redis.pipeline()
+        pipeline.delete(_queue_key(competition_id))
+        _add(pipeline, competition_id, entries)
+        pipeline.set(_built_key(competition_id), 1, ex=READY_MATCHES_REBUILD_SECONDS)
+        pipeline.execute()
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        invalidate(competition_id)
+
+
+def push(competition_id: int, entries: dict[int, tuple[float, list[int]]]) -> None:
+    """Add newly playable matches, as a match id -> (score, bot ids) map.
+
+    Only meaningful on a built queue -- an unbuilt one will pick the matches up
+    from the database when it's rebuilt, so they're dropped here rather than
+    creating a queue that looks built but only holds one round.
+    """
+    if not entries:
+        return
+    try:
+        if not celery_redis.exists(_built_key(competition_id)):
+            return
+        pipeline = celery_redis.pipeline()
+        _add(pipeline, competition_id, entries)
+        pipeline.execute()
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        invalidate(competition_id)
+
+
+def _add(pipeline, competition_id: int, entries: dict[int, tuple[float, list[int]]]) -> None:
+    if not entries:
+        return
+    pipeline.zadd(_queue_key(competition_id), {match_id: match_score for match_id, (match_score, _) in entries.items()})
+    # Reverse index, so a bot's queued matches can be re-scored when it starts
+    # playing without a trip to the database.
+    for match_id, (_, bot_ids) in entries.items():
+        for bot_id in bot_ids:
+            pipeline.sadd(_bot_key(bot_id), f"{competition_id}:{match_id}")
+
+
+def candidates(competition_id: int, count: int) -> tuple[list[int], bool] | None:
+    """The first `count` queued match ids, and whether that's the whole queue.
+
+    None if Redis is unavailable.
+    """
+    try:
+        pipeline = celery_redis.pipeline()
+        pipeline.zrange(_queue_key(competition_id), 0, count - 1)
+        pipeline.zcard(_queue_key(competition_id))
+        match_ids, size = pipeline.execute()
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        return None
+    return [int(match_id) for match_id in match_ids], size <= count
+
+
+def discard(competition_id: int, match_ids: list[int]) -> None:
+    """Remove matches that can no longer be started.
+
+    The bots' reverse index entries are left behind: they're cleaned up the
+    next time those bots are re-scored, which has to check them anyway.
+    """
+    if not match_ids:
+        return
+    try:
+        celery_redis.zrem(_queue_key(competition_id), *match_ids)
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
+        invalidate(competition_id)
+
+
+def restamp_bots(bot_ids: list[int], started: datetime.datetime) -> None:
+    """Record that `bot_ids` just started a ladder match.
+
+    That makes `started` the most recent last start of every queued match these
+    bots are in, so each moves behind the matches whose bots have waited
+    longer. Their priority otherwise stays where it was.
+    """
+    try:
+        pipeline = celery_redis.pipeline()
+        for bot_id in bot_ids:
+            pipeline.smembers(_bot_key(bot_id))
+        members = {member.decode() for bot_members in pipeline.execute() for member in bot_members}
+        if not members:
+            return
+
+        entries = [member.split(":") for member in members]
+        pipeline = celery_redis.pipeline()
+        for competition_id, match_id in entries:
+            pipeline.zscore(_queue_key(int(competition_id)), match_id)
+        scores = pipeline.execute()
+
+        pipeline = celery_redis.pipeline()
+        for (competition_id, match_id), old_score in zip(entries, scores):
+            if old_score is None:
+                # Already handed out or cancelled; drop the stale index entry.
+                for bot_id in bot_ids:
+                    pipeline.srem(_bot_key(bot_id), f"{competition_id}:{match_id}")
+            else:
+                pipeline.zadd(_queue_key(int(competition_id)), {match_id: _restamp(old_score, started)}, xx=True)
+        pipeline.execute()
+    except RedisError as exc:
+        # Only the order within the queue suffers, and only until the next
+        # rebuild, so there's nothing to invalidate.
+        sentry_sdk.capture_exception(exc)
+
+
+def invalidate(competition_id: int) -> None:
+    """Forget the competition's queue, so it's rebuilt from the database next time."""
+    try:
+        celery_redis.delete(_built_key(competition_id), _queue_key(competition_id))
+    except RedisError as exc:
+        sentry_sdk.capture_exception(exc)
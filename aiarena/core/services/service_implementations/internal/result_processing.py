@@ -0,0 +1,187 @@
+"""
+What's left to do for a competition match's result once its ELO has been adjusted.
+
+None of it needs to be done before the arena client is told its result was accepted, so with
+ASYNC_RESULT_PROCESSING_ENABLED each stage is recorded as a ResultProcessingStage and run by a Celery task once the
+result's transaction commits. Otherwise the stages run inline, as part of the submission.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+import sentry_sdk
+from constance import config
+
+from aiarena.core.models import (
+    Bot,
+    BotCrashLimitAlert,
+    MatchParticipation,
+    Result,
+    ResultProcessingStage,
+    Round,
+)
+from aiarena.core.services import bot_statistics, bots, competitions
+
+from . import elo_ledger
+
+
+logger = logging.getLogger(__name__)
+
+
+def process(result: Result):
+    if not config.ASYNC_RESULT_PROCESSING_ENABLED:
+        for stage, _ in ResultProcessingStage.STAGES:
+            _STAGES[stage](result)
+        return
+
+    ResultProcessingStage.objects.bulk_create(
+        [ResultProcessingStage(result=result, stage=stage) for stage, _ in ResultProcessingStage.STAGES],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: enqueue(result.id, [stage for stage, _ in ResultProcessingStage.STAGES]))
+
+
+def enqueue(result_id: int, stages: list[str]):
+    from aiarena.core.tasks import process_result_stage  # avoid circular import
+
+    for stage in stages:
+        try:
+            process_result_stage.delay(result_id, stage)
+        except Exception as e:
+            # The stage is still pending, so requeue_stale_result_stages will pick it up.
+            sentry_sdk.capture_exception(e)
+
+
+def run_stage(result_id: int, stage: str):
+    """
+    Runs the stage, unless it's already been done. The stage is marked done in the same transaction as its work,
+    so a task that's delivered twice, or retried after its work committed, doesn't do the work twice.
+    """
+    with transaction.atomic():
+        processing_stage = ResultProcessingStage.objects.select_for_update().get(result_id=result_id, stage=stage)
+        if processing_stage.status == ResultProcessingStage.DONE:
+            return
+        _STAGES[stage](Result.objects.select_related("match__round__competition").get(id=result_id))
+        processing_stage.status = ResultProcessingStage.DONE
+        processing_stage.attempts = F("attempts") + 1
+        processing_stage.error = ""
+        processing_stage.save(update_fields=["status", "attempts", "error", "updated"])
+
+
+def record_failure(result_id: int, stage: str, error: Exception, final: bool):
+    """Notes a failed attempt at the stage. On the final attempt the stage is marked failed, for an admin to retry."""
+    ResultProcessingStage.objects.filter(result_id=result_id, stage=stage).exclude(
+        status=ResultProcessingStage.DONE
+    ).update(
+        status=ResultProcessingStage.FAILED if final else ResultProcessingStage.PENDING,
+        attempts=F("attempts") + 1,
+        error=repr(error),
+        updated=timezone.now(),
+    )
+
+
+def retry(processing_stages):
+    """Puts failed or stuck stages back on the queue."""
+    processing_stages = list(processing_stages.exclude(status=ResultProcessingStage.DONE))
+    ResultProcessingStage.objects.filter(id__in=[s.id for s in processing_stages]).update(
+        status=ResultProcessingStage.PENDING, updated=timezone.now()
+    )
+    for processing_stage in processing_stages:
+        transaction.on_commit(
+            lambda processing_stage=processing_stage: enqueue(processing_stage.result_id, [processing_stage.stage])
+        )
+    return len(processing_stages)
+
+
+def _complete_round(result: Result):
+    # Two results can be the last of their round. Whichever gets here second finds it already complete.
+    round = Round.objects.select_for_update().get(id=result.match.round_id)
+    if not round.complete:
+        competitions.update_competition_round_if_completed(round)
+
+
+def _check_elo_sum(result: Result):
+    if not config.ENABLE_ELO_SANITY_CHECK:
+        if config.DEBUG_LOGGING_ENABLED:
+            logger.info("ENABLE_ELO_SANITY_CHECK disabled. Skipping check.")
+        return
+
+    if config.DEBUG_LOGGING_ENABLED:
+        logger.info("ENABLE_ELO_SANITY_CHECK enabled. Performing check.")
+
+    # The ledger makes this a single row read. Whatever it can't see is caught when it's reconciled.
+    competition_id = result.match.round.competition_id
+    balanced = elo_ledger.is_balanced(competition_id)
+    if balanced is False:
+        logger.critical(
+            f"ELO SANITY CHECK FAILURE: ELO ledger for competition {competition_id} did not balance "
+            f"upon submission of result {result.id}"
+        )
+    elif config.DEBUG_LOGGING_ENABLED:
+        logger.info(
+            "ENABLE_ELO_SANITY_CHECK passed!" if balanced else "ENABLE_ELO_SANITY_CHECK skipped: no ELO ledger yet."
+        )
+
+
+def _update_bot_statistics(result: Result):
+    sp1, sp2 = result.get_competition_participants
+    bot_statistics.update_stats_based_on_result(sp1, result, sp2)
+    bot_statistics.update_stats_based_on_result(sp2, result, sp1)
+
+
+def _check_for_consecutive_crashes(result: Result):
+    alert = (
+        BotCrashLimitAlert.objects.filter(triggering_match_participation__match_id=result.match.id)
+        .select_related("triggering_match_participation__bot")
+        .first()
+    )
+    if alert is not None:
+        try:
+            bots.send_crash_alert(alert.triggering_match_participation.bot)
+        except Exception as e:
+            logger.exception(e)
+
+
+def update_crash_streaks(result: Result, participations: list[MatchParticipation]):
+    """
+    Counts the result towards, or breaks, each participant's streak of crashes. If it's a competition match, and the
+    bot that caused it has now crashed BOT_CONSECUTIVE_CRASH_LIMIT more times in a row, logs a crash limit alert, for
+    the crash check to send.
+
+    Only matches that started after the bot's zip was last updated count: the new zip's streak is neither held
+    against it by an older zip's crash, nor broken by an older zip's result. Returns the alert, if one was logged.
+    """
+    if result.match.started is not None:
+        played_by_current_zips = Bot.objects.filter(bot_zip_updated__lt=result.match.started)
+        crashed = [participation.bot_id for participation in participations if participation.crashed]
+        not_crashed = [participation.bot_id for participation in participations if not participation.crashed]
+        if crashed:
+            played_by_current_zips.filter(id__in=crashed).update(consecutive_crashes=F("consecutive_crashes") + 1)
+        if not_crashed:
+            played_by_current_zips.filter(id__in=not_crashed).exclude(consecutive_crashes=0).update(
+                consecutive_crashes=0
+            )
+
+    if config.BOT_CONSECUTIVE_CRASH_LIMIT < 1:
+        return None  # Check is disabled
+    if not result.is_crash_or_timeout or result.match.round_id is None:
+        return None  # Requested matches don't set off alerts
+    triggering_participation = result.get_causing_participant_of_crash_or_timeout_result
+    streak = Bot.objects.values_list("consecutive_crashes", flat=True).get(id=triggering_participation.bot_id)
+    # One alert per BOT_CONSECUTIVE_CRASH_LIMIT crashes in a row.
+    if streak == 0 or streak % config.BOT_CONSECUTIVE_CRASH_LIMIT != 0:
+        return None
+    if not triggering_participation.bot.competition_participations.filter(active=True).exists():
+        return None  # No use alerting - bot is already inactive.
+    return BotCrashLimitAlert.objects.create(triggering_match_participation=triggering_participation)
+
+
+_STAGES = {
+    ResultProcessingStage.ROUND_COMPLETION: _complete_round,
+    ResultProcessingStage.ELO_SANITY_CHECK: _check_elo_sum,
+    ResultProcessingStage.BOT_STATISTICS: _update_bot_statistics,
+    ResultProcessingStage.CRASH_CHECK: _check_for_consecutive_crashes,
+}
@@ -1,20 +1,13 @@
 import io
-from datetime import datetime
 
 from django.db import connection
 
-import matplotlib
-import matplotlib.dates as mdates
-import matplotlib.patheffects as path_effects
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 from pytz import utc
 
 from aiarena.core.models import Bot, CompetitionParticipation
 
-
-# Use the AGG backend - https://matplotlib.org/stable/users/explain/figure/backends.html#static-backends
-matplotlib.use("agg")
+from .graph_renderer import graph_renderer
 
 
 class EloGraphsGenerator:
@@ -27,16 +20,15 @@ class EloGraphsGenerator:
         return graph1, graph2, graph3
 
     def _generate_elo_graph(self, bot: Bot, competition_id: int):
-        df = self._get_elo_dataframe(bot, competition_id)
+        rows = self._get_elo_data(bot, competition_id)
 
-        if df.empty:
+        if not rows:
             return None, None  # no elo data
 
-        df.columns = ["Name", "ELO", "Date"]
-
+        _names, elos, dates = zip(*rows)
         update_date = self._get_graph_update_line_datetime(bot, competition_id)
 
-        return self._generate_elo_plot_images(df, update_date)
+        return graph_renderer().render_elo_graphs(dates, np.array(elos), update_date)
 
     def _get_graph_update_line_datetime(self, bot, competition_id):
         update_date = self.get_earliest_result_datetime(bot.id, competition_id)[0][0]
@@ -47,16 +39,14 @@ class EloGraphsGenerator:
         return bot.bot_zip_updated
 
     def _generate_winrate_graph(self, bot_id: int, competition_id: int):
-        df = self._get_winrate_dataframe(bot_id, competition_id)
-        if not df.empty:
-            df.columns = ["Duration (Minutes)", "Wins", "Losses", "Crashes", "Ties"]
-            return self._generate_winrate_plot_images(df)
+        rows = self._get_winrate_data(bot_id, competition_id)
+        if rows:
+            durations, *counts = zip(*rows)
+            wins, losses, crashes, ties = (np.array(outcome_counts) for outcome_counts in counts)
+            return graph_renderer().render_winrate_graph(durations, wins, losses, crashes, ties)
         else:
             return None
 
-    def _get_winrate_dataframe(self, bot_id, competition_id):
-        return pd.DataFrame(self._get_winrate_data(bot_id, competition_id))
-
     def _get_winrate_data(self, bot_id, competition_id):
         # this does not distinct between competitions
         with connection.cursor() as cursor:
@@ -89,97 +79,6 @@ class EloGraphsGenerator:
 
         return stats_vs_duration
 
-    def _generate_winrate_plot_images(self, df):
-        plot1 = io.BytesIO()
-
-        durations = df["Duration (Minutes)"].map(lambda x: str(x) + " - " + str(x + 5))
-        wins = df["Wins"]
-        losses = df["Losses"]
-        crashes = df["Crashes"]
-        ties = df["Ties"]
-        totals = [w + l + c + t for w, l, c, t in zip(wins, losses, crashes, ties)]
-
-        width = 0.65
-
-        fig, ax1 = plt.subplots(1, 1, figsize=(12, 9), sharex="all", sharey="all")
-        ax1.bar(durations, wins, width, color="#86C232", label="Wins")
-        ax1.bar(durations, ties, width, color="#DFCE00", bottom=wins, label="Ties")
-        ax1.bar(durations, losses, width, color="#D20044", bottom=wins + ties, label="Losses")
-        ax1.bar(durations, crashes, width, color="#AAAAAA", bottom=wins + ties + losses, label="Crashes")
-        ax1.spines["top"].set_visible(False)
-        ax1.spines["right"].set_visible(False)
-        ax1.spines["left"].set_color("#86c232")
-        ax1.spines["bottom"].set_color("#86c232")
-        ax1.autoscale(enable=True, axis="x")
-        ax1.get_xaxis().tick_bottom()
-        ax1.get_yaxis().tick_left()
-        ax1.yaxis.get_major_locator().set_params(integer=True)
-        ax1.tick_params(axis="x", colors="#86c232", labelsize=16)
-        ax1.tick_params(axis="y", colors="#86c232", labelsize=16)
-        ax1.legend(loc="upper right", fontsize="xx-large")
-
-        effect = [path_effects.Stroke(linewidth=3, foreground="black"), path_effects.Normal()]
-
-        for i, val in enumerate(zip(wins, losses, crashes, ties, totals)):
-            c_totals = val[4]
-            if c_totals == 0:
-                continue
-            c_wins = val[0]
-            c_losses = val[1]
-            c_crashes = val[2]
-            c_ties = val[3]
-            if c_wins > 0:
-                plt.text(
-                    i,
-                    c_wins / 2,
-                    str(round(c_wins / c_totals * 100)) + "%",
-                    va="center",
-                    ha="center",
-                    color="#FFFFFF",
-                    size=20,
-                ).set_path_effects(effect)
-            if c_ties > 0:
-                plt.text(
-                    i,
-                    c_wins + c_ties / 2,
-                    str(round(c_ties / c_totals * 100)) + "%",
-                    va="center",
-                    ha="center",
-                    color="#FFFFFF",
-                    size=20,
-                ).set_path_effects(effect)
-            if c_losses > 0:
-                plt.text(
-                    i,
-                    c_wins + c_ties + c_losses / 2,
-                    str(round(c_losses / c_totals * 100)) + "%",
-                    va="center",
-                    ha="center",
-                    color="#FFFFFF",
-                    size=20,
-                ).set_path_effects(effect)
-            if c_crashes > 0:
-                plt.text(
-                    i,
-                    c_wins + c_ties + c_losses + c_crashes / 2,
-                    str(round(c_crashes / c_totals * 100)) + "%",
-                    va="center",
-                    ha="center",
-                    color="#FFFFFF",
-                    size=20,
-                ).set_path_effects(effect)
-
-        plt.title("Result vs Match Duration", fontsize=20, color=("#86c232"))
-        plt.tight_layout()  # Avoids savefig cutting off x-label
-        plt.savefig(plot1, format="png", transparent=True)
-        plt.xticks(durations)
-
-        plt.close(fig)
-        return plot1
-
-    def _get_elo_dataframe(self, bot, competition_id):
-        return pd.DataFrame(self._get_elo_data(bot, competition_id))
-
     def _get_elo_data(self, bot, competition_id):
         with connection.cursor() as cursor:
             query = f"""
@@ -221,41 +120,6 @@ class EloGraphsGenerator:
             cursor.execute(query)
             return cursor.fetchall()
 
-    def _generate_elo_plot_images(self, df, update_date: datetime):
-        plot1 = io.BytesIO()
-        plot2 = io.BytesIO()
-
-        legend = []
-
-        fig, ax1 = plt.subplots(1, 1, figsize=(12, 9), sharex="all", sharey="all")
-        ax1.plot(df["Date"], df["ELO"], color="#86c232")
-        # ax.plot(df["Date"], df['ELO'], color='#86c232')
-        ax1.spines["top"].set_visible(False)
-        ax1.spines["right"].set_visible(False)
-        ax1.spines["left"].set_color("#86c232")
-        ax1.spines["bottom"].set_color("#86c232")
-        ax1.autoscale(enable=True, axis="x")
-        ax1.get_xaxis().tick_bottom()
-        ax1.get_yaxis().tick_left()
-        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%b-%d"))
-        ax1.tick_params(axis="x", colors="#86c232", labelsize=16)
-        ax1.tick_params(axis="y", colors="#86c232", labelsize=16)
-        # if update_date:
-
-        legend.append("ELO")
-        ax1.legend(legend, loc="lower center", fontsize="xx-large")
-
-        plt.title("ELO over time", fontsize=20, color=("#86c232"))
-        plt.tight_layout()  # Avoids savefig cutting off x-label
-        plt.savefig(plot1, format="png", transparent=True)
-
-        ax1.vlines([update_date], min(df["ELO"]), max(df["ELO"]), colors="r", linestyles="--")
-        legend.append("Last bot update")
-        ax1.legend(legend, loc="lower center", fontsize="xx-large")
-        plt.savefig(plot2, format="png", transparent=True)
-        plt.close(fig)
-        return plot1, plot2
-
     def _get_race_outcome_breakdown_data(self, bot_id: int, competition_id: int):
         with connection.cursor() as cursor:
             query = """
@@ -0,0 +1,235 @@
+"""
+Draws the graphs of a bot's stats.
+
+Setting a matplotlib figure up - its axes, fonts and layout - costs a lot more than drawing some data on it, so each
+graph's figure is set up once per process and kept. Drawing a graph only swaps the data into the figure's artists.
+"""
+
+import io
+import threading
+from datetime import datetime
+from functools import cache
+
+import matplotlib.dates as mdates
+import matplotlib.image as mimage
+import matplotlib.patheffects as path_effects
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.legend import Legend
+from matplotlib.transforms import Bbox
+
+
+_GREEN = "#86c232"
+
+
+def _figure():
+    figure = Figure(figsize=(12, 9))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    # Transparent, as with savefig(transparent=True).
+    figure.patch.set_facecolor("none")
+    figure.patch.set_edgecolor("none")
+    axes.patch.set_facecolor("none")
+    axes.patch.set_edgecolor("none")
+    axes.spines["top"].set_visible(False)
+    axes.spines["right"].set_visible(False)
+    axes.spines["left"].set_color(_GREEN)
+    axes.spines["bottom"].set_color(_GREEN)
+    axes.get_xaxis().tick_bottom()
+    axes.get_yaxis().tick_left()
+    axes.tick_params(axis="x", colors=_GREEN, labelsize=16)
+    axes.tick_params(axis="y", colors=_GREEN, labelsize=16)
+    return figure, axes
+
+
+def _png(figure) -> io.BytesIO:
+    """The figure as last drawn, as savefig would write it."""
+    png = io.BytesIO()
+    mimage.imsave(png, np.asarray(figure.canvas.buffer_rgba()), format="png", dpi=figure.dpi)
+    return png
+
+
+class _Graph:
+    # The axes whose labels can take more room than those the figure was laid out for.
+    _VARYING_LABELS = ("x", "y")
+
+    def __init__(self):
+        self.figure, self.axes = _figure()
+        self._layout = None
+
+    def _lay_out(self):
+        """Lays the figure out for the data on it, as the layout to draw every graph with."""
+        self.figure.tight_layout()  # Avoids cutting off the x-labels
+        params = self.figure.subplotpars
+        self._layout = {"left": params.left, "right": params.right, "bottom": params.bottom, "top": params.top}
+
+    def _draw(self):
+        """
+        Draws the figure, laid out for this graph alone if its labels don't fit the usual layout. Most graphs' labels
+        take the room of those the figure was laid out for, so that's rare.
+        """
+        canvas = self.figure.canvas
+        self.figure.subplots_adjust(**self._layout)
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        labels = Bbox.union(
+            [getattr(self.axes, f"{axis}axis").get_tightbbox(renderer) for axis in self._VARYING_LABELS]
+        )
+        if labels.x0 < 0 or labels.y0 < 0 or labels.x1 > self.figure.bbox.x1 or labels.y1 > self.figure.bbox.y1:
+            self.figure.tight_layout()
+            canvas.draw()
+
+
+class _EloGraph(_Graph):
+    def __init__(self):
+        super().__init__()
+        self.axes.xaxis_date()
+        self.axes.xaxis.set_major_formatter(mdates.DateFormatter("%b-%d"))
+        self.axes.set_title("ELO over time", fontsize=20, color=_GREEN)
+        (self.elo_line,) = self.axes.plot([], [], color=_GREEN)
+        (self.update_line,) = self.axes.plot([], [], color="r", linestyle="--")
+        # Drawn over the rest of the figure, so left out of the axes.
+        self.legend = Legend(self.axes, [self.elo_line], ["ELO"], loc="lower center", fontsize="xx-large")
+        self.update_legend = Legend(
+            self.axes,
+            [self.elo_line, self.update_line],
+            ["ELO", "Last bot update"],
+            loc="lower center",
+            fontsize="xx-large",
+        )
+        # Only hidden now: the legend's copy of the line takes on its visibility.
+        self.update_line.set_visible(False)
+
+        # Laid out once, for typical data, rather than for every graph.
+        dates = mdates.date2num(np.arange("2020-01-01", "2020-02-01", dtype="datetime64[D]"))
+        self.elo_line.set_data(dates, np.linspace(1000, 2000, len(dates)))
+        self._autoscale()
+        self._lay_out()
+
+    def render(self, dates, elos: np.ndarray, update_date: datetime) -> tuple[io.BytesIO, io.BytesIO]:
+        """
+        The ELO graph, and the same graph with the bot's last update marked, from one drawing of the figure where the
+        update is within the dates graphed.
+        """
+        canvas = self.figure.canvas
+        dates = mdates.date2num(dates)
+        update_date = mdates.date2num(update_date)
+        self.elo_line.set_data(dates, elos)
+        self.update_line.set_data([update_date, update_date], [elos.min(), elos.max()])
+        self._autoscale()
+        self._draw()
+        background = canvas.copy_from_bbox(self.figure.bbox)
+        self.axes.draw_artist(self.legend)
+        elo_graph = _png(self.figure)
+
+        if dates.min() <= update_date <= dates.max():
+            canvas.restore_region(background)
+        else:
+            # The update widens the graph, so it has to be drawn again.
+            self.update_line.set_visible(True)
+            self._autoscale()
+            self.update_line.set_visible(False)
+            self._draw()
+        self.update_line.set_visible(True)
+        self.axes.draw_artist(self.update_line)
+        self.axes.draw_artist(self.update_legend)
+        update_graph = _png(self.figure)
+        self.update_line.set_visible(False)
+        return elo_graph, update_graph
+
+    def _autoscale(self):
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+
+
+class _WinrateGraph(_Graph):
+    # Match durations are grouped into 5 minutes up to 30 minutes and over.
+    MAX_DURATIONS = 7
+    # The figure is laid out with every duration labelled.
+    _VARYING_LABELS = ("y",)
+    _BAR_WIDTH = 0.65
+    # Stacked from the bottom up.
+    _OUTCOMES = (("Wins", "#86C232"), ("Ties", "#DFCE00"), ("Losses", "#D20044"), ("Crashes", "#AAAAAA"))
+
+    def __init__(self):
+        super().__init__()
+        self.axes.set_title("Result vs Match Duration", fontsize=20, color=_GREEN)
+        self.axes.yaxis.get_major_locator().set_params(integer=True)
+        slots = np.arange(self.MAX_DURATIONS)
+        self.bars = [
+            self.axes.bar(slots, np.zeros(self.MAX_DURATIONS), self._BAR_WIDTH, color=colour, label=label)
+            for label, colour in self._OUTCOMES
+        ]
+        self.axes.legend(loc="upper right", fontsize="xx-large")
+        effect = [path_effects.Stroke(linewidth=3, foreground="black"), path_effects.Normal()]
+        self.percentages = [
+            [
+                self.axes.text(slot, 0, "", va="center", ha="center", color="#FFFFFF", size=20, path_effects=effect)
+                for slot in slots
+            ]
+            for _ in self._OUTCOMES
+        ]
+
+        # Laid out once, for typical data, rather than for every graph.
+        self._set_data(
+            [f"{minutes} - {minutes + 5}" for minutes in range(0, 5 * self.MAX_DURATIONS, 5)],
+            np.full((len(self._OUTCOMES), self.MAX_DURATIONS), 250),
+        )
+        self._lay_out()
+
+    def render(self, durations, wins: np.ndarray, losses: np.ndarray, crashes: np.ndarray, ties: np.ndarray):
+        """The graph of each outcome's count for each match duration, in minutes."""
+        labels = [f"{duration} - {duration + 5}" for duration in durations]
+        self._set_data(labels, np.array([wins, ties, losses, crashes]))
+        self._draw()
+        return _png(self.figure)
+
+    def _set_data(self, labels, counts: np.ndarray):
+        """Counts has a row for each of _OUTCOMES, with a column for each label."""
+        shown = len(labels)
+        bottoms = np.vstack([np.zeros(shown, dtype=counts.dtype), counts.cumsum(axis=0)[:-1]])
+        totals = counts.sum(axis=0)
+        for bars, percentages, outcome_counts, outcome_bottoms in zip(self.bars, self.percentages, counts, bottoms):
+            for slot, (bar, percentage) in enumerate(zip(bars, percentages)):
+                bar.set_visible(slot < shown)
+                percentage.set_visible(slot < shown and outcome_counts[slot] > 0)
+                if slot < shown:
+                    count, bottom, total = int(outcome_counts[slot]), int(outcome_bottoms[slot]), int(totals[slot])
+                    bar.set_y(bottom)
+                    bar.set_height(count)
+                    # As bar() does, so that the y-axis is scaled as it was for a new figure.
+                    bar.sticky_edges.y[:] = [bottom]
+                    if count:
+                        percentage.set_y(bottom + count / 2)
+                        percentage.set_text(f"{round(count / total * 100)}%")
+        self.axes.set_xticks(np.arange(shown), labels)
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+
+
+class GraphRenderer:
+    """
+    Keeps a figure for each graph. A renderer draws one graph at a time, and is best got from graph_renderer(),
+    for the one kept by the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._elo_graph = _EloGraph()
+        self._winrate_graph = _WinrateGraph()
+
+    def render_elo_graphs(self, dates, elos: np.ndarray, update_date: datetime) -> tuple[io.BytesIO, io.BytesIO]:
+        """The bot's ELO over time, without and with the bot's last update marked on it."""
+        with self._lock:
+            return self._elo_graph.render(dates, elos, update_date)
+
+    def render_winrate_graph(self, durations, wins, losses, crashes, ties) -> io.BytesIO:
+        """The bot's results by match duration: the start of each duration with its counts of each outcome."""
+        with self._lock:
+            return self._winrate_graph.render(durations, wins, losses, crashes, ties)
+
+
+@cache
+def graph_renderer() -> GraphRenderer:
+    return GraphRenderer()
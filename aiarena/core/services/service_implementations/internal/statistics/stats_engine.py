@@ -0,0 +1,169 @@
+"""
+Bot stats, worked out for many bots at once: one grouped query counts the outcomes of every group of match
+participations, instead of a query per bot, opponent or map, and outcome.
+"""
+
+from contextlib import ExitStack, contextmanager
+
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+import sentry_sdk
+from django_pglocks import advisory_lock
+
+from aiarena.core.models import CompetitionParticipation, MatchParticipation
+from aiarena.core.models.competition_bot_map_stats import CompetitionBotMapStats
+from aiarena.core.models.competition_bot_matchup_stats import CompetitionBotMatchupStats
+
+
+RESULT_EXISTS = ~Q(result=None) & ~Q(result="none")
+RESULT_WIN = Q(result="win")
+RESULT_LOSS = Q(result="loss")
+RESULT_TIE = Q(result="tie")
+RESULT_CRASH = Q(
+    result="loss",
+    result_cause__in=["crash", "timeout", "initialization_failure"],
+)
+
+# The counts kept by the stats models, each with the participations it counts.
+_OUTCOMES = {
+    "match_count": RESULT_EXISTS,
+    "win_count": RESULT_WIN,
+    "loss_count": RESULT_LOSS,
+    "tie_count": RESULT_TIE,
+    "crash_count": RESULT_CRASH,
+}
+_STATS_FIELDS = [*_OUTCOMES, "win_perc", "loss_perc", "tie_perc", "crash_perc"]
+
+
+def count_outcomes(participations, *group_by) -> dict[tuple, dict]:
+    """
+    Counts the outcomes of the match participations for each distinct value of the `group_by` fields, in one query.
+    Groups without a result are left out.
+    """
+    rows = (
+        participations.order_by()
+        .values(*group_by)
+        .annotate(**{count: Count("id", filter=outcome) for count, outcome in _OUTCOMES.items()})
+    )
+    return {
+        tuple(row[field] for field in group_by): {count: row[count] for count in _OUTCOMES}
+        for row in rows
+        if row["match_count"]
+    }
+
+
+def with_percentages(counts: dict) -> dict:
+    stats = dict(counts)
+    for outcome in ("win", "loss", "tie", "crash"):
+        stats[f"{outcome}_perc"] = counts[f"{outcome}_count"] / counts["match_count"] * 100
+    return stats
+
+
+def recalculate_matchup_stats(competition_id: int, bot_ids=None):
+    """
+    Recalculates the matchup stats of the given bots in the competition, or of all of them, against every opponent
+    they've played. Takes the same per participation locks as BotStatistics, so results coming in meanwhile aren't
+    lost.
+    """
+    participation_ids, scope = _participations(competition_id, bot_ids)
+    participations = _participations_in(competition_id, bot_ids).annotate(
+        opponent_bot_id=Subquery(
+            MatchParticipation.objects.filter(match_id=OuterRef("match_id"))
+            .exclude(bot_id=OuterRef("bot_id"))
+            .values("bot_id")[:1]
+        )
+    )
+
+    with _locked(scope):
+        now = timezone.now()
+        CompetitionBotMatchupStats.objects.bulk_create(
+            [
+                CompetitionBotMatchupStats(
+                    bot_id=participation_ids[bot_id],
+                    opponent_id=participation_ids[opponent_bot_id],
+                    updated=now,
+                    **with_percentages(counts),
+                )
+                for (bot_id, opponent_bot_id), counts in count_outcomes(
+                    participations, "bot_id", "opponent_bot_id"
+                ).items()
+                # Only bots still in the competition.
+                if bot_id in participation_ids and opponent_bot_id in participation_ids
+            ],
+            update_conflicts=True,
+            unique_fields=["bot", "opponent"],
+            update_fields=[*_STATS_FIELDS, "updated"],
+        )
+
+        # Opponents that are no longer played.
+        CompetitionBotMatchupStats.objects.filter(bot_id__in=scope, updated__lt=now).delete()
+
+
+def recalculate_map_stats(competition_id: int, bot_ids=None):
+    """
+    Recalculates the map stats of the given bots in the competition, or of all of them, on every map they've played.
+    A recalculated row that differs from the one it replaces is reported to sentry: the stats kept up to date
+    result by result have drifted.
+    """
+    participation_ids, scope = _participations(competition_id, bot_ids)
+    participations = _participations_in(competition_id, bot_ids)
+
+    with _locked(scope):
+        now = timezone.now()
+        recalculated = [
+            CompetitionBotMapStats(
+                bot_id=participation_ids[bot_id],
+                map_id=map_id,
+                updated=now,
+                **with_percentages(counts),
+            )
+            for (bot_id, map_id), counts in count_outcomes(participations, "bot_id", "match__map_id").items()
+            if bot_id in participation_ids
+        ]
+
+        previous = {
+            (stats.bot_id, stats.map_id): stats for stats in CompetitionBotMapStats.objects.filter(bot_id__in=scope)
+        }
+        for stats in recalculated:
+            previous_stats = previous.get((stats.bot_id, stats.map_id))
+            if previous_stats is not None and any(
+                getattr(stats, field) != getattr(previous_stats, field) for field in _STATS_FIELDS
+            ):
+                sentry_sdk.capture_message("Recalculated bot map stats differ from previous value")
+
+        CompetitionBotMapStats.objects.bulk_create(
+            recalculated,
+            update_conflicts=True,
+            unique_fields=["bot", "map"],
+            update_fields=[*_STATS_FIELDS, "updated"],
+        )
+
+
+def _participations(competition_id, bot_ids):
+    """The competition's participation ids by bot, and those of the given bots, or of all of them, in lock order."""
+    participation_ids = dict(
+        CompetitionParticipation.objects.filter(competition_id=competition_id).values_list("bot_id", "id")
+    )
+    if bot_ids is None:
+        return participation_ids, sorted(participation_ids.values())
+    return participation_ids, sorted(participation_ids[bot_id] for bot_id in bot_ids)
+
+
+def _participations_in(competition_id, bot_ids):
+    participations = MatchParticipation.objects.filter(match__round__competition_id=competition_id)
+    if bot_ids is not None:
+        participations = participations.filter(bot_id__in=bot_ids)
+    return participations
+
+
+@contextmanager
+def _locked(participation_ids):
+    with ExitStack() as locks:
+        for participation_id in participation_ids:
+            acquired = locks.enter_context(advisory_lock(f"stats_lock_competitionparticipation_{participation_id}"))
+            if not acquired:
+                raise Exception(
+                    f"Could not acquire lock on bot statistics for competition participation {participation_id}"
+                )
+        yield
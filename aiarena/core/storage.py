@@ -1,9 +1,19 @@
+import functools
 import os
+import re
 
+from django.conf import settings
+from django.core.files import File
 from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
 
+from private_storage.storage import private_storage
 from private_storage.storage.files import PrivateFileSystemStorage
 
+from aiarena.core.utils import StreamingHash
+
 
 def overwrite_file(storage, name):
     # If the filename already exists, remove it as if it was a true file system
@@ -36,3 +46,82 @@ class OverwritePrivateStorage(PrivateFileSystemStorage):
     def get_available_name(self, name, max_length=None):
         overwrite_file(self, name)
         return name
+
+
+class ContentAddressedStorageMixin:
+    """
+    Stores each distinct file once, named after its MD5, however many times and under whatever name it's saved.
+
+    Saving a file that's already stored only counts another reference to it, and deleting one only drops a reference.
+    The counts are kept in ContentBlob. Files nothing refers to any more are removed by `sweep`.
+    """
+
+    content_addressed = True
+
+    _BLOB_NAME = re.compile(r"^blobs/[0-9a-f]{2}/(?P<md5>[0-9a-f]{32})$")
+
+    def blob_name(self, md5: str) -> str:
+        return f"blobs/{md5[:2]}/{md5}"
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        # Upload handlers hash files as they come in (see aiarena/core/upload_handlers.py).
+        md5 = getattr(content, "md5", None) or StreamingHash.of(content).md5()
+        return self.add_reference(md5, content.size, write=lambda blob_name: self._save(blob_name, content))
+
+    def add_reference(self, md5: str, size: int, write) -> str:
+        """
+        Counts a reference to the file with this MD5, calling `write` with the file's name to store it if it isn't
+        already. Returns the file's name.
+        """
+        from aiarena.core.models import ContentBlob  # avoid circular import
+
+        name = self.blob_name(md5)
+        with transaction.atomic():
+            # The lock keeps `sweep` from removing the file between here and the reference being counted.
+            _, created = ContentBlob.objects.select_for_update().get_or_create(md5hash=md5, defaults={"size": size})
+            # The file of a blob whose save was rolled back is still there to be reused.
+            if created and not self.exists(name):
+                write(name)
+            ContentBlob.objects.filter(md5hash=md5).update(references=F("references") + 1)
+        return name
+
+    def delete(self, name):
+        from aiarena.core.models import ContentBlob  # avoid circular import
+
+        match = self._BLOB_NAME.match(name)
+        if match is None:
+            # Stored before content addressing was turned on.
+            super().delete(name)
+            return
+        ContentBlob.objects.filter(md5hash=match["md5"], references__gt=0).update(references=F("references") - 1)
+
+    def sweep(self) -> int:
+        """Removes the files nothing refers to any more. Returns how many were removed."""
+        from aiarena.core.models import ContentBlob  # avoid circular import
+
+        removed = 0
+        for md5 in ContentBlob.objects.filter(references=0).values_list("md5hash", flat=True).iterator():
+            with transaction.atomic():
+                # It may have been saved again since.
+                blob = ContentBlob.objects.select_for_update(skip_locked=True).filter(md5hash=md5, references=0).first()
+                if blob is None:
+                    continue
+                super().delete(self.blob_name(md5))
+                blob.delete()
+            removed += 1
+        return removed
+
+
+@functools.cache
+def content_addressed_private_storage():
+    storage_class = import_string(settings.PRIVATE_STORAGE_CLASS)
+    return type(f"ContentAddressed{storage_class.__name__}", (ContentAddressedStorageMixin, storage_class), {})()
+
+
+def bot_file_storage():
+    """The storage for bot zips and bot data: content addressed if BOT_FILES_CONTENT_ADDRESSED is set."""
+    if settings.BOT_FILES_CONTENT_ADDRESSED:
+        return content_addressed_private_storage()
+    return private_storage
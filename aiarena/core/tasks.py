@@ -9,6 +9,7 @@ from statistics import quantiles
 from django.conf import settings
 from django.core import management
 from django.core.cache import caches
+from django.utils import timezone
 
 import boto3
 import sentry_sdk
@@ -21,8 +22,10 @@ from sentry_sdk.integrations.celery import CeleryIntegration
 from aiarena.celery import app
 from aiarena.core import traffic
 from aiarena.core.middleware import API_USAGE_KEY_PREFIX, raw_time_spent_in_queue_key
-from aiarena.core.models import ApiUsage, Competition
+from aiarena.core.models import ApiUsage, Competition, ResultProcessingStage
 from aiarena.core.services import competitions
+from aiarena.core.services.service_implementations.internal import bot_s3_etags, elo_ledger, result_processing
+from aiarena.core.storage import bot_file_storage
 from aiarena.core.utils import ReprJSONEncoder, monitoring_minute_key, sql
 from aiarena.loggers import logger
 
@@ -299,11 +302,15 @@ def traffic_monitoring():
     all belong to core/traffic, which knows nothing about where the numbers end
     up. This decides the wire format and nothing else.
 
+    The per-endpoint database metrics ship alongside, under an Endpoint
+    dimension instead of a TrafficClass one.
+
     Buckets are discarded only after the whole batch is accepted. If a send
     raises, they stay in Redis and the next run picks them up again -- which is
     the same backfill path a missed run takes.
     """
     buckets = traffic.drain()
+    endpoint_buckets = traffic.drain_endpoints()
 
     metric_data = [
         {
@@ -315,6 +322,16 @@ def traffic_monitoring():
         }
         for bucket in buckets
         for traffic_class, count in bucket.counts.items()
+    ] + [
+        {
+            "MetricName": bucket.metric.cloudwatch_name,
+            "Dimensions": [{"Name": "Endpoint", "Value": endpoint}],
+            "Value": count,
+            "Unit": bucket.metric.unit,
+            "Timestamp": bucket.timestamp,
+        }
+        for bucket in endpoint_buckets
+        for endpoint, count in bucket.counts.items()
     ]
 
     for start in range(0, len(metric_data), _CLOUDWATCH_MAX_DATAPOINTS):
@@ -323,7 +340,7 @@ def traffic_monitoring():
             MetricData=metric_data[start : start + _CLOUDWATCH_MAX_DATAPOINTS],
         )
 
-    traffic.discard(buckets)
+    traffic.discard([*buckets, *endpoint_buckets])
 
 
 @app.task(ignore_result=True)
@@ -438,6 +455,57 @@ def timeout_overtime_matches():
     management.call_command("timeoutovertimematches")
 
 
+@app.task(bind=True, ignore_result=True, max_retries=5)
+def process_result_stage(self, result_id: int, stage: str):
+    try:
+        result_processing.run_stage(result_id, stage)
+    except Exception as exc:
+        final = self.request.retries >= self.max_retries
+        result_processing.record_failure(result_id, stage, exc, final)
+        if final:
+            # The stage is left marked failed, to be retried from the admin once whatever's wrong is fixed.
+            sentry_sdk.capture_exception(exc)
+            return
+        raise self.retry(exc=exc, countdown=2**self.request.retries * 10)
+
+
+@app.task(ignore_result=True)
+def reconcile_elo_ledgers():
+    elo_ledger.reconcile_unclosed()
+
+
+S3_ETAG_VERIFICATION_BATCH_SIZE = 200
+
+
+@app.task(ignore_result=True)
+def verify_bot_s3_etags():
+    bot_s3_etags.verify_stalest(S3_ETAG_VERIFICATION_BATCH_SIZE)
+
+
+@app.task(ignore_result=True)
+def sweep_content_blobs():
+    """Removes bot files that content addressed storage no longer has any references to."""
+    storage = bot_file_storage()
+    if getattr(storage, "content_addressed", False):
+        removed = storage.sweep()
+        if removed:
+            logger.info(f"Swept {removed} unreferenced content blobs.")
+
+
+RESULT_STAGE_STALE_AFTER = datetime.timedelta(minutes=15)
+
+
+@app.task(ignore_result=True)
+def requeue_stale_result_stages():
+    """Stages whose task was lost, e.g. to a broker outage or a worker restart, are still pending. Queue them again."""
+    stale = ResultProcessingStage.objects.filter(
+        status=ResultProcessingStage.PENDING, updated__lt=timezone.now() - RESULT_STAGE_STALE_AFTER
+    )
+    count = result_processing.retry(stale)
+    if count:
+        logger.warning(f"Requeued {count} stale result processing stages")
+
+
 @app.task(ignore_result=True)
 def kill_slow_queries(timeout=settings.SQL_TIME_LIMIT):
     db_name = settings.DATABASES["default"]["NAME"]
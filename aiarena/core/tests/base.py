@@ -45,6 +45,8 @@ class GraphQLTest:
     # stored django test client for the last performed query, makes it possible
     # to check request/response attributes (like auth session)
     last_query_client = None
+    # and the response to it, e.g. to check its query budget
+    last_response = None
 
     def mutate(
         self,
@@ -92,7 +94,7 @@ class GraphQLTest:
 
         self.last_query_client = self.client(login_user)
 
-        response = self.do_post(self.last_query_client, query, variables, **kwargs)
+        response = self.last_response = self.do_post(self.last_query_client, query, variables, **kwargs)
 
         assert response.status_code == expected_status, (
             f"Unexpected response status code: {response.status_code}\nResponse content: {response.content}"
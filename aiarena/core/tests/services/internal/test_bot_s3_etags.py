@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pytest
+
+from aiarena.api.arenaclient.v3.serializers import V3BotSerializer
+from aiarena.core.models import Bot
+from aiarena.core.services.service_implementations.internal import bot_s3_etags
+
+
+@pytest.fixture
+def s3(bot):
+    """Pretends the bot files are on S3, with `etags` being what S3 says their ETags are."""
+    etags = {}
+    with (
+        mock.patch.object(bot_s3_etags, "is_s3_file", return_value=True),
+        mock.patch.object(
+            bot_s3_etags, "obtain_s3_filehash_or_default", side_effect=lambda file, default: etags[file.name]
+        ),
+    ):
+        yield etags
+
+
+def test_etags_are_worked_out_on_upload(bot):
+    assert bot.bot_zip_s3_etag == bot.bot_zip_md5hash
+    assert bot.s3_etags_verified is None
+
+
+def test_verifying_corrects_wrong_etags(bot, s3):
+    s3[bot.bot_zip.name] = "0" * 32 + "-1"
+
+    assert bot_s3_etags.verify_stalest(10) == 1
+
+    bot.refresh_from_db()
+    assert bot.bot_zip_s3_etag == "0" * 32 + "-1"
+    assert bot.s3_etags_verified is not None
+
+
+def test_verifying_leaves_a_bot_changed_meanwhile_alone(bot, s3):
+    stale = Bot.objects.get(id=bot.id)
+    s3[stale.bot_zip.name] = "0" * 32
+    Bot.objects.filter(id=bot.id).update(bot_zip="bots/elsewhere/bot_zip")
+
+    bot_s3_etags.verify([stale])
+
+    bot.refresh_from_db()
+    assert bot.bot_zip_s3_etag == bot.bot_zip_md5hash
+    assert bot.s3_etags_verified is None
+
+
+def test_the_v3_serializer_uses_cached_etags(bot):
+    with (
+        mock.patch("aiarena.core.utils.is_s3_file", return_value=True),
+        mock.patch("aiarena.core.utils.obtain_s3_filehash_or_default") as head_request,
+    ):
+        assert V3BotSerializer().get_bot_zip_md5hash(bot) == bot.bot_zip_s3_etag
+
+    head_request.assert_not_called()
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.test import TestCase
+
+import fakeredis
+from constance.test import override_config
+
+from aiarena.core.models import Competition, CompetitionParticipation, Game, GameMode, User
+from aiarena.core.models.bot_race import BotRace
+from aiarena.core.services.service_implementations.internal import competition_priority
+from aiarena.core.tests.testing_utils import create_bot_for_competition
+
+
+@override_config(COMPETITION_PRIORITY_COUNTERS_ENABLED=True)
+class CompetitionPriorityTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = mock.patch.object(competition_priority, "celery_redis", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create(username="testuser", email="test@test.com")
+        game = Game.objects.create(name="testgame")
+        self.game_mode = GameMode.objects.create(name="testgamemode", game=game)
+        BotRace.create_all_races()
+        self.bot_race = BotRace.objects.first()
+
+        # The big competition has three times the participants of the small one.
+        self.big = self._create_competition("big", participants=3)
+        self.small = self._create_competition("small", participants=1)
+
+    def _create_competition(self, name, participants):
+        competition = Competition.objects.create(name=name, game_mode=self.game_mode)
+        competition.playable_races.add(self.bot_race)
+        competition.open()
+        for i in range(participants):
+            create_bot_for_competition(
+                competition=competition,
+                for_user=self.user,
+                bot_name=f"{name}{i}",
+                bot_type="python",
+                bot_race=self.bot_race,
+            )
+        return competition
+
+    def _get_order(self):
+        order = competition_priority.get_order()
+        if order is None:  # the first read builds the counters
+            order = competition_priority.get_order()
+        return order
+
+    def _record_match_started(self, competition, times=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(times):
+                competition_priority.record_match_started(competition.id)
+
+    def test_counters_are_built_on_first_read(self):
+        self.assertIsNone(competition_priority.get_order())
+        self.assertEqual(competition_priority.get_order(), [self.big.id, self.small.id])
+
+    def test_order_follows_recent_matches(self):
+        self._get_order()
+
+        # 3 of 4 recent matches is the big competition's fair share...
+        self._record_match_started(self.big, times=3)
+        self._record_match_started(self.small)
+        self.assertEqual(self._get_order(), [self.big.id, self.small.id])  # ties go to the lowest id
+
+        # ...and one more puts it ahead.
+        self._record_match_started(self.big)
+        self.assertEqual(self._get_order(), [self.small.id, self.big.id])
+
+    def test_only_the_most_recent_matches_count(self):
+        self._get_order()
+        self._record_match_started(self.small, times=competition_priority.RECENT_MATCHES)
+        self._record_match_started(self.big, times=competition_priority.RECENT_MATCHES)
+
+        self.assertEqual(self._get_order(), [self.small.id, self.big.id])
+
+    def test_deactivation_is_counted(self):
+        self._get_order()
+        self._record_match_started(self.big, times=2)
+        self._record_match_started(self.small)
+        self.assertEqual(self._get_order(), [self.big.id, self.small.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for participation in CompetitionParticipation.objects.filter(competition=self.big)[:2]:
+                participation.active = False
+                participation.save()
+
+        self.assertEqual(self._get_order(), [self.small.id, self.big.id])
+
+    def test_competitions_leave_the_order_when_frozen(self):
+        self._get_order()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.big.freeze()
+
+        self.assertEqual(self._get_order(), [self.small.id])
+
+    @override_config(COMPETITION_PRIORITY_COUNTERS_ENABLED=False)
+    def test_disabled_counters_are_left_alone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.big.freeze()
+            competition_priority.record_match_started(self.small.id)
+
+        self.assertEqual(self.redis.keys(), [])
@@ -0,0 +1,45 @@
+from aiarena.core.models import Competition, CompetitionEloLedger, CompetitionParticipation
+from aiarena.core.services.service_implementations.internal import elo_ledger
+
+
+def test_no_ledger_until_reconciled(competition, bot):
+    CompetitionParticipation.objects.create(competition=competition, bot=bot)
+
+    assert elo_ledger.is_balanced(competition.id) is None
+    assert elo_ledger.reconcile(Competition.objects.filter(id=competition.id)) == 0
+    assert elo_ledger.is_balanced(competition.id) is True
+
+
+def test_joining_and_leaving_are_recorded(competition, bot, other_bot, settings):
+    elo_ledger.reconcile(Competition.objects.filter(id=competition.id))
+
+    participation = CompetitionParticipation.objects.create(competition=competition, bot=bot)
+    CompetitionParticipation.objects.create(competition=competition, bot=other_bot)
+    ledger = CompetitionEloLedger.objects.get(competition=competition)
+    assert (ledger.elo_sum, ledger.participant_count) == (2 * settings.ELO_START_VALUE, 2)
+
+    participation.delete()
+    ledger.refresh_from_db()
+    assert (ledger.elo_sum, ledger.participant_count) == (settings.ELO_START_VALUE, 1)
+    assert elo_ledger.is_balanced(competition.id) is True
+
+
+def test_an_unrecorded_change_is_found_by_reconciling(competition, bot, other_bot):
+    participation = CompetitionParticipation.objects.create(competition=competition, bot=bot)
+    CompetitionParticipation.objects.create(competition=competition, bot=other_bot)
+    elo_ledger.reconcile(Competition.objects.filter(id=competition.id))
+
+    CompetitionParticipation.objects.filter(id=participation.id).update(elo=participation.elo + 10)
+    assert elo_ledger.is_balanced(competition.id) is True
+
+    assert elo_ledger.reconcile(Competition.objects.filter(id=competition.id)) == 1
+    assert elo_ledger.is_balanced(competition.id) is False
+
+
+def test_a_recorded_imbalance_fails_the_check(competition, bot):
+    CompetitionParticipation.objects.create(competition=competition, bot=bot)
+    elo_ledger.reconcile(Competition.objects.filter(id=competition.id))
+
+    elo_ledger.record(competition.id, 5)
+
+    assert elo_ledger.is_balanced(competition.id) is False
@@ -0,0 +1,62 @@
+from datetime import UTC, datetime, timedelta
+
+import matplotlib.image as mimage
+import numpy as np
+
+from aiarena.core.services.service_implementations.internal.statistics.graph_renderer import (
+    GraphRenderer,
+    graph_renderer,
+)
+
+
+_START = datetime(2024, 3, 1, tzinfo=UTC)
+
+
+def _elo_data(days, elo=1600):
+    dates = [_START + timedelta(days=day) for day in range(days)]
+    elos = np.array([elo + 10 * (-1) ** day * day for day in range(days)])
+    return dates, elos
+
+
+def _size(png):
+    png.seek(0)
+    height, width, _channels = mimage.imread(png, format="png").shape
+    return width, height
+
+
+def test_elo_graphs():
+    dates, elos = _elo_data(30)
+
+    elo_graph, update_graph = graph_renderer().render_elo_graphs(dates, elos, _START + timedelta(days=10))
+
+    assert _size(elo_graph) == _size(update_graph) == (1200, 900)
+    assert elo_graph.getvalue() != update_graph.getvalue()
+
+
+def test_an_update_after_the_last_result_widens_only_its_graph():
+    dates, elos = _elo_data(30)
+    renderer = GraphRenderer()
+
+    elo_graph, _ = renderer.render_elo_graphs(dates, elos, _START + timedelta(days=10))
+    later_elo_graph, later_update_graph = renderer.render_elo_graphs(dates, elos, _START + timedelta(days=60))
+
+    assert later_elo_graph.getvalue() == elo_graph.getvalue()
+    assert later_update_graph.getvalue() != later_elo_graph.getvalue()
+
+
+def test_a_kept_renderer_draws_the_same_graphs_as_a_new_one():
+    dates, elos = _elo_data(20)
+    durations, counts = [0, 5, 10], [np.array([3, 1, 0]), np.array([2, 0, 1]), np.array([0, 1, 0]), np.array([1, 0, 0])]
+
+    # Leave the kept renderer's figures with other data on them, and more durations, with labels too wide for the
+    # usual layout.
+    graph_renderer().render_elo_graphs(*_elo_data(90, elo=2100), _START)
+    graph_renderer().render_winrate_graph(list(range(0, 35, 5)), *(np.full(7, 40_000) for _ in range(4)))
+
+    assert [graph.getvalue() for graph in graph_renderer().render_elo_graphs(dates, elos, _START)] == [
+        graph.getvalue() for graph in GraphRenderer().render_elo_graphs(dates, elos, _START)
+    ]
+    assert (
+        graph_renderer().render_winrate_graph(durations, *counts).getvalue()
+        == GraphRenderer().render_winrate_graph(durations, *counts).getvalue()
+    )
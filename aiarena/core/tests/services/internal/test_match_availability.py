@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import TestCase
+
+import fakeredis
+
+from aiarena.core.services.service_implementations.internal import match_availability
+
+
+class MatchAvailabilityTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(match_availability, "celery_redis", fakeredis.FakeStrictRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_announcement_wakes_waiter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            match_availability.announce()
+
+        self.assertTrue(match_availability.wait(timeout=1))
+
+    def test_wait_times_out_without_announcement(self):
+        self.assertFalse(match_availability.wait(timeout=0.1))
+
+    def test_announcement_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            match_availability.announce()
+
+        self.assertFalse(match_availability.wait(timeout=0.1))
+        callbacks[0]()
+        self.assertTrue(match_availability.wait(timeout=1))
+
+    def test_announcement_wakes_one_waiter_per_match(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            match_availability.announce(2)
+
+        self.assertTrue(match_availability.wait(timeout=1))
+        self.assertTrue(match_availability.wait(timeout=1))
+        self.assertFalse(match_availability.wait(timeout=0.1))
+
+    def test_unclaimed_announcements_are_capped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            match_availability.announce(match_availability.MAX_TOKENS + 10)
+            match_availability.announce(10)
+
+        self.assertEqual(
+            match_availability.celery_redis.llen(match_availability.MATCHES_AVAILABLE_KEY),
+            match_availability.MAX_TOKENS,
+        )
+
+    def test_nothing_to_announce(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            match_availability.announce(0)
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(match_availability.wait(timeout=0.1))
+
+    def test_no_wait_left(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            match_availability.announce()
+
+        self.assertFalse(match_availability.wait(timeout=0))
@@ -1,4 +1,8 @@
-from django.test import TestCase
+import threading
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from aiarena.core.models import ArenaClient, Bot, Competition, Game, GameMode, Map, Match, MatchParticipation, User
@@ -394,3 +398,150 @@ class LadderMatchStarterTests(TestCase):
         p2 = match.participant2
         p2.update_bot_data = update_bot_data_for_participant2
         p2.save()
+
+
+class StartFirstMatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="testemail")
+        self.arenaclient = ArenaClient.objects.create(trusted=True, owner=self.user)
+        game = Game.objects.create(name="testgame")
+        game_mode = GameMode.objects.create(name="testgamemode", game=game)
+        BotRace.create_all_races()
+        bot_race = BotRace.objects.first()
+        competition = Competition.objects.create(name="testcompetition", game_mode=game_mode)
+        competition.playable_races.add(bot_race)
+        competition.open()
+        self.map = Map.objects.create(name="testmap", game_mode=game_mode)
+        self.bots = [
+            create_bot_for_competition(
+                competition=competition,
+                for_user=self.user,
+                bot_name=f"testbot{i}",
+                bot_type="python",
+                bot_race=bot_race,
+            )
+            for i in range(6)
+        ]
+
+    def create_test_match(self, bot1, bot2, require_trusted_arenaclient=False):
+        match = Match.objects.create(map=self.map, require_trusted_arenaclient=require_trusted_arenaclient)
+        MatchParticipation.objects.create(match=match, participant_number=1, bot=bot1)
+        MatchParticipation.objects.create(match=match, participant_number=2, bot=bot2)
+        return match
+
+    def test_first_startable_match_is_started(self):
+        self.assertTrue(MatchStarter.start(self.create_test_match(self.bots[0], self.bots[1]), self.arenaclient))
+        busy = self.create_test_match(self.bots[1], self.bots[2])
+        startable = self.create_test_match(self.bots[3], self.bots[4])
+
+        started = MatchStarter.start_first([busy, startable], self.arenaclient)
+
+        self.assertEqual(started, startable)
+        self.assertIsNotNone(Match.objects.get(id=startable.id).started)
+        self.assertIsNone(Match.objects.get(id=busy.id).started)
+
+    def test_matches_requiring_trust_are_passed_over_by_untrusted_arenaclients(self):
+        self.arenaclient.trusted = False
+        Bot.objects.update(bot_zip_publicly_downloadable=True, bot_data_publicly_downloadable=True)
+        trusted_only = self.create_test_match(self.bots[0], self.bots[1], require_trusted_arenaclient=True)
+        private_bot = self.create_test_match(self.bots[2], self.bots[3])
+        Bot.objects.filter(id=self.bots[3].id).update(bot_data_publicly_downloadable=False)
+        public = self.create_test_match(self.bots[4], self.bots[5])
+
+        self.assertEqual(MatchStarter.start_first([trusted_only, private_bot, public], self.arenaclient), public)
+
+    def test_none_is_started_when_none_can_start(self):
+        self.assertTrue(MatchStarter.start(self.create_test_match(self.bots[0], self.bots[1]), self.arenaclient))
+        candidates = [self.create_test_match(self.bots[0], bot) for bot in self.bots[2:]]
+
+        self.assertIsNone(MatchStarter.start_first(candidates, self.arenaclient))
+
+    def test_unstartable_candidates_cost_no_queries_each(self):
+        self.assertTrue(MatchStarter.start(self.create_test_match(self.bots[0], self.bots[1]), self.arenaclient))
+        few = [self.create_test_match(self.bots[0], self.bots[2])]
+        many = [self.create_test_match(self.bots[0], bot) for bot in self.bots[2:]]
+
+        with CaptureQueriesContext(connection) as few_queries:
+            MatchStarter.start_first(few, self.arenaclient)
+        with CaptureQueriesContext(connection) as many_queries:
+            MatchStarter.start_first(many, self.arenaclient)
+
+        self.assertEqual(len(many_queries), len(few_queries))
+
+
+class SkipLockedMatchStarterTests(TransactionTestCase):
+    """Starting matches with skip_locked while another arena client holds locks from starting one."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="testemail")
+        self.arenaclient = ArenaClient.objects.create(trusted=True, owner=self.user)
+        game = Game.objects.create(name="testgame")
+        game_mode = GameMode.objects.create(name="testgamemode", game=game)
+        BotRace.create_all_races()
+        bot_race = BotRace.objects.first()
+        competition = Competition.objects.create(name="testcompetition", game_mode=game_mode)
+        competition.playable_races.add(bot_race)
+        competition.open()
+        self.map = Map.objects.create(name="testmap", game_mode=game_mode)
+        self.bots = [
+            create_bot_for_competition(
+                competition=competition,
+                for_user=self.user,
+                bot_name=f"testbot{i}",
+                bot_type="python",
+                bot_race=bot_race,
+            )
+            for i in range(4)
+        ]
+
+    def create_test_match(self, bot1, bot2):
+        match = Match.objects.create(map=self.map, require_trusted_arenaclient=True)
+        MatchParticipation.objects.create(match=match, participant_number=1, bot=bot1)
+        MatchParticipation.objects.create(match=match, participant_number=2, bot=bot2)
+        return match
+
+    def hold_started_match(self, match):
+        """Start `match` in another thread, which keeps its transaction open until the returned event is set."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def run():
+            try:
+                with transaction.atomic():
+                    assert MatchStarter.start(match, self.arenaclient, skip_locked=True)
+                    started.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        self.assertTrue(started.wait(timeout=10))
+        return release
+
+    def start(self, match):
+        with transaction.atomic():
+            # Fail rather than hang if a lock is waited on after all.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '2s'")
+            return MatchStarter.start(Match.objects.get(id=match.id), self.arenaclient, skip_locked=True)
+
+    def test_match_being_started_elsewhere_is_skipped(self):
+        match = self.create_test_match(self.bots[0], self.bots[1])
+        self.hold_started_match(match)
+
+        self.assertFalse(self.start(match))
+
+    def test_match_sharing_a_bot_with_one_being_started_elsewhere_is_skipped(self):
+        self.hold_started_match(self.create_test_match(self.bots[0], self.bots[1]))
+
+        self.assertFalse(self.start(self.create_test_match(self.bots[1], self.bots[2])))
+
+    def test_unrelated_match_starts_without_waiting(self):
+        self.hold_started_match(self.create_test_match(self.bots[0], self.bots[1]))
+
+        match = self.create_test_match(self.bots[2], self.bots[3])
+        self.assertTrue(self.start(match))
+        self.assertIsNotNone(Match.objects.get(id=match.id).started)
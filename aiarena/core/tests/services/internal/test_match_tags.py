@@ -0,0 +1,60 @@
+import pytest
+
+from aiarena.core.models import Match, MatchTag, Tag
+from aiarena.core.services.service_implementations.internal import match_tags
+
+
+def tags_of(match, user):
+    return sorted(match.tags.filter(user=user).values_list("tag__name", flat=True))
+
+
+@pytest.fixture
+def match(map):
+    return Match.objects.create(map=map)
+
+
+def test_replaces_only_the_given_users_tags(match, user, other_user):
+    match_tags.set_tags(match, {user.id: ["old", "kept"], other_user.id: ["theirs"]})
+
+    match_tags.set_tags(match, {user.id: ["kept", "new"]})
+
+    assert tags_of(match, user) == ["kept", "new"]
+    assert tags_of(match, other_user) == ["theirs"]
+
+
+def test_reuses_existing_tags(match, map, user, other_user):
+    other_match = Match.objects.create(map=map)
+    match_tags.set_tags(other_match, {user.id: ["shared"]})
+
+    match_tags.set_tags(match, {user.id: ["shared"], other_user.id: ["shared"]})
+
+    assert Tag.objects.filter(name="shared").count() == 1
+    assert MatchTag.objects.filter(tag__name="shared").count() == 2
+
+
+def test_orphans_are_deleted(match, map, user):
+    other_match = Match.objects.create(map=map)
+    match_tags.set_tags(match, {user.id: ["orphaned", "shared"]})
+    match_tags.set_tags(other_match, {user.id: ["shared"]})
+
+    match_tags.set_tags(match, {user.id: []})
+
+    assert tags_of(match, user) == []
+    assert not Tag.objects.filter(name="orphaned").exists()
+    assert not MatchTag.objects.filter(tag__name="orphaned").exists()
+    assert tags_of(other_match, user) == ["shared"]
+
+
+def test_query_count_does_not_grow_with_tags(match, user, django_assert_num_queries):
+    with django_assert_num_queries(6):
+        match_tags.set_tags(match, {user.id: ["a"]})
+    with django_assert_num_queries(6):
+        match_tags.set_tags(match, {user.id: ["a", *(f"tag{i}" for i in range(20))]})
+    # Replacing them also deletes the replaced ones, all of which are orphaned.
+    with django_assert_num_queries(9):
+        match_tags.set_tags(match, {user.id: ["b"]})
+    with django_assert_num_queries(9):
+        match_tags.set_tags(match, {user.id: [f"new{i}" for i in range(20)]})
+
+    assert tags_of(match, user) == sorted(f"new{i}" for i in range(20))
+    assert set(Tag.objects.values_list("name", flat=True)) == {f"new{i}" for i in range(20)}
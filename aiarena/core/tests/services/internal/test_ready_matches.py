@@ -0,0 +1,147 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+import fakeredis
+from constance.test import override_config
+
+from aiarena.core.models import ArenaClient, Competition, Game, GameMode, Map, Match, Result, User
+from aiarena.core.models.bot_race import BotRace
+from aiarena.core.services.service_implementations._bots import BotsImpl
+from aiarena.core.services.service_implementations._competitions import Competitions
+from aiarena.core.services.service_implementations._matches import Matches
+from aiarena.core.services.service_implementations.internal import ready_matches
+from aiarena.core.services.service_implementations.internal.matches import cancel
+from aiarena.core.tests.testing_utils import create_bot_for_competition
+
+
+class ReadyMatchScoreTests(TestCase):
+    def test_earlier_rounds_go_first(self):
+        now = timezone.now()
+        self.assertLess(ready_matches.score(1, 0, now), ready_matches.score(2, 2, None))
+
+    def test_data_enabled_bots_go_first(self):
+        now = timezone.now()
+        self.assertLess(ready_matches.score(1, 2, now), ready_matches.score(1, 1, None))
+        self.assertLess(ready_matches.score(1, 1, now), ready_matches.score(1, 0, None))
+
+    def test_longest_waiting_bots_go_first(self):
+        now = timezone.now()
+        self.assertLess(ready_matches.score(1, 0, None), ready_matches.score(1, 0, now - timedelta(hours=1)))
+        self.assertLess(ready_matches.score(1, 0, now - timedelta(hours=1)), ready_matches.score(1, 0, now))
+
+    def test_restamp_keeps_priority(self):
+        now = timezone.now()
+        restamped = ready_matches._restamp(ready_matches.score(1, 2, None), now)
+        self.assertEqual(restamped, ready_matches.score(1, 2, now))
+        self.assertLess(restamped, ready_matches.score(1, 1, None))
+
+
+@override_config(READY_MATCH_QUEUE_ENABLED=True)
+class ReadyMatchQueueTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = mock.patch.object(ready_matches, "celery_redis", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create(username="testuser", email="test@test.com")
+        self.arenaclient = ArenaClient.objects.create(trusted=True, owner=self.user)
+        game = Game.objects.create(name="testgame")
+        game_mode = GameMode.objects.create(name="testgamemode", game=game)
+        BotRace.create_all_races()
+        bot_race = BotRace.objects.first()
+        self.competition = Competition.objects.create(name="testcompetition", game_mode=game_mode)
+        self.competition.playable_races.add(bot_race)
+        self.competition.open()
+        match_map = Map.objects.create(name="testmap", game_mode=game_mode)
+        match_map.competitions.add(self.competition)
+
+        for i in range(4):
+            create_bot_for_competition(
+                competition=self.competition,
+                for_user=self.user,
+                bot_name=f"testbot{i}",
+                bot_type="python",
+                bot_race=bot_race,
+            )
+
+        self.matches_service = Matches(BotsImpl(), Competitions())
+
+    def _start_next_match(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.matches_service.start_next_match_for_competition(self.arenaclient, self.competition)
+
+    def _queued_match_ids(self):
+        return [int(match_id) for match_id in self.redis.zrange(ready_matches._queue_key(self.competition.id), 0, -1)]
+
+    def test_new_round_is_queued_minus_the_started_match(self):
+        started = self._start_next_match()
+
+        unstarted_ids = set(Match.objects.filter(started__isnull=True).values_list("id", flat=True))
+        self.assertEqual(len(unstarted_ids), 5)  # 4 bots -> 6 matches in the round, 1 started
+        self.assertEqual(set(self._queued_match_ids()), unstarted_ids)
+        self.assertNotIn(started.id, self._queued_match_ids())
+
+    def test_next_match_comes_from_the_queue(self):
+        first = self._start_next_match()
+        queued_before = self._queued_match_ids()
+
+        second = self._start_next_match()
+
+        self.assertIn(second.id, queued_before)
+        self.assertNotIn(second.id, self._queued_match_ids())
+        # Its bots are both busy with a match now, so it can't share either bot with the first.
+        first_bots = set(first.matchparticipation_set.values_list("bot_id", flat=True))
+        self.assertFalse(first_bots & set(second.matchparticipation_set.values_list("bot_id", flat=True)))
+
+    def test_bots_that_just_played_move_to_the_back(self):
+        first = self._start_next_match()
+        first_bots = set(first.matchparticipation_set.values_list("bot_id", flat=True))
+
+        queued = Match.objects.in_bulk(self._queued_match_ids())
+        back = self._queued_match_ids()[-1]
+        self.assertTrue(first_bots & set(queued[back].matchparticipation_set.values_list("bot_id", flat=True)))
+        front = self._queued_match_ids()[0]
+        self.assertFalse(first_bots & set(queued[front].matchparticipation_set.values_list("bot_id", flat=True)))
+
+    def test_cancelled_match_is_removed(self):
+        self._start_next_match()
+        match_id = self._queued_match_ids()[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel(match_id, self.user)
+
+        self.assertNotIn(match_id, self._queued_match_ids())
+
+    def test_lost_queue_is_rebuilt_from_the_database(self):
+        self._start_next_match()
+        self.redis.flushall()
+
+        started = self._start_next_match()
+
+        unstarted_ids = set(Match.objects.filter(started__isnull=True).values_list("id", flat=True))
+        self.assertEqual(len(unstarted_ids), 4)
+        self.assertEqual(set(self._queued_match_ids()), unstarted_ids)
+        self.assertNotIn(started.id, self._queued_match_ids())
+
+    def test_stale_entries_are_skipped_and_dropped(self):
+        self._start_next_match()
+        # One of the first match's bots is in it, so it isn't the match that gets started next anyway. It's been
+        # played behind the queue's back, so it doesn't keep its bots busy.
+        stale_id = self._queued_match_ids()[-1]
+        Match.objects.filter(id=stale_id).update(
+            started=timezone.now(), result=Result.objects.create(type="MatchCancelled", game_steps=0)
+        )
+
+        started = self._start_next_match()
+
+        self.assertNotEqual(started.id, stale_id)
+        self.assertNotIn(stale_id, self._queued_match_ids())
+
+    @override_config(READY_MATCH_QUEUE_ENABLED=False)
+    def test_disabled_queue_is_left_alone(self):
+        self.assertIsNotNone(self._start_next_match())
+        self.assertEqual(self.redis.keys(), [])
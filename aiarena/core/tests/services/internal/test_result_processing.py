@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from constance.test import override_config
+
+from aiarena.api.arenaclient.common.result_submission_handler import handle_result_submission
+from aiarena.core import tasks
+from aiarena.core.models import (
+    ArenaClient,
+    Competition,
+    CompetitionParticipation,
+    Game,
+    GameMode,
+    Map,
+    ResultProcessingStage,
+    Round,
+    User,
+)
+from aiarena.core.models.bot_race import BotRace
+from aiarena.core.services import bot_statistics
+from aiarena.core.services.service_implementations._bots import BotsImpl
+from aiarena.core.services.service_implementations._competitions import Competitions
+from aiarena.core.services.service_implementations._matches import Matches
+from aiarena.core.services.service_implementations.internal import result_processing
+from aiarena.core.tests.testing_utils import create_bot_for_competition
+
+
+class ResultProcessingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@test.com")
+        self.arenaclient = ArenaClient.objects.create(trusted=True, owner=self.user)
+        game = Game.objects.create(name="testgame")
+        game_mode = GameMode.objects.create(name="testgamemode", game=game)
+        BotRace.create_all_races()
+        bot_race = BotRace.objects.first()
+        self.competition = Competition.objects.create(name="testcompetition", game_mode=game_mode)
+        self.competition.playable_races.add(bot_race)
+        self.competition.open()
+        Map.objects.create(name="testmap", game_mode=game_mode).competitions.add(self.competition)
+        for i in range(2):
+            create_bot_for_competition(
+                competition=self.competition,
+                for_user=self.user,
+                bot_name=f"testbot{i}",
+                bot_type="python",
+                bot_race=bot_race,
+            )
+
+    def _submit_a_result(self):
+        match = Matches(BotsImpl(), Competitions()).start_next_match_for_competition(self.arenaclient, self.competition)
+        return handle_result_submission(
+            match.id,
+            {
+                "type": "Player1Win",
+                "replay_file": SimpleUploadedFile("test.SC2Replay", b"test"),
+                "game_steps": 1000,
+                "submitted_by": self.arenaclient,
+            },
+        )
+
+    def _match_counts(self):
+        return list(
+            CompetitionParticipation.objects.filter(competition=self.competition)
+            .order_by("id")
+            .values_list("match_count", flat=True)
+        )
+
+    def test_stages_run_inline_by_default(self):
+        result = self._submit_a_result()
+
+        self.assertEqual(self._match_counts(), [1, 1])
+        self.assertFalse(ResultProcessingStage.objects.filter(result=result).exists())
+        self.assertTrue(Round.objects.get(id=result.match.round_id).complete)
+
+    @override_config(ASYNC_RESULT_PROCESSING_ENABLED=True)
+    def test_stages_are_queued_once_the_result_is_committed(self):
+        with mock.patch.object(tasks.process_result_stage, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = self._submit_a_result()
+                delay.assert_not_called()
+
+        self.assertEqual(self._match_counts(), [0, 0])
+        self.assertEqual(
+            sorted(ResultProcessingStage.objects.filter(result=result).values_list("stage", "status")),
+            sorted((stage, ResultProcessingStage.PENDING) for stage, _ in ResultProcessingStage.STAGES),
+        )
+        self.assertCountEqual(
+            [call.args for call in delay.call_args_list],
+            [(result.id, stage) for stage, _ in ResultProcessingStage.STAGES],
+        )
+        # ELO is still adjusted before the AC is answered.
+        self.assertGreater(result.match.matchparticipation_set.get(participant_number=1).elo_change, 0)
+
+    @override_config(ASYNC_RESULT_PROCESSING_ENABLED=True)
+    def test_a_stage_run_twice_does_its_work_once(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            result = self._submit_a_result()
+
+        result_processing.run_stage(result.id, ResultProcessingStage.BOT_STATISTICS)
+        result_processing.run_stage(result.id, ResultProcessingStage.BOT_STATISTICS)
+
+        self.assertEqual(self._match_counts(), [1, 1])
+        stage = ResultProcessingStage.objects.get(result=result, stage=ResultProcessingStage.BOT_STATISTICS)
+        self.assertEqual(stage.status, ResultProcessingStage.DONE)
+        self.assertEqual(stage.attempts, 1)
+
+    @override_config(ASYNC_RESULT_PROCESSING_ENABLED=True)
+    def test_a_stage_that_keeps_failing_is_marked_failed(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            result = self._submit_a_result()
+
+        with mock.patch.object(bot_statistics, "update_stats_based_on_result", side_effect=Exception("broken")):
+            tasks.process_result_stage.apply(args=(result.id, ResultProcessingStage.BOT_STATISTICS))
+
+        stage = ResultProcessingStage.objects.get(result=result, stage=ResultProcessingStage.BOT_STATISTICS)
+        self.assertEqual(stage.status, ResultProcessingStage.FAILED)
+        self.assertIn("broken", stage.error)
+        self.assertEqual(self._match_counts(), [0, 0])
+
+        with mock.patch.object(tasks.process_result_stage, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(result_processing.retry(ResultProcessingStage.objects.filter(id=stage.id)), 1)
+        delay.assert_called_once_with(result.id, ResultProcessingStage.BOT_STATISTICS)
+        stage.refresh_from_db()
+        self.assertEqual(stage.status, ResultProcessingStage.PENDING)
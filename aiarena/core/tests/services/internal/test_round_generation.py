@@ -0,0 +1,69 @@
+import itertools
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from aiarena.core.models import Competition, CompetitionParticipation, Map, Match, MatchParticipation
+from aiarena.core.services import matches
+
+
+@pytest.fixture
+def make_competition(db, user, game_mode, map, all_bot_races, bot_factory):
+    """An open competition with `participant_count` active participants, playing on `map`."""
+
+    def _make_competition(name, participant_count):
+        competition = Competition.objects.create(name=name, game_mode=game_mode)
+        competition.open()
+        map.competitions.add(competition)
+        for i in range(participant_count):
+            bot = bot_factory(user=user, name=f"{name}_bot{i}", bot_data_enabled=i % 2 == 0)
+            CompetitionParticipation.objects.create(competition=competition, bot=bot)
+        return competition
+
+    return _make_competition
+
+
+def test_every_participant_plays_every_other_once(make_competition):
+    competition = make_competition("competition", participant_count=5)
+
+    new_round = matches._attempt_to_generate_new_round(competition)
+
+    pairings = [
+        frozenset(MatchParticipation.objects.filter(match=match).values_list("bot_id", flat=True))
+        for match in Match.objects.filter(round=new_round)
+    ]
+    bot_ids = CompetitionParticipation.objects.filter(competition=competition).values_list("bot_id", flat=True)
+    assert sorted(pairings, key=sorted) == sorted(
+        (frozenset(pair) for pair in itertools.combinations(bot_ids, 2)), key=sorted
+    )
+
+
+def test_matches_follow_competition_settings(make_competition):
+    competition = make_competition("competition", participant_count=4)
+    competition_maps = set(Map.objects.filter(competitions=competition))
+
+    new_round = matches._attempt_to_generate_new_round(competition)
+
+    for match in Match.objects.filter(round=new_round):
+        assert match.map in competition_maps
+        assert match.require_trusted_arenaclient == competition.require_trusted_infrastructure
+    for participation in MatchParticipation.objects.filter(match__round=new_round).select_related("bot"):
+        assert participation.use_bot_data == participation.bot.bot_data_enabled
+        assert participation.update_bot_data == participation.bot.bot_data_enabled
+
+
+def test_query_count_does_not_grow_with_participants(make_competition):
+    small = make_competition("small", participant_count=4)
+    large = make_competition("large", participant_count=12)
+    # The first round generated also reads the settings it uses into the cache, which the others don't.
+    matches._attempt_to_generate_new_round(make_competition("warm_up", participant_count=2))
+
+    with CaptureQueriesContext(connection) as small_queries:
+        matches._attempt_to_generate_new_round(small)
+    with CaptureQueriesContext(connection) as large_queries:
+        matches._attempt_to_generate_new_round(large)
+
+    assert Match.objects.filter(round__competition=large).count() == 66
+    assert len(large_queries) == len(small_queries)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+import pytest
+
+from aiarena.core.models import Map, Match, Round
+from aiarena.core.models.competition_bot_map_stats import CompetitionBotMapStats
+from aiarena.core.models.competition_bot_matchup_stats import CompetitionBotMatchupStats
+from aiarena.core.services.service_implementations.internal.statistics import stats_engine
+
+
+@pytest.fixture
+def round_(db, competition):
+    return Round.objects.create(competition=competition)
+
+
+def _matchup_stats(competition):
+    return {
+        (stats.bot.bot.name, stats.opponent.bot.name): (
+            stats.match_count,
+            stats.win_count,
+            stats.loss_count,
+            stats.tie_count,
+            stats.crash_count,
+            stats.win_perc,
+        )
+        for stats in CompetitionBotMatchupStats.objects.filter(bot__competition=competition).select_related(
+            "bot__bot", "opponent__bot"
+        )
+    }
+
+
+def test_counts_every_matchup_at_once(competition, round_, make_bot, play):
+    bot1, bot2, bot3 = (make_bot(f"bot{i}", competition=competition) for i in (1, 2, 3))
+    play((bot1, "win"), (bot2, "loss"), in_round=round_)
+    play((bot1, "loss", "crash"), (bot2, "win"), in_round=round_)
+    play((bot1, "tie"), (bot2, "tie"), in_round=round_)
+    play((bot1, "win"), (bot3, "loss"), in_round=round_)
+    # Not played yet.
+    play(bot2, bot3, started=False, in_round=round_)
+
+    stats_engine.recalculate_matchup_stats(competition.id)
+
+    assert _matchup_stats(competition) == {
+        ("bot1", "bot2"): (3, 1, 1, 1, 1, 1 / 3 * 100),
+        ("bot2", "bot1"): (3, 1, 1, 1, 0, 1 / 3 * 100),
+        ("bot1", "bot3"): (1, 1, 0, 0, 0, 100),
+        ("bot3", "bot1"): (1, 0, 1, 0, 0, 0),
+    }
+
+
+def test_recalculating_one_bot_leaves_the_others_alone(competition, round_, make_bot, play):
+    bot1, bot2, bot3 = (make_bot(f"bot{i}", competition=competition) for i in (1, 2, 3))
+    play((bot1, "win"), (bot2, "loss"), in_round=round_)
+    stats_engine.recalculate_matchup_stats(competition.id)
+
+    # bot1's old matchup with bot2 goes, as if its match had never been played, and one with bot3 comes in.
+    Match.objects.all().delete()
+    play((bot1, "win"), (bot3, "loss"), in_round=round_)
+    stats_engine.recalculate_matchup_stats(competition.id, bot_ids=[bot1.id])
+
+    assert _matchup_stats(competition) == {
+        ("bot1", "bot3"): (1, 1, 0, 0, 0, 100),
+        ("bot2", "bot1"): (1, 0, 1, 0, 0, 0),
+    }
+
+
+def test_query_count_does_not_grow_with_the_competition(
+    competition, round_, make_bot, play, django_assert_max_num_queries
+):
+    bots = [make_bot(f"bot{i}", competition=competition) for i in range(6)]
+    for bot in bots:
+        for opponent in bots:
+            if bot != opponent:
+                play((bot, "win"), (opponent, "loss"), in_round=round_)
+
+    # Participations, grouped counts, upsert, stale rows, plus the locks.
+    with django_assert_max_num_queries(4 + 2 * len(bots)):
+        stats_engine.recalculate_matchup_stats(competition.id)
+
+    assert CompetitionBotMatchupStats.objects.count() == len(bots) * (len(bots) - 1)
+
+
+def test_counts_every_map_at_once(competition, round_, map, make_bot, play):
+    other_map = Map.objects.create(name="OtherMap", game_mode=map.game_mode)
+    bot1, bot2 = (make_bot(f"bot{i}", competition=competition) for i in (1, 2))
+    play((bot1, "win"), (bot2, "loss"), in_round=round_)
+    play((bot1, "loss", "timeout"), (bot2, "win"), in_round=round_)
+    play((bot1, "tie"), (bot2, "tie"), in_round=round_, on_map=other_map)
+
+    stats_engine.recalculate_map_stats(competition.id)
+
+    assert {
+        (stats.bot.bot.name, stats.map.name): (stats.match_count, stats.win_count, stats.crash_count, stats.tie_perc)
+        for stats in CompetitionBotMapStats.objects.select_related("bot__bot", "map")
+    } == {
+        ("bot1", map.name): (2, 1, 1, 0),
+        ("bot2", map.name): (2, 1, 0, 0),
+        ("bot1", "OtherMap"): (1, 0, 0, 100),
+        ("bot2", "OtherMap"): (1, 0, 0, 100),
+    }
+
+
+def test_map_stats_drift_is_reported(competition, round_, make_bot, play):
+    bot1, bot2 = (make_bot(f"bot{i}", competition=competition) for i in (1, 2))
+    play((bot1, "win"), (bot2, "loss"), in_round=round_)
+    stats_engine.recalculate_map_stats(competition.id)
+
+    with mock.patch("sentry_sdk.capture_message") as capture_message:
+        stats_engine.recalculate_map_stats(competition.id)
+        capture_message.assert_not_called()
+
+        CompetitionBotMapStats.objects.filter(bot__bot=bot1).update(win_count=0)
+        stats_engine.recalculate_map_stats(competition.id)
+        capture_message.assert_called_once_with("Recalculated bot map stats differ from previous value")
+
+    assert CompetitionBotMapStats.objects.get(bot__bot=bot1).win_count == 1
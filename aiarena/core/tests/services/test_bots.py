@@ -0,0 +1,33 @@
+from aiarena.core.services import bots
+
+
+def test_only_bots_whose_data_a_match_in_progress_will_update_are_frozen(make_bot, play):
+    busy = make_bot("busy")
+    dataless = make_bot("dataless", has_data=False)
+    not_updating = make_bot("not_updating")
+    queued = make_bot("queued")
+    idle = make_bot("idle")
+    play(busy, dataless)
+    play(not_updating, idle, update_bot_data=False)
+    play(queued, idle, started=False)
+
+    assert bots.get_frozen_bot_ids([bot.id for bot in (busy, dataless, not_updating, queued, idle)]) == {busy.id}
+    assert bots.get_available([busy, dataless, not_updating, queued, idle]) == [dataless, not_updating, queued, idle]
+
+
+def test_available_is_more_than(make_bot, play):
+    first, second, third = make_bot("first"), make_bot("second"), make_bot("third")
+    play(first, second)
+
+    assert bots.available_is_more_than([first, second, third], 1)
+    assert not bots.available_is_more_than([first, second, third], 2)
+
+
+def test_availability_takes_one_query_however_many_bots(make_bot, play, django_assert_num_queries):
+    many = [make_bot(f"bot{i}") for i in range(10)]
+    play(many[0], many[1])
+
+    with django_assert_num_queries(1):
+        assert bots.available_is_more_than(many, 8)
+    with django_assert_num_queries(1):
+        assert len(bots.get_available(many)) == 8
@@ -17,6 +17,8 @@ from aiarena.core.models import (
     Match,
     MatchParticipation,
     Result,
+    StatsGenerationCheckpoint,
+    StatsGenerationRun,
     User,
 )
 from aiarena.core.services import ladders
@@ -163,6 +165,24 @@ class ManagementCommandTests(MatchReadyMixin, TransactionTestCase):
         call_command("generatestats", "--graphsonly", stdout=out)
         self.assertIn("Done", out.getvalue())
 
+    def test_generatestats_graphsonly_skips_unchanged_graphs(self):
+        self._generate_full_data_set()
+        out = StringIO()
+        call_command("generatestats", "--graphsonly", stdout=out)
+        self.assertIn("Generating current competition stats for bot", out.getvalue())
+
+        # Nobody has played since.
+        out = StringIO()
+        call_command("generatestats", "--graphsonly", stdout=out)
+        self.assertNotIn("Generating current competition stats for bot", out.getvalue())
+
+        out = StringIO()
+        call_command("generatestats", "--graphsonly", "--allgraphs", stdout=out)
+        self.assertIn("Generating current competition stats for bot", out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "--allgraphs is only valid with --graphsonly"):
+            call_command("generatestats", "--allgraphs")
+
     def test_generatestats_graphsonly_invalid_call(self):
         self._generate_full_data_set()
         out = StringIO()
@@ -243,6 +263,40 @@ class ManagementCommandTests(MatchReadyMixin, TransactionTestCase):
         with self.assertRaisesMessage(CommandError, "--finalize is only valid with --competitionid"):
             call_command("generatestats", "--allcompetitions", "--finalize")
 
+    def test_generatestats_workers_invalid(self):
+        with self.assertRaisesMessage(CommandError, "--workers must be at least 1"):
+            call_command("generatestats", "--workers", 0)
+
+        competition_id = Competition.objects.first().id
+        with self.assertRaisesMessage(CommandError, "--workers is not valid with --finalize"):
+            call_command("generatestats", "--competitionid", competition_id, "--finalize", "--workers", 2)
+
+    def test_generatestats_resume(self):
+        self._generate_full_data_set()
+        competition = Competition.objects.filter(status="open").first()
+        done, *not_done = CompetitionParticipation.objects.filter(competition=competition)
+
+        # A run that was interrupted after one bot's stats.
+        run = StatsGenerationRun.objects.create()
+        StatsGenerationCheckpoint.objects.create(run=run, competition=competition, participation=done)
+
+        out = StringIO()
+        call_command("generatestats", "--competitionid", competition.id, "--resume", stdout=out)
+        self.assertIn("Resuming the run", out.getvalue())
+        self.assertNotIn(f"Generating current competition stats for bot {done.bot_id}...", out.getvalue())
+        for participation in not_done:
+            self.assertIn(f"Generating current competition stats for bot {participation.bot_id}...", out.getvalue())
+
+        run.refresh_from_db()
+        self.assertIsNotNone(run.finished)
+        # The competition wide stats, and every bot's.
+        self.assertEqual(run.checkpoints.count(), 1 + 1 + len(not_done))
+
+        out = StringIO()
+        call_command("generatestats", "--competitionid", competition.id, "--resume", stdout=out)
+        self.assertIn("WARNING: There's no unfinished run to resume. Starting a new one.", out.getvalue())
+        self.assertEqual(StatsGenerationRun.objects.count(), 1)
+
     def test_generatestats_bot(self):
         self._generate_full_data_set()
         out = StringIO()
@@ -260,6 +314,43 @@ class ManagementCommandTests(MatchReadyMixin, TransactionTestCase):
         call_command("seed_integration_tests", stdout=out)
         self.assertIn('Done. User logins have a password of "x".', out.getvalue())
 
+    def test_benchmark_scheduler(self):
+        out = StringIO()
+        call_command(
+            "benchmarkscheduler",
+            "--numacs",
+            2,
+            "--numcompetitions",
+            2,
+            "--numbots",
+            4,
+            "--nummatches",
+            10,
+            stdout=out,
+        )
+        self.assertIn("Matches played: 10", out.getvalue())
+        self.assertIn("Fairness:", out.getvalue())
+
+    def test_benchmark_graphs(self):
+        out = StringIO()
+        call_command("benchmarkgraphs", "--numbots", 2, "--nummatches", 20, stdout=out)
+        self.assertIn("A new pyplot figure for each graph:", out.getvalue())
+        self.assertIn("GraphRenderer, including setting it up:", out.getvalue())
+
+    def test_backfill_crash_streaks(self):
+        match = self._post_to_matches().data
+        self._post_to_results(match["id"], "Player1Crash")
+        crashed_bot = Bot.objects.get(id=match["bot1"]["id"])
+        self.assertEqual(crashed_bot.consecutive_crashes, 1)
+
+        Bot.objects.update(consecutive_crashes=0)
+        out = StringIO()
+        call_command("backfillcrashstreaks", stdout=out)
+
+        crashed_bot.refresh_from_db()
+        self.assertEqual(crashed_bot.consecutive_crashes, 1)
+        self.assertIn("Done. 1 bots' streaks were out of date.", out.getvalue())
+
     def test_check_bot_hashes(self):
         call_command("checkbothashes")
 
@@ -0,0 +1,58 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+import pytest
+
+from aiarena.core.models import ContentBlob
+from aiarena.core.storage import ContentAddressedStorageMixin
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    pass
+
+
+@pytest.fixture
+def storage(db, tmp_path):
+    return ContentAddressedFileSystemStorage(location=tmp_path)
+
+
+def test_identical_files_are_stored_once(storage):
+    first = storage.save("bots/1/bot_data", ContentFile(b"same data"))
+    second = storage.save("bots/2/bot_data", ContentFile(b"same data"))
+    different = storage.save("bots/3/bot_data", ContentFile(b"other data"))
+
+    assert first == second != different
+    assert storage.open(first).read() == b"same data"
+    assert ContentBlob.objects.get(md5hash=first.rsplit("/", 1)[1]).references == 2
+    assert ContentBlob.objects.count() == 2
+
+
+def test_files_are_only_removed_once_nothing_refers_to_them(storage):
+    name = storage.save("bots/1/bot_data", ContentFile(b"data"))
+    storage.save("bots/2/bot_data", ContentFile(b"data"))
+
+    storage.delete(name)
+    assert storage.sweep() == 0
+    assert storage.exists(name)
+
+    storage.delete(name)
+    assert storage.sweep() == 1
+    assert not storage.exists(name)
+    assert not ContentBlob.objects.exists()
+
+
+def test_a_swept_file_can_be_stored_again(storage):
+    name = storage.save("bots/1/bot_data", ContentFile(b"data"))
+    storage.delete(name)
+    storage.sweep()
+
+    assert storage.save("bots/1/bot_data", ContentFile(b"data")) == name
+    assert storage.open(name).read() == b"data"
+
+
+def test_files_stored_before_content_addressing_are_deleted_outright(storage):
+    name = FileSystemStorage.save(storage, "bots/1/bot_data", ContentFile(b"data"))
+
+    storage.delete(name)
+
+    assert not storage.exists(name)
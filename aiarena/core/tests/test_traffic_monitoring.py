@@ -16,8 +16,19 @@ import pytest
 
 from aiarena.core import tasks as tasks_module
 from aiarena.core.middleware import traffic_classification
+from aiarena.core.models import User
 from aiarena.core.tasks import traffic_monitoring
-from aiarena.core.traffic import REQUEST_COUNT, REQUEST_DURATION, TrafficClass
+from aiarena.core.traffic import (
+    ENDPOINT_LOCKING_QUERY_TIME,
+    ENDPOINT_METRICS,
+    ENDPOINT_QUERY_COUNT,
+    ENDPOINT_REQUEST_COUNT,
+    ENDPOINT_SLOWEST_QUERY,
+    REQUEST_COUNT,
+    REQUEST_DURATION,
+    TrafficClass,
+    tag_endpoint,
+)
 from aiarena.core.traffic import recording as recording_module
 from aiarena.core.utils import monitoring_minute_key
 
@@ -281,3 +292,62 @@ class TestEndToEnd:
         datapoints = sent_datapoints(cloudwatch)
         assert find(datapoints, "RequestCount", TrafficClass.SEARCH_ENGINE)["Value"] == 1
         assert find(datapoints, "RequestDuration", TrafficClass.SEARCH_ENGINE)["Value"] == 2000
+
+
+def run_tagged_request(endpoint="ac_next_match", queries=2):
+    """Push one request through the middleware, from a view that tags it and runs `queries` queries."""
+
+    def get_response(request):
+        tag_endpoint(request, endpoint, query_budget=10)
+        for _ in range(queries):
+            User.objects.exists()
+        return mock.sentinel.response
+
+    request = RequestFactory().get("/", HTTP_USER_AGENT="curl/8.4.0")
+    request.user = AnonymousUser()
+    request.auth = None
+    traffic_classification(get_response)(request)
+    return request
+
+
+class TestEndpointRecording:
+    def test_records_the_queries_of_tagged_requests(self, db, redis):
+        request = run_tagged_request(queries=2)
+        run_tagged_request(queries=3)
+
+        assert redis.hgetall(ENDPOINT_REQUEST_COUNT.key()) == {b"ac_next_match": b"2"}
+        assert redis.hgetall(ENDPOINT_QUERY_COUNT.key()) == {b"ac_next_match": b"5"}
+        assert redis.hgetall(ENDPOINT_LOCKING_QUERY_TIME.key()) == {b"ac_next_match": b"0"}
+        assert redis.zrange(ENDPOINT_SLOWEST_QUERY.key(), 0, -1) == [b"ac_next_match"]
+        assert request.query_stats.count == 2
+        assert "SELECT" in request.query_stats.slowest_sql
+
+    def test_untagged_requests_are_not_recorded_per_endpoint(self, db, redis):
+        run_request()
+
+        assert not any(redis.exists(metric.key()) for metric in ENDPOINT_METRICS)
+
+    def test_slowest_query_keeps_the_maximum(self, db, redis):
+        redis.zadd(ENDPOINT_SLOWEST_QUERY.key(), {"ac_next_match": 10_000})
+
+        run_tagged_request()
+
+        assert redis.zscore(ENDPOINT_SLOWEST_QUERY.key(), "ac_next_match") == 10_000
+
+    def test_ships_with_an_endpoint_dimension(self, db, redis, cloudwatch):
+        run_tagged_request(endpoint="ac_next_match", queries=2)
+        run_tagged_request(endpoint="ac_submit_result", queries=1)
+        for metric in ENDPOINT_METRICS:
+            redis.rename(metric.key(), metric.key(minutes_from_now=-1))
+
+        traffic_monitoring()
+
+        datapoints = [point for point in sent_datapoints(cloudwatch) if point["Dimensions"][0]["Name"] == "Endpoint"]
+        assert len(datapoints) == 2 * len(ENDPOINT_METRICS)
+        query_counts = {
+            point["Dimensions"][0]["Value"]: point["Value"]
+            for point in datapoints
+            if point["MetricName"] == "EndpointQueryCount"
+        }
+        assert query_counts == {"ac_next_match": 2, "ac_submit_result": 1}
+        assert not any(redis.exists(metric.key(minutes_from_now=-1)) for metric in ENDPOINT_METRICS)
@@ -1,8 +1,16 @@
+import contextlib
+import hashlib
+import io
+from unittest import mock
+
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import StopFutureHandlers
 
 import pytest
 
-from aiarena.core.utils import parse_tags
+from aiarena.core.upload_handlers import HashingMemoryFileUploadHandler, HashingTemporaryFileUploadHandler
+from aiarena.core.utils import StreamingHash, parse_tags
 
 
 @pytest.mark.parametrize(
@@ -41,3 +49,50 @@ from aiarena.core.utils import parse_tags
 def test_parse_tags(input_tags, expected):
     """Test the parse_tags function handles various input cases correctly"""
     assert parse_tags(input_tags) == expected
+
+
+def _s3_etag(data, part_size):
+    """As in api/arenaclient/v3/reference_s3_md5_calc.py, only unquoted, and multipart from a whole part up."""
+    parts = [data[i : i + part_size] for i in range(0, len(data), part_size)]
+    if len(data) < part_size:
+        return hashlib.md5(data).hexdigest()
+    return f"{hashlib.md5(b''.join(hashlib.md5(part).digest() for part in parts)).hexdigest()}-{len(parts)}"
+
+
+@pytest.mark.parametrize("length", [0, 1, 999, 1000, 1001, 2500, 3000])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 4096])
+def test_streaming_hash_matches_whole_file_hashes(length, chunk_size):
+    data = bytes(i % 251 for i in range(length))
+    streaming_hash = StreamingHash(part_size=1000)
+    for i in range(0, length, chunk_size):
+        streaming_hash.update(data[i : i + chunk_size])
+
+    assert streaming_hash.md5() == hashlib.md5(data).hexdigest()
+    assert streaming_hash.s3_etag() == _s3_etag(data, part_size=1000)
+
+
+@pytest.mark.parametrize("handler_class", [HashingMemoryFileUploadHandler, HashingTemporaryFileUploadHandler])
+def test_upload_handlers_hash_files_as_they_come_in(handler_class):
+    data = b"bot data" * 1000
+    handler = handler_class()
+    handler.handle_raw_input(io.BytesIO(data), {}, len(data), "boundary")
+    # The memory handler says it's taking the file on by raising StopFutureHandlers.
+    with contextlib.suppress(StopFutureHandlers):
+        handler.new_file("bot_data", "bot_data.zip", "application/zip", len(data))
+    for start in range(0, len(data), 1000):
+        handler.receive_data_chunk(data[start : start + 1000], start)
+    uploaded = handler.file_complete(len(data))
+
+    assert uploaded.md5 == hashlib.md5(data).hexdigest()
+    assert uploaded.s3_etag == hashlib.md5(data).hexdigest()
+
+
+def test_saving_a_bot_only_hashes_new_files(bot):
+    with mock.patch("aiarena.core.models.bot.calculate_md5_django_filefield") as read_back:
+        bot.save()
+        bot.bot_data = ContentFile(b"new data", name="data.zip")
+        bot.save()
+
+    read_back.assert_not_called()
+    bot.refresh_from_db()
+    assert bot.bot_data_md5hash == hashlib.md5(b"new data").hexdigest()
@@ -8,6 +8,7 @@ from aiarena.core.models import ArenaClient, Bot, Competition, CompetitionPartic
 from aiarena.core.models.bot_race import BotRace
 from aiarena.core.models.game import Game
 from aiarena.core.models.game_mode import GameMode
+from aiarena.core.traffic.queries import endpoint_of, query_stats_of
 
 
 class TestAssetPaths:
@@ -34,6 +35,18 @@ class TestAssetPaths:
     test_map_path = "aiarena/core/tests/test-media/AutomatonLE.SC2Map"
 
 
+def assert_within_query_budget(response):
+    """Fail if the request behind `response` ran more queries than its endpoint's declared budget."""
+    request = response.wsgi_request
+    endpoint = endpoint_of(request)
+    assert endpoint is not None, f"{request.path} wasn't tagged with an endpoint, so it has no query budget."
+    stats = query_stats_of(request)
+    assert stats.count <= endpoint.query_budget, (
+        f"{endpoint.name} ran {stats.count} queries, over its budget of {endpoint.query_budget}. "
+        f"The slowest took {stats.slowest_ms:.1f}ms: {stats.slowest_sql}"
+    )
+
+
 # These utility methods are placed here isntead of in the TestingClient, as the TestingClient operates through the
 # Django admin interface. This is done to make clear that these methods operate in a different manner.
 # It's possible that the TestingClient should be refactored to operate in the way these methods do, instead of using
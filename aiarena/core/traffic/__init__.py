@@ -7,35 +7,58 @@ Two halves, deliberately separated:
   consumers can't drift into slightly different ideas of what a bot is.
 - `recording` owns the Redis bucket lifecycle -- writing a classified request,
   and handing unshipped buckets to whatever wants to ship them.
+- `queries` measures what a request costs the database, for the endpoints
+  that tag themselves, and hands that to `recording` along with the rest.
 
-Neither knows about CloudWatch or about Django middleware; those are callers.
+None of them knows about CloudWatch or about Django middleware; those are callers.
 See CLAUDE.md here for the reasoning that spans them.
 """
 
 from aiarena.core.traffic.classification import TrafficClass, classify
+from aiarena.core.traffic.queries import Endpoint, QueryStats, measure_queries, tag_endpoint
 from aiarena.core.traffic.recording import (
+    ENDPOINT_LOCKING_QUERY_TIME,
+    ENDPOINT_METRICS,
+    ENDPOINT_QUERY_COUNT,
+    ENDPOINT_QUERY_TIME,
+    ENDPOINT_REQUEST_COUNT,
+    ENDPOINT_SLOWEST_QUERY,
     METRICS,
     REQUEST_COUNT,
     REQUEST_DURATION,
     TRAFFIC_RETENTION_MINUTES,
     Bucket,
+    EndpointBucket,
     Metric,
     discard,
     drain,
+    drain_endpoints,
     record,
 )
 
 
 __all__ = [
+    "ENDPOINT_LOCKING_QUERY_TIME",
+    "ENDPOINT_METRICS",
+    "ENDPOINT_QUERY_COUNT",
+    "ENDPOINT_QUERY_TIME",
+    "ENDPOINT_REQUEST_COUNT",
+    "ENDPOINT_SLOWEST_QUERY",
     "METRICS",
     "REQUEST_COUNT",
     "REQUEST_DURATION",
     "TRAFFIC_RETENTION_MINUTES",
     "Bucket",
+    "Endpoint",
+    "EndpointBucket",
     "Metric",
+    "QueryStats",
     "TrafficClass",
     "classify",
     "discard",
     "drain",
+    "drain_endpoints",
+    "measure_queries",
     "record",
+    "tag_endpoint",
 ]
@@ -0,0 +1,84 @@
+"""What a request costs the database, per endpoint.
+
+The traffic middleware measures every request's queries: how many, how long
+they took in total, how much of that was spent in locking statements and which
+one was the slowest. A view opts in to having that recorded by tagging the
+request with an endpoint name. Untagged requests are measured and dropped, so
+only the endpoints worth watching -- the arena client API, mostly -- get a
+series each.
+
+A tag also declares the endpoint's query budget: the most queries one request
+to it should ever need. Nothing enforces it at runtime. It's there for tests
+(see `assert_within_query_budget` in core/tests/testing_utils.py), so that an
+N+1 creeping into a hot path fails CI instead of showing up as a slow graph.
+"""
+
+import contextlib
+import time
+from dataclasses import dataclass
+
+from django.db import connection
+from django.http import HttpRequest
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    query_budget: int
+
+
+@dataclass
+class QueryStats:
+    """Accumulates over a request. Installed as a database execute wrapper."""
+
+    count: int = 0
+    time_ms: float = 0.0
+    # Time spent in SELECT ... FOR UPDATE. The database doesn't say how much of
+    # it was waiting on someone else's lock, but that's what makes these grow.
+    locking_time_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_sql: str = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        # perf_counter, not monotonic: the middleware's own timing reads monotonic.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.time_ms += elapsed_ms
+            if "FOR UPDATE" in sql:
+                self.locking_time_ms += elapsed_ms
+            if elapsed_ms > self.slowest_ms:
+                self.slowest_ms = elapsed_ms
+                self.slowest_sql = sql
+
+
+def tag_endpoint(request, name: str, query_budget: int) -> None:
+    """Have this request's database cost recorded under `name`.
+
+    Takes either a Django request or a DRF one; DRF wraps the request the
+    middleware sees, so the tag goes on the one underneath.
+    """
+    _http_request(request).traffic_endpoint = Endpoint(name=name, query_budget=query_budget)
+
+
+def endpoint_of(request: HttpRequest) -> Endpoint | None:
+    return getattr(request, "traffic_endpoint", None)
+
+
+def query_stats_of(request: HttpRequest) -> QueryStats | None:
+    return getattr(request, "query_stats", None)
+
+
+@contextlib.contextmanager
+def measure_queries(request: HttpRequest):
+    """Count the queries run on this thread's connection, onto `request.query_stats`."""
+    request.query_stats = QueryStats()
+    with connection.execute_wrapper(request.query_stats):
+        yield
+
+
+def _http_request(request) -> HttpRequest:
+    return getattr(request, "_request", request)
@@ -22,6 +22,7 @@ from redis import Redis
 from redis.exceptions import RedisError
 
 from aiarena.core.traffic.classification import TrafficClass, classify
+from aiarena.core.traffic.queries import endpoint_of, query_stats_of
 from aiarena.core.utils import monitoring_minute_key
 
 
@@ -52,6 +53,9 @@ class Metric:
     key_part: str
     cloudwatch_name: str
     unit: str
+    # Most metrics add up over the minute. One that doesn't keeps the largest
+    # value it saw instead, in a sorted set, since a hash can only increment.
+    maximum: bool = False
 
     def key(self, minutes_from_now: int = 0) -> str:
         """Redis key for this metric's bucket for a given minute.
@@ -68,6 +72,27 @@ REQUEST_DURATION = Metric(key_part="duration", cloudwatch_name="RequestDuration"
 
 METRICS = (REQUEST_COUNT, REQUEST_DURATION)
 
+# The database cost of the endpoints that tag their requests (see queries.py),
+# bucketed by endpoint name rather than by traffic class. Averages are the
+# totals over ENDPOINT_REQUEST_COUNT.
+ENDPOINT_REQUEST_COUNT = Metric(key_part="endpoint_count", cloudwatch_name="EndpointRequestCount", unit="Count")
+ENDPOINT_QUERY_COUNT = Metric(key_part="endpoint_queries", cloudwatch_name="EndpointQueryCount", unit="Count")
+ENDPOINT_QUERY_TIME = Metric(key_part="endpoint_query_time", cloudwatch_name="EndpointQueryTime", unit="Milliseconds")
+ENDPOINT_LOCKING_QUERY_TIME = Metric(
+    key_part="endpoint_locking_query_time", cloudwatch_name="EndpointLockingQueryTime", unit="Milliseconds"
+)
+ENDPOINT_SLOWEST_QUERY = Metric(
+    key_part="endpoint_slowest_query", cloudwatch_name="EndpointSlowestQuery", unit="Milliseconds", maximum=True
+)
+
+ENDPOINT_METRICS = (
+    ENDPOINT_REQUEST_COUNT,
+    ENDPOINT_QUERY_COUNT,
+    ENDPOINT_QUERY_TIME,
+    ENDPOINT_LOCKING_QUERY_TIME,
+    ENDPOINT_SLOWEST_QUERY,
+)
+
 
 def record(request: HttpRequest, duration_ms: int) -> None:
     """Add one request to the current minute's buckets.
@@ -89,6 +114,23 @@ def record(request: HttpRequest, duration_ms: int) -> None:
             # See the retention constant for why this and the emitter's sweep
             # window have to be the same number.
             pipeline.expire(key, TRAFFIC_RETENTION_MINUTES * 60)
+
+        # Same round trip, same retention: a tagged request's database cost.
+        endpoint, stats = endpoint_of(request), query_stats_of(request)
+        if endpoint is not None and stats is not None:
+            for metric, amount in (
+                (ENDPOINT_REQUEST_COUNT, 1),
+                (ENDPOINT_QUERY_COUNT, stats.count),
+                (ENDPOINT_QUERY_TIME, round(stats.time_ms)),
+                (ENDPOINT_LOCKING_QUERY_TIME, round(stats.locking_time_ms)),
+                (ENDPOINT_SLOWEST_QUERY, round(stats.slowest_ms)),
+            ):
+                key = metric.key()
+                if metric.maximum:
+                    pipeline.zadd(key, {endpoint.name: amount}, gt=True)
+                else:
+                    pipeline.hincrby(key, endpoint.name, amount)
+                pipeline.expire(key, TRAFFIC_RETENTION_MINUTES * 60)
         pipeline.execute()
     except RedisError as exc:
         sentry_sdk.capture_exception(exc)
@@ -129,7 +171,7 @@ def drain(catchup_minutes: int = TRAFFIC_RETENTION_MINUTES) -> list[Bucket]:
     # Oldest first, so a backfill replays in chronological order.
     for minutes_ago in range(catchup_minutes, 0, -1):
         keys = {metric: metric.key(minutes_from_now=-minutes_ago) for metric in METRICS}
-        raw = {metric: celery_redis.hgetall(key) for metric, key in keys.items()}
+        raw = {metric: _read(metric, key) for metric, key in keys.items()}
 
         # THE MINUTE IS THE UNIT, not the individual metric: if anything was
         # recorded, every metric for that minute ships, even the ones with no
@@ -152,12 +194,55 @@ def drain(catchup_minutes: int = TRAFFIC_RETENTION_MINUTES) -> list[Bucket]:
         )
 
         for metric, key in keys.items():
-            decoded = {name.decode(): int(value) for name, value in raw[metric].items()}
             buckets.append(
                 Bucket(
                     metric=metric,
                     timestamp=timestamp,
-                    counts={traffic_class: decoded.get(traffic_class.value, 0) for traffic_class in TrafficClass},
+                    counts={traffic_class: raw[metric].get(traffic_class.value, 0) for traffic_class in TrafficClass},
+                    redis_key=key,
+                )
+            )
+
+    return buckets
+
+
+@dataclass(frozen=True)
+class EndpointBucket:
+    """One minute's totals for one endpoint metric, ready to ship."""
+
+    metric: Metric
+    timestamp: datetime.datetime
+    counts: dict[str, int]
+    redis_key: str
+
+
+def drain_endpoints(catchup_minutes: int = TRAFFIC_RETENTION_MINUTES) -> list[EndpointBucket]:
+    """`drain`, for the endpoint metrics.
+
+    Same sweep, same minute-is-the-unit rule, same hand-off to `discard`. The
+    difference is the fill: every endpoint seen that minute appears in every
+    metric, but there's no fixed list of endpoints to pad a quiet one out with.
+    An endpoint with no requests in a minute just has no datapoint for it.
+    """
+    buckets = []
+
+    for minutes_ago in range(catchup_minutes, 0, -1):
+        keys = {metric: metric.key(minutes_from_now=-minutes_ago) for metric in ENDPOINT_METRICS}
+        raw = {metric: _read(metric, key) for metric, key in keys.items()}
+        if not any(raw.values()):
+            continue
+
+        timestamp = datetime.datetime.fromtimestamp(
+            monitoring_minute_key(minutes_from_now=-minutes_ago), tz=datetime.UTC
+        )
+        endpoints = set().union(*raw.values())
+
+        for metric, key in keys.items():
+            buckets.append(
+                EndpointBucket(
+                    metric=metric,
+                    timestamp=timestamp,
+                    counts={endpoint: raw[metric].get(endpoint, 0) for endpoint in sorted(endpoints)},
                     redis_key=key,
                 )
             )
@@ -165,7 +250,13 @@ def drain(catchup_minutes: int = TRAFFIC_RETENTION_MINUTES) -> list[Bucket]:
     return buckets
 
 
-def discard(buckets: list[Bucket]) -> None:
+def _read(metric: Metric, key: str) -> dict[str, int]:
+    if metric.maximum:
+        return {name.decode(): int(score) for name, score in celery_redis.zrange(key, 0, -1, withscores=True)}
+    return {name.decode(): int(value) for name, value in celery_redis.hgetall(key).items()}
+
+
+def discard(buckets: list[Bucket] | list[EndpointBucket]) -> None:
     """Drop buckets that have been shipped, so they're never sent twice."""
     if not buckets:
         return
@@ -0,0 +1,38 @@
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+from aiarena.core.utils import StreamingHash
+
+
+class HashingUploadHandlerMixin:
+    """
+    Hashes each uploaded file as it streams in, so that nothing has to read it back later just to learn its hash.
+
+    The finished file carries `md5` and `s3_etag` attributes.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set before calling super(): the memory handler raises StopFutureHandlers once it takes the file on.
+        self.streaming_hash = StreamingHash()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        unconsumed = super().receive_data_chunk(raw_data, start)
+        # A handler that passes the chunk on isn't the one keeping the file.
+        if unconsumed is None:
+            self.streaming_hash.update(raw_data)
+        return unconsumed
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.md5 = self.streaming_hash.md5()
+            file.s3_etag = self.streaming_hash.s3_etag()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
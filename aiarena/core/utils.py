@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import re
 import time
@@ -24,6 +25,15 @@ def obtain_s3_filehash_or_default(file, default):
         return default
 
 
+def cached_s3_filehash_or_default(file, cached_etag, default):
+    """
+    Like obtain_s3_filehash_or_default, but going to S3 only if the ETag hasn't been cached yet.
+    """
+    if not file or not is_s3_file(file):
+        return default
+    return cached_etag or obtain_s3_filehash_or_default(file, default)
+
+
 def remove_quotes(etag):
     # [1:-1] is to remove the quotes from the ETAG
     return etag[1:-1]
@@ -94,6 +104,58 @@ def calculate_md5_django_filefield(file, block_size=2**20):
     return md5.hexdigest()
 
 
+class StreamingHash:
+    """
+    The MD5 of a file, and the ETag S3 would give it, computed a chunk at a time as the file streams past.
+
+    S3 ETags are the plain MD5 for single part uploads. Multipart uploads get the MD5 of the parts' concatenated MD5s,
+    followed by a dash and the number of parts. See api/arenaclient/v3/reference_s3_md5_calc.py. boto3 uploads a file
+    in parts once it's at least a part in size, so a file of exactly one part still gets a multipart ETag.
+    """
+
+    S3_PART_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, part_size=S3_PART_SIZE):
+        self._md5 = hashlib.md5()
+        self._part_size = part_size
+        self._part = hashlib.md5()
+        self._part_length = 0
+        self._part_digests = []
+        self._length = 0
+
+    def update(self, data):
+        self._md5.update(data)
+        self._length += len(data)
+        data = memoryview(data)
+        while data:
+            piece = data[: self._part_size - self._part_length]
+            self._part.update(piece)
+            self._part_length += len(piece)
+            data = data[len(piece) :]
+            if self._part_length == self._part_size:
+                self._part_digests.append(self._part.digest())
+                self._part = hashlib.md5()
+                self._part_length = 0
+
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    def s3_etag(self) -> str:
+        digests = self._part_digests + ([self._part.digest()] if self._part_length else [])
+        if self._length < self._part_size:
+            return self.md5()
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+    @classmethod
+    def of(cls, file) -> "StreamingHash":
+        """Hashes a django File that's already at hand, leaving it rewound for whoever reads it next."""
+        streaming_hash = cls()
+        for chunk in file.chunks():
+            streaming_hash.update(chunk)
+        file.seek(0)
+        return streaming_hash
+
+
 # ELO Implementation:
 # http://satirist.org/ai/starcraft/blog/archives/117-Elo-ratings-are-easy-to-calculate.html
 class Elo:
@@ -20,7 +20,9 @@ from aiarena.core.models import (
     Competition,
     CompetitionBotMapStats,
     CompetitionBotMatchupStats,
+    CompetitionEloLedger,
     CompetitionParticipation,
+    ContentBlob,
     Map,
     MapPool,
     Match,
@@ -28,8 +30,11 @@ from aiarena.core.models import (
     MatchTag,
     News,
     Result,
+    ResultProcessingStage,
     Round,
     ServiceUser,
+    StatsGenerationCheckpoint,
+    StatsGenerationRun,
     Tag,
     TemporaryUpload,
     Trophy,
@@ -41,6 +46,7 @@ from aiarena.core.models.bot_race import BotRace
 from aiarena.core.models.game import Game
 from aiarena.core.models.game_mode import GameMode
 from aiarena.core.services import competitions, matches
+from aiarena.core.services.service_implementations.internal import result_processing
 from aiarena.patreon.models import PatreonAccountBind, PatreonUnlinkedDiscordUID
 
 
@@ -437,6 +443,12 @@ class CompetitionBotMatchupStatsAdmin(admin.ModelAdmin):
     list_select_related = ["bot", "bot__competition", "bot__bot", "opponent", "opponent__competition", "opponent__bot"]
 
 
+@admin.register(CompetitionEloLedger)
+class CompetitionEloLedgerAdmin(admin.ModelAdmin):
+    list_display = ("competition", "elo_sum", "participant_count", "reconciled_at")
+    list_select_related = ["competition"]
+
+
 @admin.register(CompetitionParticipation)
 class CompetitionParticipationAdmin(admin.ModelAdmin):
     list_display = (
@@ -462,6 +474,12 @@ class CompetitionParticipationAdmin(admin.ModelAdmin):
     list_select_related = ["competition", "bot"]
 
 
+@admin.register(ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    list_display = ("md5hash", "size", "references", "created")
+    search_fields = ("md5hash",)
+
+
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
     list_display = ("name", "map_file_extension")
@@ -600,6 +618,32 @@ class ResultAdmin(admin.ModelAdmin):
     ]
 
 
+@admin.register(ResultProcessingStage)
+class ResultProcessingStageAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "result",
+        "stage",
+        "status",
+        "attempts",
+        "created",
+        "updated",
+    )
+    list_filter = (
+        "stage",
+        "status",
+    )
+    raw_id_fields = ["result"]
+    readonly_fields = ["error"]
+    actions = ["retry_stages"]
+
+    def retry_stages(self, request, queryset):
+        count = result_processing.retry(queryset)
+        self.message_user(request, f"Queued {count} stage(s) to be run again.", messages.SUCCESS)
+
+    retry_stages.short_description = "Run selected stages again"
+
+
 @admin.register(Round)
 class RoundAdmin(admin.ModelAdmin):
     list_display = (
@@ -648,6 +692,27 @@ class ServiceUserAdmin(ApiUsageAdminMixin, admin.ModelAdmin):
     raw_id_fields = ("groups", "user_permissions")
 
 
+@admin.register(StatsGenerationCheckpoint)
+class StatsGenerationCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("id", "run", "competition", "participation", "sql_seconds", "render_seconds", "completed")
+    list_filter = ("run", "competition")
+    raw_id_fields = ("participation",)
+    list_select_related = ["run", "competition"]
+
+
+class StatsGenerationCheckpointInline(admin.TabularInline):
+    model = StatsGenerationCheckpoint
+    extra = 0
+    raw_id_fields = ("participation",)
+
+
+@admin.register(StatsGenerationRun)
+class StatsGenerationRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "started", "finished", "graphs_only")
+    list_filter = ("graphs_only",)
+    inlines = [StatsGenerationCheckpointInline]
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = (
@@ -4,7 +4,8 @@ from django.views import View
 from django.views.generic import DetailView, FormView
 from django.views.generic.detail import SingleObjectMixin
 
-from aiarena.core.models import Match, MatchTag, Tag
+from aiarena.core.models import Match
+from aiarena.core.services.service_implementations.internal import match_tags
 from aiarena.core.utils import parse_tags
 from aiarena.frontend.templatetags.url_utils import get_html_link
 
@@ -61,15 +62,6 @@ class MatchTagFormView(SingleObjectMixin, FormView):
     def post(self, request, *args, **kwargs):
         form = MatchTagForm(request.POST)
         if request.user.is_authenticated and form.is_valid():
-            match = self.get_object()
-            match_tags = []
-            for tag in form.cleaned_data["tags"]:
-                tag_obj = Tag.objects.get_or_create(name=tag)
-                match_tags.append(MatchTag.objects.get_or_create(tag=tag_obj[0], user=request.user)[0])
-
-            # remove tags for this match that belong to this user and were not sent in the form
-            match.tags.remove(*match.tags.filter(user=request.user).exclude(id__in=[mt.id for mt in match_tags]))
-            # add everything, this shouldn't cause duplicates
-            match.tags.add(*match_tags)
+            match_tags.set_tags(self.get_object(), {request.user.id: form.cleaned_data["tags"]})
 
         return super().post(request, *args, **kwargs)
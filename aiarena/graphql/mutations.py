@@ -7,6 +7,8 @@
 # (This step happens in CI/CD too.)
 # =============================================================================
 
+import logging
+
 from django.contrib.auth import authenticate, login, logout
 from django.core.exceptions import ValidationError
 from django.db import transaction
@@ -21,8 +23,9 @@ from rest_framework.authtoken.models import Token
 from aiarena.api.arenaclient.common.ac_coordinator import ACCoordinator
 from aiarena.api.arenaclient.common.exceptions import LadderDisabled
 from aiarena.api.arenaclient.common.result_submission_handler import process_competition_result, update_match_tags
+from aiarena.core import traffic
 from aiarena.core.exceptions import BotUploadsDisabled, CompetitionClosed, CompetitionClosing, MatchRequestException
-from aiarena.core.models import Match, Result, TemporaryUpload
+from aiarena.core.models import Match, MatchParticipation, Result, TemporaryUpload
 from aiarena.core.models.bot import Bot
 from aiarena.core.models.bot_race import BotRace
 from aiarena.core.models.competition import Competition
@@ -33,6 +36,7 @@ from aiarena.core.services.service_implementations._competition_trophies import
     award_competition_trophies,
     check_competition_trophies,
 )
+from aiarena.core.services.service_implementations.internal import match_availability
 from aiarena.core.services.service_implementations.internal.match_requests import handle_request_matches
 from aiarena.graphql.common import (
     BaseMutation,
@@ -55,6 +59,9 @@ from aiarena.graphql.types import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 class RequestMatchInput(CleanedInputType):
     bot1 = BotID()
     bot2 = BotID()
@@ -342,6 +349,7 @@ class GetNextMatch(BaseMutation):
     match = graphene.Field(MatchType)
 
     def mutate(self, info: graphene.ResolveInfo) -> "GetNextMatch":
+        traffic.tag_endpoint(info.context, "graphql_get_next_match", query_budget=100)
         user = info.context.user
 
         if not user.is_arenaclient:
@@ -355,6 +363,41 @@ class GetNextMatch(BaseMutation):
         return GetNextMatch(match=match)
 
 
+class GetNextMatchesInput(CleanedInputType):
+    count: int = graphene.Int(required=True, description="Number of matches to claim")
+
+    @staticmethod
+    def clean_count(value, info):
+        if value < 1 or value > config.MAX_MATCHES_PER_CLAIM:
+            raise ValidationError(f"Count must be between 1 and {config.MAX_MATCHES_PER_CLAIM}.")
+        return value
+
+
+class GetNextMatches(CleanedInputMutation):
+    """Claim up to `count` matches at once, for arena clients that run several games at a time."""
+
+    class Meta:
+        input_class = GetNextMatchesInput
+
+    matches = graphene.List(graphene.NonNull(MatchType))
+
+    @classmethod
+    def perform_mutate(cls, info, input_object: GetNextMatchesInput):
+        # A round generated, then the search for each match claimed.
+        traffic.tag_endpoint(info.context, "graphql_get_next_matches", query_budget=70 + 36 * input_object.count)
+        user = info.context.user
+
+        if not user.is_arenaclient:
+            raise GraphQLError("Only arena clients can get matches.")
+
+        try:
+            matches = ACCoordinator.next_matches(user.arenaclient, input_object.count, only_unfinished_matches=False)
+        except LadderDisabled:
+            raise GraphQLError("The ladder is currently disabled.")
+
+        return cls(errors=[], matches=matches)
+
+
 class RequestUploadUrlsInput(CleanedInputType):
     count: int = graphene.Int(required=True, description="Number of upload URLs to generate (1-10)")
 
@@ -472,8 +515,16 @@ class SubmitResult(CleanedInputMutation):
         if upload is not None:
             upload.copy_to_file_field(file_field, "")
 
+    @staticmethod
+    def _copy_bot_data(upload: TemporaryUpload, bot: Bot) -> None:
+        # Saving the bot needn't read the data back to hash it: the copy says what the hashes are. The ETag comes
+        # from S3 itself, so there's nothing for the verifier to check.
+        bot.bot_data_md5hash, bot.bot_data_s3_etag = upload.copy_to_file_field(bot.bot_data, "")
+        bot.save()
+
     @classmethod
     def perform_mutate(cls, info, input_object: SubmitResultInput):
+        traffic.tag_endpoint(info.context, "graphql_submit_result", query_budget=135)
         user = info.context.user
         if not user.is_arenaclient:
             raise GraphQLError("Only arena clients can submit results.")
@@ -483,6 +534,16 @@ class SubmitResult(CleanedInputMutation):
         p1 = match.matchparticipation_set.select_for_update().select_related("bot").get(participant_number=1)
         p2 = match.matchparticipation_set.select_for_update().select_related("bot").get(participant_number=2)
 
+        result = cls.record_result(info, input_object, match, p1, p2)
+        return cls(result=result, errors=[])
+
+    @classmethod
+    def record_result(
+        cls, info, input_object: SubmitResultInput, match: Match, p1: MatchParticipation, p2: MatchParticipation
+    ) -> Result:
+        """Record the result of a match whose row and participations the caller has locked."""
+        user = info.context.user
+
         # Check after locking (another request may have submitted while we waited)
         if match.result is not None:
             raise GraphQLError("Match already has a result.")
@@ -513,6 +574,8 @@ class SubmitResult(CleanedInputMutation):
 
         match.result = result
         match.save()
+        # The result frees up both bots, and each may be able to play another match.
+        match_availability.announce(2)
 
         # Update bot data if applicable (capture old paths for cleanup after commit)
         old_bot_data_keys = []
@@ -520,14 +583,12 @@ class SubmitResult(CleanedInputMutation):
         if p1.use_bot_data and p1.update_bot_data and not match_is_requested and input_object.bot1_data:
             if p1.bot.bot_data:
                 old_bot_data_keys.append(p1.bot.bot_data.name)
-            cls._copy_upload(input_object.bot1_data, p1.bot.bot_data)
-            p1.bot.save()
+            cls._copy_bot_data(input_object.bot1_data, p1.bot)
 
         if p2.use_bot_data and p2.update_bot_data and not match_is_requested and input_object.bot2_data:
             if p2.bot.bot_data:
                 old_bot_data_keys.append(p2.bot.bot_data.name)
-            cls._copy_upload(input_object.bot2_data, p2.bot.bot_data)
-            p2.bot.save()
+            cls._copy_bot_data(input_object.bot2_data, p2.bot)
 
         update_match_tags(match, p1.bot.user, p2.bot.user, input_object.bot1_tags, input_object.bot2_tags)
         process_competition_result(result, p1, p2)
@@ -558,7 +619,117 @@ class SubmitResult(CleanedInputMutation):
         # in the database overall.
         transaction.on_commit(cleanup)
 
-        return cls(result=result, errors=[])
+        return result
+
+
+class SubmitResultsInput(CleanedInputType):
+    results: list[SubmitResultInput] = graphene.List(graphene.NonNull(SubmitResultInput), required=True)
+
+    @staticmethod
+    def clean_results(value, info):
+        if not value or len(value) > config.MAX_RESULTS_PER_SUBMISSION:
+            raise ValidationError(
+                f"Between 1 and {config.MAX_RESULTS_PER_SUBMISSION} results can be submitted at once."
+            )
+        return value
+
+
+class SubmitResultOutcomeType(graphene.ObjectType):
+    """How one of a batch of submitted results went. Either `result` or `errors` is set."""
+
+    match = graphene.Field(MatchType)
+    result = graphene.Field(ResultType)
+    errors = graphene.List(graphene.NonNull(ErrorType), required=True)
+
+
+class SubmitResults(CleanedInputMutation):
+    """
+    Submit the results of several matches at once, e.g. those an arena client finished while it couldn't reach the
+    website. Each result is recorded or rejected on its own, so one bad result doesn't hold up the rest.
+    """
+
+    class Meta:
+        input_class = SubmitResultsInput
+
+    outcomes = graphene.List(graphene.NonNull(SubmitResultOutcomeType))
+
+    @classmethod
+    def clean_nested_inputs(cls, input_object, info, path):
+        # Each result is validated as it's submitted, so that it fails alone.
+        return []
+
+    @classmethod
+    def perform_mutate(cls, info, input_object: SubmitResultsInput):
+        # Recording each result, its ELO and stats, and the crash checks.
+        traffic.tag_endpoint(info.context, "graphql_submit_results", query_budget=20 + 105 * len(input_object.results))
+        user = info.context.user
+        if not user.is_arenaclient:
+            raise GraphQLError("Only arena clients can submit results.")
+
+        # Lock every match and participation up front, in one go each, in a consistent order.
+        match_ids = sorted({result_input.match.id for result_input in input_object.results if result_input.match})
+        matches = (
+            Match.objects.select_for_update(of=("self",)).select_related("round").order_by("id").in_bulk(match_ids)
+        )
+        participations = {
+            (participation.match_id, participation.participant_number): participation
+            for participation in MatchParticipation.objects.select_for_update()
+            .select_related("bot")
+            .filter(match_id__in=match_ids)
+            .order_by("match_id", "participant_number")
+        }
+        # And the bots' competition participants, whose ELO each result adjusts. They're shared between the matches
+        # of a batch, so a bot's ELO carries over from one of its results to the next.
+        competition_participants = {
+            (competition_participant.competition_id, competition_participant.bot_id): competition_participant
+            for competition_participant in CompetitionParticipation.objects.select_for_update()
+            .filter(
+                competition_id__in={match.round.competition_id for match in matches.values() if match.round},
+                bot_id__in={participation.bot_id for participation in participations.values()},
+            )
+            .order_by("id")
+        }
+        for participation in participations.values():
+            round_ = matches[participation.match_id].round
+            if round_ and (round_.competition_id, participation.bot_id) in competition_participants:
+                participation.competition_participant = competition_participants[
+                    (round_.competition_id, participation.bot_id)
+                ]
+
+        outcomes = []
+        for index, result_input in enumerate(input_object.results):
+            errors = cls.clean_input(result_input, info, path=f"results.{index}")
+            if errors:
+                outcomes.append(SubmitResultOutcomeType(match=result_input.match, errors=errors))
+                continue
+
+            match = matches[result_input.match.id]
+            p1, p2 = participations[(match.id, 1)], participations[(match.id, 2)]
+
+            try:
+                # A savepoint each, so a failure only undoes its own result.
+                with transaction.atomic():
+                    result = SubmitResult.record_result(info, result_input, match, p1, p2)
+            except Exception as e:
+                if not isinstance(e, GraphQLError | ValidationError):
+                    logger.exception(f"Result submission for match {match.id} failed as part of a batch")
+                # These may have been modified in memory before the savepoint was rolled back.
+                for instance in (match, p1, p2, p1.bot, p2.bot):
+                    instance.refresh_from_db()
+                for participation in (p1, p2) if match.round else ():
+                    key = (match.round.competition_id, participation.bot_id)
+                    if key in competition_participants:
+                        competition_participants[key].refresh_from_db()
+                outcomes.append(
+                    SubmitResultOutcomeType(
+                        match=match,
+                        errors=[ErrorType(field="__all__", messages=[join_deep_errors_to_string(e)])],
+                    )
+                )
+            else:
+                outcomes.append(SubmitResultOutcomeType(match=match, result=result, errors=[]))
+
+        return cls(outcomes=outcomes, errors=[])
 
 
 class CompetitionTrophyCheckStatus(graphene.Enum):
@@ -807,4 +978,6 @@ class Mutation(graphene.ObjectType):
     # Arena Client mutations
     request_upload_urls = RequestUploadUrls.Field()
     get_next_match = GetNextMatch.Field()
+    get_next_matches = GetNextMatches.Field()
     submit_result = SubmitResult.Field()
+    submit_results = SubmitResults.Field()
@@ -1,8 +1,12 @@
 from unittest import mock
 
-from aiarena.core.models import ArenaClient, TemporaryUpload
+import pytest
+from constance.test import override_config
+
+from aiarena.core.models import ArenaClient, Match, MatchParticipation, TemporaryUpload
 from aiarena.core.tests.base import GraphQLTest
-from aiarena.graphql import MatchType, TemporaryUploadType
+from aiarena.core.tests.testing_utils import assert_within_query_budget
+from aiarena.graphql import MatchType, ResultType, TemporaryUploadType
 from aiarena.graphql.common import NOT_LOGGED_IN_MESSAGE
 
 
@@ -84,6 +88,43 @@ class TestGetNextMatch(GraphQLTest):
         )
 
 
+class TestGetNextMatches(GraphQLTest):
+    mutation_name = "getNextMatches"
+    # language=graphql
+    mutation = """
+        mutation ($input: GetNextMatchesInput!) {
+            getNextMatches(input: $input) {
+                matches { id }
+                errors { messages field }
+            }
+        }
+    """
+
+    def test_not_authenticated(self, db):
+        self.mutate(
+            variables={"input": {"count": 2}},
+            expected_errors_like=[NOT_LOGGED_IN_MESSAGE],
+        )
+
+    def test_not_arenaclient(self, user):
+        self.mutate(
+            login_user=user,
+            variables={"input": {"count": 2}},
+            expected_errors_like=["Only arena clients can get matches."],
+        )
+
+    def test_count_too_low(self, arenaclient_user):
+        self.mutate(
+            login_user=arenaclient_user,
+            variables={"input": {"count": 0}},
+            expected_validation_errors={"count": ["Count must be between 1 and 4."]},
+        )
+
+    def test_nothing_to_play(self, arenaclient_user):
+        response = self.mutate(login_user=arenaclient_user, variables={"input": {"count": 2}})
+        assert response["getNextMatches"]["matches"] == []
+
+
 class TestSubmitResult(GraphQLTest):
     """GraphQL-level coverage of SubmitResult's access guards. The full
     result-processing happy path is exercised by the arena-client integration
@@ -176,3 +217,170 @@ class TestSubmitResult(GraphQLTest):
         )
         match.refresh_from_db()
         assert match.result is None
+
+
+class TestSubmitResults(GraphQLTest):
+    mutation_name = "submitResults"
+    # language=graphql
+    mutation = """
+        mutation ($input: SubmitResultsInput!) {
+            submitResults(input: $input) {
+                outcomes {
+                    match { id }
+                    result { id }
+                    errors { messages field }
+                }
+                errors { messages field }
+            }
+        }
+    """
+
+    def _result_input(self, match):
+        # A result without a winner, so that it needn't come with a replay.
+        return {"match": self.to_global_id(MatchType, match.id), "type": "Error", "gameSteps": 1}
+
+    def _another_match(self, queued_match):
+        match = Match.objects.create(map=queued_match.map)
+        for participation in queued_match.matchparticipation_set.all():
+            MatchParticipation.objects.create(
+                match=match, participant_number=participation.participant_number, bot=participation.bot
+            )
+        return match
+
+    def test_each_result_succeeds_or_fails_alone(self, arenaclient_user, queued_match):
+        assigned = queued_match
+        assigned.assigned_to = arenaclient_user
+        assigned.save()
+        unassigned = self._another_match(queued_match)
+
+        response = self.mutate(
+            login_user=arenaclient_user,
+            variables={
+                "input": {
+                    "results": [
+                        self._result_input(assigned),
+                        self._result_input(unassigned),
+                        self._result_input(assigned),
+                    ]
+                }
+            },
+        )
+
+        recorded, not_assigned, duplicate = response["submitResults"]["outcomes"]
+        assigned.refresh_from_db()
+        assert recorded["result"]["id"] == self.to_global_id(ResultType, assigned.result.id)
+        assert recorded["errors"] == []
+        assert not_assigned["result"] is None
+        assert not_assigned["errors"] == [
+            {"field": "results.1.match", "messages": ["Match is not assigned to this arena client."]}
+        ]
+        assert duplicate["result"] is None
+        assert duplicate["errors"] == [{"field": "__all__", "messages": ["Match already has a result."]}]
+        unassigned.refresh_from_db()
+        assert unassigned.result is None
+
+    @override_config(MAX_RESULTS_PER_SUBMISSION=1)
+    def test_too_many_results(self, arenaclient_user, queued_match):
+        queued_match.assigned_to = arenaclient_user
+        queued_match.save()
+        other_match = self._another_match(queued_match)
+
+        self.mutate(
+            login_user=arenaclient_user,
+            variables={"input": {"results": [self._result_input(queued_match), self._result_input(other_match)]}},
+            expected_validation_errors={"results": ["Between 1 and 1 results can be submitted at once."]},
+        )
+        queued_match.refresh_from_db()
+        assert queued_match.result is None
+
+
+class TestQueryBudgets(GraphQLTest):
+    """The arena client mutations stay within their query budgets along their costliest paths: generating a round,
+    and results that come with every file and tag, update in-depth stats and set off a crash alert."""
+
+    # language=graphql
+    get_next_match = "mutation { getNextMatch { match { id } } }"
+    # language=graphql
+    get_next_matches = """
+        mutation ($input: GetNextMatchesInput!) {
+            getNextMatches(input: $input) { matches { id } errors { messages field } }
+        }
+    """
+    # language=graphql
+    submit_result = """
+        mutation ($input: SubmitResultInput!) {
+            submitResult(input: $input) { errors { messages field } }
+        }
+    """
+    # language=graphql
+    submit_results = """
+        mutation ($input: SubmitResultsInput!) {
+            submitResults(input: $input) { outcomes { errors { messages field } } errors { messages field } }
+        }
+    """
+
+    @pytest.fixture
+    def ladder(self, competition, map, make_bot):
+        competition.open()
+        map.competitions.add(competition)
+        for i in range(8):
+            make_bot(f"bot{i}", competition=competition)
+        return competition
+
+    @staticmethod
+    def _copy_to_file_field(upload, file_field, filename):
+        file_field.name = f"uploads/{upload.id}"
+        return "0" * 32, "etag"
+
+    def _result_input(self, arenaclient_user, match_id):
+        uploads = {
+            field: self.to_global_id(TemporaryUploadType, TemporaryUpload.create_for_upload(arenaclient_user).id)
+            for field in ("replayFile", "arenaclientLog", "bot1Data", "bot2Data", "bot1Log", "bot2Log")
+        }
+        return {
+            "match": match_id,
+            "type": "Player1Crash",
+            "gameSteps": 1,
+            "bot1Tags": ["tag1"],
+            "bot2Tags": ["tag2", "tag3"],
+            **uploads,
+        }
+
+    # Outside a test transaction, so that the mutations' transactions are begun and committed as they would be
+    # rather than counted as savepoints.
+    @pytest.mark.django_db(transaction=True)
+    @override_config(BOT_CONSECUTIVE_CRASH_LIMIT=1)
+    def test_arenaclient_mutations(self, arenaclient_user, ladder):
+        with (
+            mock.patch.object(TemporaryUpload, "copy_to_file_field", self._copy_to_file_field),
+            mock.patch.object(TemporaryUpload, "exists_in_storage", return_value=True),
+        ):
+            # the first match generates the round
+            self.mutation_name = "getNextMatch"
+            response = self.mutate(login_user=arenaclient_user, mutation=self.get_next_match)
+            assert_within_query_budget(self.last_response)
+
+            self.mutation_name = "submitResult"
+            self.mutate(
+                login_user=arenaclient_user,
+                mutation=self.submit_result,
+                variables={"input": self._result_input(arenaclient_user, response["getNextMatch"]["match"]["id"])},
+            )
+            assert_within_query_budget(self.last_response)
+
+            self.mutation_name = "getNextMatches"
+            response = self.mutate(
+                login_user=arenaclient_user, mutation=self.get_next_matches, variables={"input": {"count": 2}}
+            )
+            matches = response["getNextMatches"]["matches"]
+            assert len(matches) == 2
+            assert_within_query_budget(self.last_response)
+
+            self.mutation_name = "submitResults"
+            response = self.mutate(
+                login_user=arenaclient_user,
+                mutation=self.submit_results,
+                variables={"input": {"results": [self._result_input(arenaclient_user, m["id"]) for m in matches]}},
+            )
+            assert [outcome["errors"] for outcome in response["submitResults"]["outcomes"]] == [[], []]
+            assert_within_query_budget(self.last_response)
@@ -276,7 +276,8 @@ CONSTANCE_CONFIG = {
     ),
     "ENABLE_ELO_SANITY_CHECK": (
         True,
-        "Whether to sanity check the total sum of bot ELO on result submission in order to detect ELO corruption.",
+        "Whether to sanity check the total sum of bot ELO in order to detect ELO corruption: against each "
+        "competition's ELO ledger on result submission, and against the participants themselves every 10 minutes.",
     ),
     "BOT_UPLOADS_ENABLED": (True, "Whether authors can upload new bots to the website."),
     "DISCORD_INVITE_LINK": ("", "An invite link to the Discord community server."),
@@ -293,6 +294,35 @@ CONSTANCE_CONFIG = {
         3600,
         "In seconds, how long to cache the result of the AC API competition priority order calculation.",
     ),
+    "READY_MATCH_QUEUE_ENABLED": (
+        False,
+        "Hand out ladder matches from a per-competition queue kept in Redis, "
+        "instead of scanning every open round on each AC request.",
+    ),
+    "COMPETITION_PRIORITY_COUNTERS_ENABLED": (
+        False,
+        "Order competitions for the AC API from counters kept up to date in Redis, "
+        "instead of a periodically cached query.",
+    ),
+    "MAX_MATCHES_PER_CLAIM": (4, "The most matches an arena client can claim in a single request."),
+    "MAX_RESULTS_PER_SUBMISSION": (50, "The most results an arena client can submit in a single request."),
+    "MAX_MATCH_WAIT_SECONDS": (
+        0,
+        "The longest an arena client can ask the v4 next-match endpoint to wait for a match, in seconds, "
+        "up to 30 so that waits end well before uwsgi's 45 second harakiri. 0 disables waiting. "
+        "A waiting client holds a uwsgi worker for its whole wait, so each arena client that waits takes a worker "
+        "away from the site: keep the number of waiting clients below the workers uwsgi runs (see uwsgi.ini).",
+    ),
+    "SKIP_LOCKED_MATCH_CLAIMING": (
+        False,
+        "Have ACs lock only the match they're starting, and its bots, skipping any another AC is starting, "
+        "instead of queuing behind each other on the competition's participants and rounds.",
+    ),
+    "ASYNC_RESULT_PROCESSING_ENABLED": (
+        False,
+        "Once a result's ELO has been adjusted, leave round completion, bot statistics and the ELO and crash checks "
+        "to Celery, instead of doing them before responding to the AC.",
+    ),
     "TOP10_CACHE_TIME": (180, "How long to cache top10 competition results for"),
     "NEWS_CACHE_TIME": (300, "How long to cache news for"),
     "GAME_AVAILABLE_CACHE_TIME": (60, "How long to cache NoGameAvailable response for"),
@@ -332,6 +362,13 @@ CONSTANCE_CONFIG_FIELDSETS = {
         "BOT_CONSECUTIVE_CRASH_LIMIT",
         "REISSUE_UNFINISHED_MATCHES",
         "COMPETITION_PRIORITY_ORDER_CACHE_TIME",
+        "COMPETITION_PRIORITY_COUNTERS_ENABLED",
+        "READY_MATCH_QUEUE_ENABLED",
+        "MAX_MATCHES_PER_CLAIM",
+        "MAX_RESULTS_PER_SUBMISSION",
+        "MAX_MATCH_WAIT_SECONDS",
+        "SKIP_LOCKED_MATCH_CLAIMING",
+        "ASYNC_RESULT_PROCESSING_ENABLED",
     ),
     "Integrations": (
         "DISCORD_CLIENT_ID",
@@ -452,6 +489,22 @@ AUTH_USER_MODEL = "core.User"
 # https://code.djangoproject.com/ticket/28540
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Django's own handlers, but hashing the files as they come in. See aiarena/core/upload_handlers.py
+FILE_UPLOAD_HANDLERS = [
+    "aiarena.core.upload_handlers.HashingMemoryFileUploadHandler",
+    "aiarena.core.upload_handlers.HashingTemporaryFileUploadHandler",
+]
+
+# If set, bot files on disk are served by nginx instead of Django: their path under this internal location is handed
+# over in an X-Accel-Redirect header. See nginx/conf.d/aiarena.conf
+PRIVATE_MEDIA_X_ACCEL_REDIRECT = None
+
+# In seconds, how long a presigned S3 URL for a bot file is reused for. See aiarena/core/s3_helpers.py
+PRESIGNED_URL_CACHE_TIME = 0
+
+# Store bot zips and bot data by content, so that identical files are only stored once. See aiarena/core/storage.py
+BOT_FILES_CONTENT_ADDRESSED = False
+
 # elo_k for calculating ladder ELO updates
 ELO_K = 8
 
@@ -587,6 +640,22 @@ if crontab:
             "task": "aiarena.core.tasks.timeout_overtime_matches",
             "schedule": crontab(minute="*/30"),  # At every 30th minute.
         },
+        "requeue_stale_result_stages": {
+            "task": "aiarena.core.tasks.requeue_stale_result_stages",
+            "schedule": timedelta(minutes=5),
+        },
+        "reconcile_elo_ledgers": {
+            "task": "aiarena.core.tasks.reconcile_elo_ledgers",
+            "schedule": timedelta(minutes=10),
+        },
+        "verify_bot_s3_etags": {
+            "task": "aiarena.core.tasks.verify_bot_s3_etags",
+            "schedule": timedelta(minutes=10),
+        },
+        "sweep_content_blobs": {
+            "task": "aiarena.core.tasks.sweep_content_blobs",
+            "schedule": timedelta(hours=1),
+        },
         "flush_api_usage": {
             "task": "aiarena.core.tasks.flush_api_usage",
             "schedule": crontab(minute="1-59/5"),  # :01, :06, :11... — one minute after each 5-min bucket closes.
@@ -116,6 +116,8 @@ AWS_PRIVATE_S3_SIGNATURE_VERSION = "s3v4"
 AWS_PRIVATE_S3_ENCRYPTION = True
 AWS_QUERYSTRING_AUTH = True
 AWS_QUERYSTRING_EXPIRE = 60 * 60
+# Reused presigned URLs must still have long enough to run for once handed out. See aiarena/core/s3_helpers.py
+PRESIGNED_URL_CACHE_TIME = 5 * 60
 AWS_LOCATION = "media/"
 AWS_PRIVATE_LOCATION = "private-media/"
 